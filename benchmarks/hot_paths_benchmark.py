@@ -0,0 +1,296 @@
+"""
+Offline micro-benchmarks of the tools' and utils' hot paths.
+
+The trading client, the historical data client and the bar cache are replaced
+by in-memory fakes that return real alpaca-py models, so no network or
+credentials are needed and every run sees the same data. Each case is
+warmed up once, then timed with timeit (autoranged to at least 0.2s per
+repeat), the median time per call is reported.
+
+Usage (from the repository root):
+    python -m benchmarks.hot_paths_benchmark --json baseline.json
+    python -m benchmarks.hot_paths_benchmark --compare baseline.json --threshold 0.2
+    python -m benchmarks.hot_paths_benchmark --filter portfolio,option
+
+With --compare the exit status is 1 if any case got slower than the
+baseline by more than the threshold (a fraction, 0.2 = 20%).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+PORTFOLIO_SIZES = (10, 100, 1000, 10000)
+CLOSED_ORDERS = 5000
+OPTION_EXPIRIES = 40
+OPTION_STRIKES = 150
+UNDERLYING_PRICE = 200.0
+WATCHLIST = [f"T{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(20)]
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def make_position(i):
+    from alpaca.trading.models import Position
+    qty = i % 50 + 1
+    price = 10 + i % 490
+    return Position(
+        asset_id=uuid.UUID(int=i), symbol=f"S{i:05d}", exchange="NASDAQ", asset_class="us_equity",
+        avg_entry_price=str(price * 0.95), qty=str(qty), side="long", market_value=str(qty * price),
+        cost_basis=str(qty * price * 0.95), unrealized_pl=str(qty * price * 0.05), current_price=str(price),
+        lastday_price=str(price * 0.99), change_today="0.01", qty_available=str(qty))
+
+
+def make_order(i, *, side="buy", status="filled", symbol="TQQQ"):
+    from alpaca.trading.models import Order
+    submitted_at = NOW - timedelta(minutes=CLOSED_ORDERS - i)
+    return Order(
+        id=uuid.UUID(int=i + 1), client_order_id=f"client-{i}", created_at=submitted_at, updated_at=submitted_at,
+        submitted_at=submitted_at, filled_at=submitted_at if status == "filled" else None, asset_id=uuid.UUID(int=0),
+        symbol=symbol, asset_class="us_equity", qty="100", filled_qty="100" if status == "filled" else "0",
+        order_class="simple", order_type="limit", type="limit", side=side, time_in_force="gtc",
+        limit_price=str(50 + i % 10), status=status, extended_hours=False)
+
+
+def make_contract(underlying, option_type, expiry, strike):
+    from alpaca.trading.models import OptionContract
+    symbol = f"{underlying}{expiry:%y%m%d}{option_type[0].upper()}{int(strike * 1000):08}"
+    return OptionContract(
+        id=str(uuid.UUID(int=zlib.crc32(symbol.encode()))), symbol=symbol, name=symbol, status="active", tradable=True,
+        expiration_date=expiry, root_symbol=underlying, underlying_symbol=underlying,
+        underlying_asset_id=uuid.UUID(int=0), type=option_type, style="american", strike_price=strike, size="100",
+        open_interest=str(int(strike) % 700), open_interest_date=NOW.date(),
+        close_price=str(max(0.05, round(abs(UNDERLYING_PRICE - strike) * 0.3 + 2, 2))), close_price_date=NOW.date())
+
+
+class FakeTradingClient:
+    def __init__(self):
+        self.positions = []
+        self.orders = ([make_order(i, side="sell" if i % 3 else "buy", symbol="TQQQ" if i % 2 else "SPY")
+                        for i in range(CLOSED_ORDERS)] +
+                       [make_order(CLOSED_ORDERS + i, status="new") for i in range(10)])
+        self.contracts = {}
+
+    def get_all_positions(self):
+        return list(self.positions)
+
+    def get_orders(self, filter=None):
+        status = str(getattr(filter.status, "value", filter.status))
+        orders = self.orders
+        if status == "open":
+            orders = [o for o in orders if o.status.value not in ("filled", "canceled")]
+        if filter.side is not None:
+            orders = [o for o in orders if o.side.value == str(getattr(filter.side, "value", filter.side))]
+        if filter.symbols:
+            orders = [o for o in orders if o.symbol in filter.symbols]
+        if filter.after is not None:
+            orders = [o for o in orders if o.submitted_at > filter.after]
+        return orders[:filter.limit or 50]
+
+    def get_order_by_id(self, order_id):
+        return next(o for o in self.orders if str(o.id) == str(order_id))
+
+    def get_option_contracts(self, request):
+        option_type = str(getattr(request.type, "value", request.type))
+        key = (request.underlying_symbols[0], option_type)
+        if key not in self.contracts:
+            start = NOW.date()
+            self.contracts[key] = [
+                make_contract(key[0], option_type, start + timedelta(days=7 * (e + 1)), UNDERLYING_PRICE * 0.5 + s)
+                for e in range(OPTION_EXPIRIES) for s in range(OPTION_STRIKES)]
+        contracts = self.contracts[key]
+        offset = int(request.page_token or 0)
+        page = contracts[offset:offset + request.limit]
+        next_offset = offset + len(page)
+        return SimpleNamespace(option_contracts=page,
+                               next_page_token=str(next_offset) if next_offset < len(contracts) else None)
+
+
+class FakeDataClient:
+    @staticmethod
+    def _symbols(request):
+        symbols = request.symbol_or_symbols
+        return [symbols] if isinstance(symbols, str) else symbols
+
+    def get_stock_latest_quote(self, request):
+        return {s: SimpleNamespace(bid_price=UNDERLYING_PRICE - 0.01, ask_price=UNDERLYING_PRICE + 0.01, timestamp=NOW)
+                for s in self._symbols(request)}
+
+    def get_stock_latest_trade(self, request):
+        return {s: SimpleNamespace(price=UNDERLYING_PRICE, timestamp=NOW) for s in self._symbols(request)}
+
+
+class FakeBarCache:
+    """Deterministic random-walk bars, the number of bars follows the period and interval roughly like Yahoo's."""
+
+    def __init__(self):
+        self.frames = {}
+
+    @staticmethod
+    def bars(symbol, count, freq="D"):
+        import numpy as np
+        import pandas as pd
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+        spread = np.abs(rng.normal(0, 0.01, count)) * close
+        index = pd.date_range(end=NOW.replace(tzinfo=None), periods=count, freq=freq, tz="UTC")
+        return pd.DataFrame({"Open": close + rng.normal(0, 0.005, count) * close, "High": close + spread,
+                             "Low": close - spread, "Close": close, "Volume": rng.integers(1e5, 1e7, count)}, index=index)
+
+    def get(self, symbol, period="3mo", interval="1d"):
+        key = (symbol, period, interval)
+        if key not in self.frames:
+            self.frames[key] = self.bars(symbol, 63 if interval == "1d" else 455, "D" if interval == "1d" else "h")
+        return self.frames[key]
+
+    def get_many(self, symbols, period="3mo", interval="1d"):
+        return {symbol: self.get(symbol, period, interval) for symbol in symbols}
+
+
+def install_fakes():
+    """Points the singletons at the fakes. Environment overrides must be set before the modules read them."""
+    os.environ["POSITION_BOOK_STREAM"] = "0"
+    os.environ["INVESTOR_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="hot-paths-benchmark-")
+    from investor_agent.utils import TradingClientSingleton
+    from investor_agent.utils.bar_cache import BarCache
+    trading = FakeTradingClient()
+    TradingClientSingleton.switch_to_prod_account()
+    TradingClientSingleton._instance_prod = trading
+    TradingClientSingleton._instance_paper = trading
+    TradingClientSingleton._data_instance_prod = FakeDataClient()
+    BarCache._instance = FakeBarCache()
+    return trading
+
+
+def cases(trading):
+    """(name, callable) of every benchmark case."""
+    from investor_agent import utils
+    from investor_agent.calls import options_calls, order_calls, portfolio_calls
+    from investor_agent.calls import technical_momentum_indicator_calls as indicators
+    from investor_agent.utils.option_chain import OptionChainCache
+
+    yield "create_option_ticker", lambda: utils.create_option_ticker("AAPL", "2026-12-18", "C", 195.0)
+    yield "parse_date[iso]", lambda: utils.parse_date("2026-12-18")
+    yield "parse_date[us]", lambda: utils.parse_date("12/18/2026")
+    yield "parse_date[datetime]", lambda: utils.parse_date("2026-12-18 15:30:00")
+
+    positions = {n: [make_position(i) for i in range(n)] for n in PORTFOLIO_SIZES}
+    for n in PORTFOLIO_SIZES:
+        def get_portfolio(n=n):
+            trading.positions = positions[n]
+            return portfolio_calls.get_portfolio()
+        yield f"get_portfolio[{n}]", get_portfolio
+
+    yield "get_10_latest_open_buy_orders_for_ticker", lambda: order_calls.get_10_latest_open_buy_orders_for_ticker("TQQQ")
+    yield "get_10_latest_open_sell_orders_for_ticker", lambda: order_calls.get_10_latest_open_sell_orders_for_ticker("TQQQ")
+    yield "get_last_n_closed_orders[100]", lambda: order_calls.get_last_n_closed_orders(100)
+    yield "get_last_n_closed_orders[10,ticker]", lambda: order_calls.get_last_n_closed_orders(10, "TQQQ")
+
+    expiry = (NOW.date() + timedelta(days=7 * 10)).isoformat()
+    yield "get_option_contract[nearest]", lambda: options_calls.get_option_contract("AAPL", "C")
+    yield "get_option_contract[strike]", lambda: options_calls.get_option_contract("AAPL", "P", expiry, 212.5, 100)
+    yield "get_option_contract[delta]", lambda: options_calls.get_option_contract("AAPL", "C", expiry, target_delta=0.3)
+
+    def cold_chain():
+        OptionChainCache.get_instance().invalidate()
+        return options_calls.get_option_contract("AAPL", "C", expiry, 212.5)
+    yield "get_option_contract[cold chain]", cold_chain
+
+    data = indicators.get_stock_data("AAA")
+    long_data = FakeBarCache.bars("LONG", 10000, "min")
+    macd, signal_line = indicators.calculate_macd(data)
+    stochastic_k, stochastic_d = indicators.calculate_stochastic(data)
+    atr = indicators.calculate_atr(data)
+    yield "get_stock_data", lambda: indicators.get_stock_data("AAA")
+    yield "calculate_rsi", lambda: indicators.calculate_rsi("AAA")
+    yield "calculate_macd", lambda: indicators.calculate_macd(data)
+    yield "calculate_macd[10k bars]", lambda: indicators.calculate_macd(long_data)
+    yield "calculate_stochastic", lambda: indicators.calculate_stochastic(data)
+    yield "calculate_stochastic[10k bars]", lambda: indicators.calculate_stochastic(long_data)
+    yield "calculate_atr", lambda: indicators.calculate_atr(data)
+    yield "calculate_atr[10k bars]", lambda: indicators.calculate_atr(long_data)
+    yield "check_macd_signal", lambda: indicators.check_macd_signal(macd, signal_line)
+    yield "check_stochastic_signal", lambda: indicators.check_stochastic_signal(stochastic_k, stochastic_d)
+    yield "check_atr_signal", lambda: indicators.check_atr_signal(atr)
+    yield "analyze_stock", lambda: indicators.analyze_stock("AAA")
+    yield f"analyze_stocks[{len(WATCHLIST)}]", lambda: indicators.analyze_stocks(",".join(WATCHLIST))
+    yield f"screen_universe[{len(WATCHLIST)}]", lambda: indicators.screen_universe(",".join(WATCHLIST))
+
+
+def time_case(fn, repeats=5):
+    fn()  # warm-up: imports, caches, first-call allocations
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [seconds / number for seconds in timer.repeat(repeat=repeats, number=number)]
+    return {"seconds": statistics.median(runs), "min_seconds": min(runs), "number": number, "repeats": repeats}
+
+
+def run(filters=None, repeats=5):
+    trading = install_fakes()
+    results = {}
+    for name, fn in cases(trading):
+        if filters and not any(f in name for f in filters):
+            continue
+        results[name] = time_case(fn, repeats)
+        print(f"{name:<45} {format_seconds(results[name]['seconds']):>12}", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints the change of every case against the baseline and returns the names of the regressed ones."""
+    regressions = []
+    print(f"\n{'case':<45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<45} {'-':>12} {format_seconds(result['seconds']):>12} {'new':>8}")
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<45} {format_seconds(before['seconds']):>12} {format_seconds(result['seconds']):>12} "
+              f"{change * 100:>+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="comma-separated substrings, only matching cases run")
+    parser.add_argument("--repeats", type=int, default=5, help="timed repeats per case, the median is reported")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline results written by an earlier --json run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    filters = [f.strip() for f in args.filter.split(",") if f.strip()] if args.filter else None
+    results = run(filters, args.repeats)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0], "platform": platform.platform(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} cases regressed by more than {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark of the NumPy indicator kernels against the original pandas indicator code.
+
+Bars are synthetic (seeded random walk), so runs are reproducible and need no network.
+The pandas versions run once per symbol on a DataFrame, as the indicator calls did;
+the kernels run once on the whole (time x ticker) panel.
+
+Usage (from the repository root):
+    python -m benchmarks.indicators_benchmark
+    python -m benchmarks.indicators_benchmark --bars 1000,1000000 --symbols 1,500 --json indicators.json
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from investor_agent.utils import indicator_kernels as kernels
+
+
+def synthetic_bars(n_bars, n_symbols, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, size=(n_bars, n_symbols))
+    close = 100 * np.exp(np.cumsum(returns, axis=0))
+    spread = np.abs(rng.normal(0, 0.005, size=(n_bars, n_symbols))) * close
+    return {"High": close + spread, "Low": close - spread, "Close": close}
+
+
+# Reference pandas implementations, as the indicator calls computed them before the kernels.
+def pandas_rsi(data, period=14):
+    delta = data['Close'].diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def pandas_macd(data, short_window=12, long_window=26, signal_window=9):
+    short_ema = data['Close'].ewm(span=short_window, adjust=False).mean()
+    long_ema = data['Close'].ewm(span=long_window, adjust=False).mean()
+    macd = short_ema - long_ema
+    return macd, macd.ewm(span=signal_window, adjust=False).mean()
+
+
+def pandas_stochastic(data, period=14, smooth_d=3):
+    low_min = data['Low'].rolling(window=period).min()
+    high_max = data['High'].rolling(window=period).max()
+    stochastic_k = 100 * (data['Close'] - low_min) / (high_max - low_min)
+    return stochastic_k, stochastic_k.rolling(window=smooth_d).mean()
+
+
+def pandas_atr(data, period=14):
+    high_low = data['High'] - data['Low']
+    high_close = (data['High'] - data['Close'].shift()).abs()
+    low_close = (data['Low'] - data['Close'].shift()).abs()
+    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
+
+
+INDICATORS = {
+    "rsi": (pandas_rsi, lambda bars: kernels.rsi(bars["Close"])),
+    "macd": (pandas_macd, lambda bars: kernels.macd(bars["Close"])),
+    "stochastic": (pandas_stochastic, lambda bars: kernels.stochastic(bars["High"], bars["Low"], bars["Close"])),
+    "atr": (pandas_atr, lambda bars: kernels.atr(bars["High"], bars["Low"], bars["Close"])),
+}
+
+
+def measure(fn, repeats):
+    """Returns (best wall time in seconds, peak traced memory in bytes) of fn()."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(bar_counts, symbol_counts, *, repeats=3, max_cells=20_000_000, seed=0):
+    results = []
+    for n_bars in bar_counts:
+        for n_symbols in symbol_counts:
+            if n_bars * n_symbols > max_cells:
+                continue
+            bars = synthetic_bars(n_bars, n_symbols, seed)
+            frames = [pd.DataFrame({field: values[:, i] for field, values in bars.items()}) for i in range(n_symbols)]
+            for name, (pandas_fn, kernel_fn) in INDICATORS.items():
+                pandas_time, pandas_peak = measure(lambda: [pandas_fn(frame) for frame in frames], repeats)
+                kernel_time, kernel_peak = measure(lambda: kernel_fn(bars), repeats)
+                for impl, seconds, peak in (("pandas", pandas_time, pandas_peak), ("kernel", kernel_time, kernel_peak)):
+                    results.append({
+                        "indicator": name,
+                        "impl": impl,
+                        "bars": n_bars,
+                        "symbols": n_symbols,
+                        "seconds": seconds,
+                        "bars_per_second": n_bars * n_symbols / seconds if seconds else float("inf"),
+                        "peak_mb": peak / 2**20,
+                        "speedup": pandas_time / seconds if seconds else float("inf"),
+                    })
+    return results
+
+
+def format_results(results):
+    header = f"{'indicator':<11} {'impl':<6} {'bars':>8} {'syms':>5} {'ms':>10} {'Mbars/s':>9} {'peakMB':>9} {'xpandas':>8}"
+    rows = [
+        f"{r['indicator']:<11} {r['impl']:<6} {r['bars']:>8} {r['symbols']:>5} {r['seconds'] * 1000:>10.2f} "
+        f"{r['bars_per_second'] / 1e6:>9.2f} {r['peak_mb']:>9.1f} {r['speedup']:>8.1f}"
+        for r in results
+    ]
+    return "\n".join([header] + rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", default="1000,10000,100000,1000000", help="comma-separated bar counts")
+    parser.add_argument("--symbols", default="1,10,100,500", help="comma-separated symbol counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-cells", type=int, default=20_000_000, help="skip combinations with more bars x symbols")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run([int(b) for b in args.bars.split(",")], [int(s) for s in args.symbols.split(",")],
+                  repeats=args.repeats, max_cells=args.max_cells, seed=args.seed)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
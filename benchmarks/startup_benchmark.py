@@ -0,0 +1,103 @@
+"""
+Import time and memory of the agent's modules, each measured in a fresh interpreter.
+
+For every module the benchmark starts a new Python process, imports the module and
+reports the wall time of the import, the growth of the process' peak RSS and which
+heavy dependencies ended up loaded. A module that fails to import is reported with its error.
+
+Usage (from the repository root):
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --modules investor_agent,telegram_client --repeats 5 --json startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "investor_agent",
+    "investor_agent.calls",
+    "investor_agent.utils",
+    "investor_agent.calls.generic_calls",
+    "investor_agent.calls.options_calls",
+    "investor_agent.calls.order_calls",
+    "investor_agent.calls.portfolio_calls",
+    "investor_agent.calls.stock_calls",
+    "investor_agent.calls.technical_momentum_indicator_calls",
+    "investor_agent.calls.overview_calls",
+    "common",
+    "telegram_client",
+]
+
+HEAVY_MODULES = ["pandas", "numpy", "yfinance", "alpaca", "psutil", "dateutil", "vertexai", "gemini_agents_toolkit",
+                 "google.cloud.logging", "httpx", "sqlite3"]
+
+MEASURE = """
+import importlib, json, resource, sys, time
+heavy = json.loads(sys.argv[2])
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+error = None
+try:
+    importlib.import_module(sys.argv[1])
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "seconds": seconds,
+    "rss_kib": after - before,
+    "modules": len(sys.modules),
+    "heavy_loaded": [name for name in heavy if name in sys.modules],
+    "error": error,
+}))
+"""
+
+
+def measure_module(module, repeats=3):
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", MEASURE, module, json.dumps(HEAVY_MODULES)],
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "seconds": statistics.median(run["seconds"] for run in runs),
+        "rss_kib": statistics.median(run["rss_kib"] for run in runs),
+        "modules": runs[-1]["modules"],
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+        "error": runs[-1]["error"],
+    }
+
+
+def run(modules, repeats=3):
+    return [measure_module(module, repeats) for module in modules]
+
+
+def format_results(results):
+    lines = [f"{'module':<58} {'import ms':>10} {'RSS KiB':>9} {'modules':>8}  heavy dependencies loaded"]
+    for r in results:
+        heavy = ", ".join(r["heavy_loaded"]) or "-"
+        lines.append(f"{r['module']:<58} {r['seconds'] * 1000:>10.1f} {r['rss_kib']:>9.0f} {r['modules']:>8}  {heavy}")
+        if r["error"]:
+            lines.append(f"{'':<58} import failed: {r['error']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="comma-separated modules to import")
+    parser.add_argument("--repeats", type=int, default=3, help="fresh processes per module, the median is reported")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run([m.strip() for m in args.modules.split(",") if m.strip()], repeats=args.repeats)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,36 @@
 import investor_agent
-import inspect
-import google.cloud.logging
+import threading
 
-from gemini_agents_toolkit import agent
-import investor_agent
-from google.oauth2 import service_account
-
-import vertexai
 
+MODEL_NAME="gemini-1.5-flash-002"
 
-vertexai.init(project="gemini-trading-backend", location="us-west1")
+GCP_PROJECT = "gemini-trading-backend"
 
+_initialized = False
+_init_lock = threading.Lock()
 
-MODEL_NAME="gemini-1.5-flash-002"
 
-GCP_PROJECT = "gemini-trading-backend"
-GCP_CREDENTAILS = service_account.Credentials.from_service_account_file(
-    './sa.json')
+def init_cloud():
+    """Initializes vertexai and Cloud logging once, on first use instead of at import."""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        import google.cloud.logging
+        from google.oauth2 import service_account
+        import vertexai
 
-logging_client = google.cloud.logging.Client(project=GCP_PROJECT, credentials=GCP_CREDENTAILS)
-logging_client.setup_logging()
+        vertexai.init(project=GCP_PROJECT, location="us-west1")
+        credentials = service_account.Credentials.from_service_account_file(
+            './sa.json')
+        logging_client = google.cloud.logging.Client(project=GCP_PROJECT, credentials=credentials)
+        logging_client.setup_logging()
+        _initialized = True
 
 
 def create_client(user_id, on_message_received):
-    return investor_agent.create_agent(
+    init_cloud()
+    return investor_agent.create_session(
          model_name=MODEL_NAME, 
          debug=True, 
          add_scheduling_functions=True, 
@@ -1,5 +1,5 @@
-from gemini_agents_toolkit import agent
 from investor_agent import calls
+import threading
 
 PROMPT = ["""
 You are a tool for carrying out transactions on the stock market. You act as an interface to interact with the Alpaca markets API.
@@ -27,12 +27,73 @@ Rules for working with data:
 
 
 def create_agent(*, model_name="gemini-1.5-flash", debug=True, add_scheduling_functions=True, gcs_bucket=None, gcs_blob=None, on_message=None):
+    # the toolkit pulls in vertexai, load it only when an agent is created
+    from gemini_agents_toolkit import agent
     return agent.create_agent_from_functions_list(
-         functions=calls.ALL_FUNCTIONS, 
+         # a copy, the toolkit appends the scheduler methods to the list it gets
+         functions=list(calls.ALL_FUNCTIONS), 
          model_name=model_name, 
          debug=debug, 
          system_instruction=PROMPT, 
          add_scheduling_functions=add_scheduling_functions, 
          gcs_bucket=gcs_bucket, 
          gcs_blob=gcs_blob,
-         on_message=on_message)
\ No newline at end of file
+         on_message=on_message)
+
+
+class AgentTemplate:
+    """
+    The tool functions and configuration of the agent, collected once per process and configuration.
+    Sessions are built from them by the toolkit and own their model, chat, history, on_message and scheduler.
+    """
+    _templates = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model_name, *, debug=True, add_scheduling_functions=True):
+        self.model_name = model_name
+        self.functions = tuple(calls.ALL_FUNCTIONS)
+        self.debug = debug
+        self.add_scheduling_functions = add_scheduling_functions
+
+    @classmethod
+    def get_instance(cls, model_name, *, debug=True, add_scheduling_functions=True):
+        key = (model_name, debug, add_scheduling_functions)
+        with cls._lock:
+            template = cls._templates.get(key)
+            if template is None:
+                template = AgentTemplate(model_name, debug=debug, add_scheduling_functions=add_scheduling_functions)
+                cls._templates[key] = template
+            return template
+
+    @classmethod
+    def instances(cls):
+        """All templates built so far."""
+        with cls._lock:
+            return list(cls._templates.values())
+
+    def create_session(self, *, gcs_bucket=None, gcs_blob=None, on_message=None):
+        from gemini_agents_toolkit import agent, scheduler
+        functions = list(self.functions)
+        executor = None
+        if self.add_scheduling_functions:
+            executor = scheduler.ScheduledTaskExecutor(debug=self.debug, gcs_bucket=gcs_bucket, gcs_blob=gcs_blob)
+            functions += [executor.add_task, executor.get_all_jobs, executor.delete_job]
+        # builds GeminiAgent(..., functions=functions) with the toolkit's function calling instructions
+        session = agent.create_agent_from_functions_list(
+            functions=functions,
+            model_name=self.model_name,
+            debug=self.debug,
+            system_instruction=PROMPT,
+            on_message=on_message)
+        session.scheduler = None
+        if executor is not None:
+            executor.set_gemini_agent(session)
+            executor.start_scheduler()
+            session.scheduler = executor.scheduler
+        return session
+
+
+def create_session(*, model_name="gemini-1.5-flash", debug=True, add_scheduling_functions=True, gcs_bucket=None, gcs_blob=None, on_message=None):
+    """Like create_agent, but with the functions of the shared template of the configuration and the scheduler as session.scheduler."""
+    template = AgentTemplate.get_instance(model_name, debug=debug, add_scheduling_functions=add_scheduling_functions)
+    return template.create_session(gcs_bucket=gcs_bucket, gcs_blob=gcs_blob, on_message=on_message)
@@ -1,4 +1,4 @@
-from investor_agent.calls import options_calls, generic_calls, stock_calls, order_calls, portfolio_calls, technical_momentum_indicator_calls
+from investor_agent.calls import options_calls, generic_calls, stock_calls, order_calls, portfolio_calls, technical_momentum_indicator_calls, overview_calls
 import inspect
 
 
@@ -25,4 +25,5 @@ ALL_FUNCTIONS = (get_functions_from_subpackage(options_calls) +
                   get_functions_from_subpackage(stock_calls) +
                   get_functions_from_subpackage(order_calls) +
                   get_functions_from_subpackage(portfolio_calls) +
-                  get_functions_from_subpackage(technical_momentum_indicator_calls))
\ No newline at end of file
+                  get_functions_from_subpackage(technical_momentum_indicator_calls) +
+                  get_functions_from_subpackage(overview_calls))
\ No newline at end of file
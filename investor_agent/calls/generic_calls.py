@@ -1,26 +1,25 @@
-from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils import TradingClientSingleton, AccountSnapshot
 from datetime import datetime, timedelta
 import time
 
-import psutil
 import socket
 
 
 def check_if_trading_is_blocked():
     """Check if trading is blocked for the account"""
-    return f"{TradingClientSingleton.get_instance().get_account().trading_blocked}"
+    return f"{AccountSnapshot.get().trading_blocked}"
 
 
 def get_account_buying_power():
     """
     Returns only cash buying power at this moment.
     """
-    return f"{TradingClientSingleton.get_instance().get_account().buying_power}$"
+    return f"{AccountSnapshot.get().buying_power}$"
 
 
 # def get_non_marginable_buying_power():
 #     """Returns a string with the number of dollars as the non marginable buying power for the account."""
-#     return f"{TradingClientSingleton.get_instance().get_account().non_marginable_buying_power}$"
+#     return f"{AccountSnapshot.get().non_marginable_buying_power}$"
 
 
 def is_account_paper_or_prod():
@@ -47,7 +46,34 @@ def get_account_equity_value():
         - what is my value now?
     The questions may be similar to those above
     """
-    return f"{TradingClientSingleton.get_instance().get_account().equity}$"
+    return f"{AccountSnapshot.get().equity}$"
+
+
+def get_account_summary():
+    """
+    Returns all main account fields in one response: status, whether trading is blocked, equity, last equity, cash,
+    buying power, non marginable buying power, portfolio value, day trade count and account type (paper or prod).
+    Prefer this over calling several single-field account functions.
+    """
+    account = AccountSnapshot.get()
+    return f"""Account type: {is_account_paper_or_prod()}
+Status: {account.status}
+Trading blocked: {account.trading_blocked}
+Equity: {account.equity}$
+Last equity: {account.last_equity}$
+Cash: {account.cash}$
+Buying power: {account.buying_power}$
+Non marginable buying power: {account.non_marginable_buying_power}$
+Portfolio value: {account.portfolio_value}$
+Day trade count: {account.daytrade_count}"""
+
+
+def get_api_budget_usage():
+    """
+    Returns how much of the Alpaca per-minute request budget of the current account is used:
+    available requests, requests in the last minute, calls per lane (orders/reads), waiting calls and 429 responses.
+    """
+    return "\n".join(f"{key}: {value}" for key, value in TradingClientSingleton.get_rate_limit_usage().items())
 
 
 def get_current_date():
@@ -59,6 +85,7 @@ def get_system_info():
     """Returns a string with the system information.
     This includes the container ID, the current date, and the uptime of the container
     """
+    import psutil
     # Get the container ID from the hostname
     container_id = socket.gethostname()
     boot_time = psutil.boot_time()
@@ -1,7 +1,5 @@
 from investor_agent.utils import TradingClientSingleton, submit_market_order, create_option_ticker, submit_stop_sell_order
-from alpaca.trading.requests import OrderSide, TimeInForce, GetOptionContractsRequest, AssetStatus
 from investor_agent.utils import submit_limit_sell_order, submit_sell_market_order, submit_stop_limit_sell_order
-from investor_agent.utils.common import now
 
 """
 This module exclusively handles option contracts for stocks. 
@@ -14,7 +12,8 @@ def get_option_contract(
     option_type: str,
     expiration_date: str = None,
     strike_price: float = None,
-    min_open_interest: int = 0):
+    min_open_interest: int = 0,
+    target_delta: float = None):
     """
     Fetches an information option contract matching the given criteria.
 
@@ -24,34 +23,33 @@ def get_option_contract(
         expiration_date (str, optional): Expiration date in YYYY-MM-DD format. If None, fetches the nearest expiration.
         strike_price (float, optional): Strike price. If None, fetches the closest to the current underlying price.
         min_open_interest (int, optional): Minimum open interest for the contract.
+        target_delta (float, optional): Pick the contract with the delta closest to this instead of by strike,
+            e.g. 0.3 or 30 for a 30-delta option (the sign is taken from the option type).
 
     Returns:
         alpaca.data.models.OptionContract or None: The matching option contract or None if not found.
     """
-    min_open_interest = int(min_open_interest)
-
-    if option_type.lower() == 'c':
-        option_type = 'call'
-    elif option_type.lower() == 'p':
-        option_type = 'put'
-    req = GetOptionContractsRequest(
-        underlying_symbols=[underlying_symbol],
-        status=AssetStatus.ACTIVE,
-        type=option_type.lower(),  # Use lowercase for Alpaca
-        expiration_date_gte=now().date() if not expiration_date else expiration_date,
-        limit=100,  # Fetch enough to find a good match
-    )
-    contracts = TradingClientSingleton.get_instance().get_option_contracts(req).option_contracts
-
-    matching_contracts = [c for c in contracts if c.open_interest and int(c.open_interest) >= min_open_interest]
-
-    if expiration_date:
-        matching_contracts = [c for c in matching_contracts if c.expiration_date == expiration_date]
-
-    if strike_price:
-        matching_contracts = sorted(matching_contracts, key=lambda c: abs(c.strike_price - strike_price))
-
-    return str(matching_contracts[0]) if matching_contracts else None
+    from investor_agent.utils.option_chain import find_option_contract, underlying_closes
+    from investor_agent.utils.greeks import contract_greeks
+    contract = find_option_contract(
+        underlying_symbol,
+        option_type,
+        expiration_date=expiration_date,
+        strike_price=float(strike_price) if strike_price else None,
+        min_open_interest=int(min_open_interest),
+        target_delta=float(target_delta) if target_delta else None)
+    if contract is None:
+        return None
+    if not contract.close_price:
+        return str(contract)
+    closes = underlying_closes(underlying_symbol)
+    day = contract.close_price_date
+    if closes.get(day) is None:
+        return f"{contract}\nNo greeks: no {underlying_symbol.upper()} close for the option's close date {day}"
+    greeks = contract_greeks([contract], closes)
+    return (f"{contract}\nGreeks from the {day} closes of the option ({contract.close_price}) and of "
+            f"{underlying_symbol.upper()} ({closes[day]:.2f}), not from live quotes: iv {greeks.iv[0]:.4f} delta {greeks.delta[0]:.4f} "
+            f"gamma {greeks.gamma[0]:.4f} theta {greeks.theta[0]:.4f} vega {greeks.vega[0]:.4f}")
 
 
 def buy_option_by_market_price(
@@ -77,7 +75,7 @@ def buy_option_by_market_price(
         option_type=option_type,
         strike_price=strike_price,
     )
-    return submit_market_order(option_ticker, qty, time_in_force=TimeInForce.DAY, side=OrderSide.BUY)
+    return submit_market_order(option_ticker, qty, time_in_force="day", side="buy")
 
 
 def sell_option_by_market_price_with_option_ticker(
@@ -127,7 +125,7 @@ def sell_option_by_limit_price(
     """
     qty = int(qty)
     limit_price = float(limit_price)
-    return submit_limit_sell_order(option_ticker, qty, limit_price, time_in_force=TimeInForce.DAY)
+    return submit_limit_sell_order(option_ticker, qty, limit_price, time_in_force="day")
 
 
 def sell_option_by_stop_price(
@@ -143,7 +141,7 @@ def sell_option_by_stop_price(
         qty (int): The number of option contracts to sell.
         stop_price (float): The price at which the stop order will be triggered.
     """
-    return submit_stop_sell_order(option_ticker, qty, stop_price, time_in_force=TimeInForce.DAY)
+    return submit_stop_sell_order(option_ticker, qty, stop_price, time_in_force="day")
 
 
 def sell_option_by_stop_limit_price(
@@ -161,4 +159,4 @@ def sell_option_by_stop_limit_price(
         stop_price (float): The price at which the stop order will be triggered.
         limit_price (float): The limit price at which to sell the option contract.
     """
-    return submit_stop_limit_sell_order(option_ticker, qty, stop_price, limit_price, time_in_force=TimeInForce.DAY)
+    return submit_stop_limit_sell_order(option_ticker, qty, stop_price, limit_price, time_in_force="day")
@@ -1,7 +1,6 @@
-from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils import TradingClientSingleton, AccountSnapshot, submit_orders
 from investor_agent.utils import parse_date
-from alpaca.trading.requests import GetOrdersRequest, QueryOrderStatus, OrderSide
-from dateutil import parser
+import json
 
 
 def get_order_by_id(order_id: str):
@@ -21,6 +20,27 @@ def cancel_order_by_id(order_id: str):
         order_id: The id of the order to remove.
     """
     TradingClientSingleton.get_instance().cancel_order_by_id(order_id=order_id)
+    AccountSnapshot.invalidate()
+
+
+def submit_orders_batch(orders: str):
+    """Submits several orders at once, e.g. a ladder of limit orders or the exit of an option basket.
+    All orders are validated first, nothing is submitted if any of them is invalid.
+    Returns a JSON list with the symbol and either the order id or the error (with the order's index) for every order, in the given order.
+
+    Args:
+        orders: A JSON list of orders. Each order is an object with: symbol (or underlying_symbol, expiration_date,
+            option_type and strike_price for an option), qty, side ("buy" or "sell"), type ("market", "limit", "stop"
+            or "stop_limit", default "market"), limit_price, stop_price, time_in_force ("day" or "gtc"),
+            and optionally take_profit_price and stop_loss_price (required for market buys of stocks).
+    """
+    try:
+        specs = json.loads(orders)
+    except ValueError as e:
+        return f"Invalid JSON: {e}"
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        return "orders should be a JSON list of objects"
+    return json.dumps(submit_orders(specs))
 
 
 def get_10_latest_open_buy_orders_for_ticker(ticker: str):
@@ -29,6 +49,7 @@ def get_10_latest_open_buy_orders_for_ticker(ticker: str):
     Args:
         ticker: The stock symbol to filter the orders.
     """
+    from alpaca.trading.requests import GetOrdersRequest, QueryOrderStatus, OrderSide
     get_orders_data = GetOrdersRequest(
         status=QueryOrderStatus.OPEN,
         limit=10,
@@ -46,6 +67,7 @@ def get_10_latest_open_sell_orders_for_ticker(ticker: str):
     Args:
         ticker: The stock symbol to filter the orders.
     """
+    from alpaca.trading.requests import GetOrdersRequest, QueryOrderStatus, OrderSide
     get_orders_data = GetOrdersRequest(
         status=QueryOrderStatus.OPEN,
         limit=10,
@@ -66,16 +88,14 @@ def get_closed_orders_in_between_dates(date_from: str, date_to: str, limit: int
         limit (int): The maximum number of orders to return.
         ticker (str): The stock symbol to filter the orders.
     """
-    get_orders_data = GetOrdersRequest(
-        status=QueryOrderStatus.CLOSED,
-        after=parse_date(date_from).timestamp(),
-        until=parse_date(date_to).timestamp(),
+    from investor_agent.utils.order_store import OrderStore
+    orders = OrderStore.get_instance().closed_orders(
         limit=limit,
-        symbols=[ticker] if ticker else None,
-        nested=True  # show nested multi-leg orders
+        symbol=ticker,
+        after=parse_date(date_from).timestamp(),
+        until=parse_date(date_to).timestamp()
     )
-    orders = TradingClientSingleton.get_instance().get_orders(filter=get_orders_data)
-    return "\n".join([str(order) for order in orders])
+    return "\n".join(orders)
 
 
 def get_last_n_closed_orders(limit: int = 10, ticker: str =None):
@@ -85,17 +105,6 @@ def get_last_n_closed_orders(limit: int = 10, ticker: str =None):
         limit (int): The maximum number of orders to return.
         ticker (str): The stock symbol or part of option symbol to filter the orders. This is an optional parameter.
     """
-    if ticker:
-        limit = 100
-    get_orders_data = GetOrdersRequest(
-        status=QueryOrderStatus.CLOSED,
-        limit=limit,
-        symbols=None,
-        nested=True  # show nested multi-leg orders
-    )
-    orders = TradingClientSingleton.get_instance().get_orders(filter=get_orders_data)
-    if ticker:
-        # check low casae ticker in lowcase symbol
-        orders = [order for order in orders if ticker.lower() in order.symbol.lower()]
-    return "\n".join([str(order) for order in orders])
-
+    from investor_agent.utils.order_store import OrderStore
+    orders = OrderStore.get_instance().closed_orders(limit=limit, ticker=ticker)
+    return "\n".join(orders)
@@ -0,0 +1,26 @@
+from investor_agent.calls.generic_calls import get_account_summary
+from investor_agent.calls.order_calls import get_10_latest_open_buy_orders_for_ticker, get_10_latest_open_sell_orders_for_ticker
+from investor_agent.calls.portfolio_calls import get_portfolio
+from investor_agent.utils.common import run_concurrently
+
+
+def get_account_overview(ticker: str = None):
+    """
+    Returns the account summary, the portfolio table and the open buy and sell orders in one response.
+    Use this for questions like "how am I doing?" instead of calling the single functions one by one.
+
+    Args:
+        ticker: Optional stock symbol to filter the open orders. By default all open orders are shown.
+    """
+    sections = run_concurrently({
+        "Account": get_account_summary,
+        "Portfolio": get_portfolio,
+        "Open buy orders": lambda: get_10_latest_open_buy_orders_for_ticker(ticker),
+        "Open sell orders": lambda: get_10_latest_open_sell_orders_for_ticker(ticker),
+    })
+    parts = []
+    for title, result in sections.items():
+        if isinstance(result, Exception):
+            result = f"unavailable ({result})"
+        parts.append(f"{title}:\n{result or 'None'}")
+    return "\n\n".join(parts)
@@ -1,5 +1,3 @@
-from investor_agent.utils import TradingClientSingleton
-
 def get_portfolio_value(positions=None):
     """
     Returns the current total market value of the portfolio.
@@ -7,7 +5,9 @@ def get_portfolio_value(positions=None):
     Do not pass anything here as an argument!
     """
     if positions is None:
-        positions = TradingClientSingleton.get_instance().get_all_positions()
+        from investor_agent.utils.position_book import PositionBook
+        from investor_agent.utils.quote_stream import with_live_prices
+        positions = with_live_prices(PositionBook.get_instance().get_positions())
     return sum(float(pos.market_value) for pos in positions if pos.qty != 0)
 
 def get_portfolio():
@@ -15,7 +15,9 @@ def get_portfolio():
     Returns a table representing the portfolio of the account.
     It should be printed in Telegram as is, without adding any formatting characters!
     """
-    positions = TradingClientSingleton.get_instance().get_all_positions()
+    from investor_agent.utils.position_book import PositionBook
+    from investor_agent.utils.quote_stream import with_live_prices
+    positions = with_live_prices(PositionBook.get_instance().get_positions())
     positions = [pos for pos in positions if pos.qty != 0]
 
     # If there are no positions, return a simple message
@@ -1,7 +1,4 @@
 from investor_agent.utils import submit_limit_buy_order, submit_limit_sell_order, submit_sell_market_order, submit_buy_market_order
-from alpaca.trading.requests import TimeInForce
-from investor_agent.utils import TradingClientSingleton
-from alpaca.data.requests import StockLatestQuoteRequest
 
 
 def got_stock_price(symbol: str):
@@ -10,11 +7,19 @@ def got_stock_price(symbol: str):
     Args:
         symbol: The stock symbol to get the price of.
     """
-    data_client = TradingClientSingleton.get_histrical_data_client()
-    multisymbol_request_params = StockLatestQuoteRequest(symbol_or_symbols=[symbol])
+    from investor_agent.utils.quotes import get_quote
+    quote = get_quote(symbol)
+    return quote.ask_price or quote.last_price
 
-    latest_multisymbol_quotes = data_client.get_stock_latest_quote(multisymbol_request_params)
-    return latest_multisymbol_quotes[symbol].ask_price
+
+def get_stock_quote(symbol: str):
+    """Get the latest bid, ask, mid and last trade prices of a stock, with the time of the quote and of the last trade.
+
+    Args:
+        symbol: The stock symbol to get the quote of.
+    """
+    from investor_agent.utils.quotes import get_quote
+    return str(get_quote(symbol))
 
 
 def buy_stock_by_market_price(symbol: str, qty: float, take_profit_price: float, stop_loss_price: float):
@@ -28,7 +33,7 @@ def buy_stock_by_market_price(symbol: str, qty: float, take_profit_price: float,
         stop_loss_price: The price at which the stop loss order will be executed.
     """
     return submit_buy_market_order(symbol, qty,
-        time_in_force=TimeInForce.GTC,
+        time_in_force="gtc",
         take_profit_price=take_profit_price,
         stop_loss_price=stop_loss_price)
 
@@ -1,5 +1,4 @@
-import yfinance as yf
-import pandas as pd
+# pandas, the kernels and the market data are imported on first use, so importing the tools stays cheap
 
 """
 RSI:
@@ -17,7 +16,7 @@ ATR doesn’t provide direct buy/sell signals but indicates volatility. A high A
 
 
 # RSI Calculation
-def calculate_rsi(ticker: str, period: int = 14) -> pd.Series:
+def calculate_rsi(ticker: str, period: int = 14) -> "pd.Series":
     """
     Calculate the Relative Strength Index (RSI) for the given stock data.
 
@@ -28,18 +27,9 @@ def calculate_rsi(ticker: str, period: int = 14) -> pd.Series:
     Returns:
         pd.Series: RSI values for the given stock data.
     """
+    from investor_agent.utils import indicator_kernels as kernels
     data = get_stock_data(ticker)
-    delta = data['Close'].diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi.iloc[-1]
+    return kernels.rsi(data['Close'].to_numpy(), int(period))[-1]
 
 
 # def convert_rsi_to_signal(rsi: int) -> str:
@@ -58,7 +48,7 @@ def calculate_rsi(ticker: str, period: int = 14) -> pd.Series:
 
 
 # MACD Calculation
-def calculate_macd(data: pd.DataFrame, short_window: int = 12, long_window: int = 26, signal_window: int = 9) -> tuple[pd.Series, pd.Series]:
+def calculate_macd(data: "pd.DataFrame", short_window: int = 12, long_window: int = 26, signal_window: int = 9) -> "tuple[pd.Series, pd.Series]":
     """
     Calculate the Moving Average Convergence Divergence (MACD) and the signal line.
 
@@ -71,16 +61,13 @@ def calculate_macd(data: pd.DataFrame, short_window: int = 12, long_window: int
     Returns:
         tuple[pd.Series, pd.Series]: Tuple containing MACD values and signal line values.
     """
-    short_ema = data['Close'].ewm(span=short_window, adjust=False).mean()
-    long_ema = data['Close'].ewm(span=long_window, adjust=False).mean()
-
-    macd = short_ema - long_ema
-    signal_line = macd.ewm(span=signal_window, adjust=False).mean()
-
-    return macd, signal_line
+    from investor_agent.utils import indicator_kernels as kernels
+    close = data['Close']
+    macd, signal_line = kernels.macd(close.to_numpy(), short_window, long_window, signal_window)
+    return kernels.wrap(macd, close), kernels.wrap(signal_line, close)
 
 # Stochastic Oscillator Calculation
-def calculate_stochastic(data: pd.DataFrame, period: int = 14, smooth_k: int = 3, smooth_d: int = 3) -> tuple[pd.Series, pd.Series]:
+def calculate_stochastic(data: "pd.DataFrame", period: int = 14, smooth_k: int = 3, smooth_d: int = 3) -> "tuple[pd.Series, pd.Series]":
     """
     Calculate the Stochastic Oscillator values (%K and %D).
 
@@ -93,16 +80,13 @@ def calculate_stochastic(data: pd.DataFrame, period: int = 14, smooth_k: int = 3
     Returns:
         tuple[pd.Series, pd.Series]: Tuple containing %K and %D values.
     """
-    low_min = data['Low'].rolling(window=period).min()
-    high_max = data['High'].rolling(window=period).max()
-
-    stochastic_k = 100 * (data['Close'] - low_min) / (high_max - low_min)
-    stochastic_d = stochastic_k.rolling(window=smooth_d).mean()
-
-    return stochastic_k, stochastic_d
+    from investor_agent.utils import indicator_kernels as kernels
+    close = data['Close']
+    stochastic_k, stochastic_d = kernels.stochastic(data['High'].to_numpy(), data['Low'].to_numpy(), close.to_numpy(), period, smooth_d)
+    return kernels.wrap(stochastic_k, close), kernels.wrap(stochastic_d, close)
 
 # ATR Calculation
-def calculate_atr(data: pd.DataFrame, period: int = 14) -> pd.Series:
+def calculate_atr(data: "pd.DataFrame", period: int = 14) -> "pd.Series":
     """
     Calculate the Average True Range (ATR), a volatility indicator.
 
@@ -113,19 +97,15 @@ def calculate_atr(data: pd.DataFrame, period: int = 14) -> pd.Series:
     Returns:
         pd.Series: ATR values for the given stock data.
     """
-    high_low = data['High'] - data['Low']
-    high_close = (data['High'] - data['Close'].shift()).abs()
-    low_close = (data['Low'] - data['Close'].shift()).abs()
-
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-
-    return atr
+    from investor_agent.utils import indicator_kernels as kernels
+    close = data['Close']
+    atr = kernels.atr(data['High'].to_numpy(), data['Low'].to_numpy(), close.to_numpy(), period)
+    return kernels.wrap(atr, close)
 
 # Stock Data Fetching
-def get_stock_data(ticker: str, period: str = '3mo', interval: str = '1d') -> pd.DataFrame:
+def get_stock_data(ticker: str, period: str = '3mo', interval: str = '1d') -> "pd.DataFrame":
     """
-    Fetch historical stock data for a given ticker.
+    Fetch historical stock data for a given ticker. Bars are served from the local bar cache, only newer bars are downloaded, and are shared by all calls of the current market data session.
 
     Args:
         ticker (str): Stock ticker symbol (e.g., 'AAPL', 'MSFT').
@@ -135,12 +115,12 @@ def get_stock_data(ticker: str, period: str = '3mo', interval: str = '1d') -> pd
     Returns:
         pd.DataFrame: Historical stock data.
     """
-    stock_data = yf.download(ticker, period=period, interval=interval)
-    return stock_data
+    from investor_agent.utils.market_data import get_bars
+    return get_bars(ticker, period=period, interval=interval)
 
 
 # Signal Check for MACD
-def check_macd_signal(macd: pd.Series, signal_line: pd.Series) -> str:
+def check_macd_signal(macd: "pd.Series", signal_line: "pd.Series") -> str:
     """
     Check the MACD buy/sell signal based on MACD and signal line values.
 
@@ -159,7 +139,7 @@ def check_macd_signal(macd: pd.Series, signal_line: pd.Series) -> str:
         return "MACD Signal: No clear signal"
 
 # Signal Check for Stochastic Oscillator
-def check_stochastic_signal(stochastic_k: pd.Series, stochastic_d: pd.Series) -> str:
+def check_stochastic_signal(stochastic_k: "pd.Series", stochastic_d: "pd.Series") -> str:
     """
     Check the Stochastic Oscillator buy/sell signal based on %K and %D values.
 
@@ -178,7 +158,7 @@ def check_stochastic_signal(stochastic_k: pd.Series, stochastic_d: pd.Series) ->
         return "Stochastic Oscillator: No clear signal"
 
 # Signal Check for ATR
-def check_atr_signal(atr: pd.Series) -> str:
+def check_atr_signal(atr: "pd.Series") -> str:
     """
     Check the ATR value to indicate volatility.
 
@@ -221,5 +201,78 @@ def analyze_stock(ticker: str) -> None:
     {atr_signal}
     """
 
+def analyze_stocks(tickers: str) -> str:
+    """
+    Analyze several stocks at once and return a compact table of RSI, MACD, Stochastic Oscillator and ATR signals per ticker.
+    Use this instead of calling analyze_stock for each ticker of a watchlist.
+
+    Args:
+        tickers (str): Comma-separated stock ticker symbols (e.g., 'AAPL,MSFT,NVDA').
+
+    Returns:
+        str: One row per ticker with the RSI value, MACD signal, Stochastic %K and signal, and ATR value.
+    """
+    from investor_agent.utils import indicator_kernels as kernels
+    from investor_agent.utils.market_data import get_bars_many, aligned_panel
+    if isinstance(tickers, str):
+        tickers = tickers.split(",")
+    tickers = [t.strip().upper() for t in tickers if t.strip()]
+    if not tickers:
+        return "No tickers provided."
+
+    frames = get_bars_many(tickers)
+    # the MACD crossover compares the last two bars, shorter histories are reported as missing
+    frames = {t: f for t, f in frames.items() if len(f[['High', 'Low', 'Close']].dropna()) >= 2}
+    missing = [t for t in tickers if t not in frames]
+
+    rows = []
+    if frames:
+        # (bar x ticker) panel for each field, all indicators are computed in one pass over it
+        panel = aligned_panel(frames)
+
+        macd, signal_line = calculate_macd(panel)
+        stochastic_k, _ = calculate_stochastic(panel)
+        atr = calculate_atr(panel)
+
+        rsi = kernels.wrap(kernels.rsi(panel['Close'].to_numpy()), panel['Close'])
+
+        macd_buy = (macd.iloc[-1] > signal_line.iloc[-1]) & (macd.iloc[-2] < signal_line.iloc[-2])
+        macd_sell = (macd.iloc[-1] < signal_line.iloc[-1]) & (macd.iloc[-2] > signal_line.iloc[-2])
+
+        header = f"{'Tkr':<6} {'RSI':>6} {'RSIs':>4} {'MACDs':>5} {'%K':>6} {'STOs':>4} {'ATR':>8}"
+        rows.append(header)
+        for ticker in tickers:
+            if ticker not in frames:
+                continue
+            last_rsi = rsi[ticker].iloc[-1]
+            last_k = stochastic_k[ticker].iloc[-1]
+            rsi_signal = "Sell" if last_rsi > 70 else "Buy" if last_rsi < 30 else "-"
+            macd_signal = "Buy" if macd_buy[ticker] else "Sell" if macd_sell[ticker] else "-"
+            stochastic_signal = "Sell" if last_k > 80 else "Buy" if last_k < 20 else "-"
+            rows.append(f"{ticker:<6} {last_rsi:>6.2f} {rsi_signal:>4} {macd_signal:>5} {last_k:>6.2f} {stochastic_signal:>4} {atr[ticker].iloc[-1]:>8.2f}")
+
+    if missing:
+        rows.append(f"No data for: {', '.join(missing)}")
+    return "\n".join(rows)
+
+def screen_universe(universe: str = "nasdaq100", top: int = 10) -> str:
+    """
+    Screens a whole index for oversold and overbought stocks (RSI, Stochastic Oscillator and MACD signals on daily bars),
+    ranked by how many signals agree and how extreme they are. Use this for questions like "what is oversold in the Nasdaq?".
+
+    Args:
+        universe (str): 'sp500', 'nasdaq100' or comma-separated stock ticker symbols. Defaults to 'nasdaq100'.
+        top (int): Number of stocks to list per side. Defaults to 10.
+
+    Returns:
+        str: The oversold and the overbought stocks with their score, RSI, %K, MACD signal, ATR in % of the price and close.
+    """
+    from investor_agent.utils import screener
+    oversold, overbought, missing = screener.screen_universe(universe)
+    parts = [screener.format_hits("Oversold", oversold, int(top)), screener.format_hits("Overbought", overbought, int(top))]
+    if missing:
+        parts.append(f"No data for: {', '.join(missing)}")
+    return "\n\n".join(parts)
+
 # Example usage
 # analyze_stock("MSFT")  # You can replace 'MSFT' with any stock ticker
@@ -1,16 +1,19 @@
-import yfinance as yf
-
-
 def get_stock_price(stock_ticker: str):
     """Returns the current price of the given stock ticker.
     
     Args:
         stock_ticker: The stock ticker to get the price.
     """
-    stock = yf.Ticker(stock_ticker)
-    price = None
-    if 'currentPrice' in stock.info:
-        price = stock.info['currentPrice']
-    else:
-        price = stock.info['ask']
-    return price
+    from alpaca.common.exceptions import APIError
+    from investor_agent.utils.quotes import get_quote
+    try:
+        quote = get_quote(stock_ticker)
+        price = quote.last_price or quote.mid_price
+        if price:
+            return price
+    except (KeyError, ValueError, APIError):
+        # not covered by the Alpaca data feed (e.g. BMW.DE), rejected symbol or missing credentials
+        pass
+    # ask yfinance for the last price only
+    import yfinance as yf
+    return yf.Ticker(stock_ticker).fast_info['lastPrice']
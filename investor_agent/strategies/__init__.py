@@ -0,0 +1 @@
+from investor_agent.strategies.tqqq_dip import DipParams, DipState, DipAction, DipResult, run_dip_strategy
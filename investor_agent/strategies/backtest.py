@@ -0,0 +1,273 @@
+"""
+Vectorized backtester of the buy-the-dip / take-profit strategy (see tqqq_dip.plan()).
+
+The strategy decides every `every` bars at the bar's close, with the same
+rules as the live executor. Orders rest until they fill or are replaced.
+Fills are simulated from the following bars: a buy limit fills at the first bar whose
+low reaches it, a sell limit at the first bar whose high reaches it, at the
+limit or at the bar's open if the bar gapped through it. The bars are
+reduced once per `every` to the lowest low and highest high of each decision
+window, then every combination jumps from event to event (fill, replaced
+buy) with vectorized searches instead of stepping through all decisions.
+Combinations sharing `every` run as one chunk, the chunks of different
+`every` values are spread over a process pool. Reports P&L, return on the capital of one position at the
+first price, max drawdown of the equity at the decision points, turnover
+(traded notional / capital) and the number of round trips.
+
+Usage (from the repository root):
+    python -m investor_agent.strategies.backtest --symbol TQQQ --period 2y --interval 1h \\
+        --take-profit 1.03,1.05,1.08 --buy-discount 0.95,0.97 --stale-buy 0.9,0.95 --every 1,4,8
+    python -m investor_agent.strategies.backtest --csv tqqq_1m.csv --every 30,60,120 --json results.json
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from investor_agent.strategies.tqqq_dip import DipParams
+
+GRID_FIELDS = ("take_profit", "buy_discount", "stale_buy", "every")
+
+_bars = None
+
+
+def simulate(open_, high, low, close, take_profit, buy_discount, stale_buy, every, qty=DipParams().qty):
+    """
+    Simulates the combinations given by the arrays take_profit, buy_discount and stale_buy (same length)
+    over the bars, deciding every `every` bars. Returns a dict of result arrays, one value per combination.
+    """
+    if every < 1:
+        raise ValueError(f"every should be at least 1 bar, got {every}")
+    take_profit, buy_discount, stale_buy = (np.asarray(a, dtype=np.float64) for a in (take_profit, buy_discount, stale_buy))
+    bars = len(close)
+    capital = qty * close[0]
+    # decision k is taken at the close of bar starts[k], its orders can fill from the next bar up to bar ends[k]
+    starts = np.arange(0, bars - 1, every)
+    ends = np.minimum(starts + every, bars - 1)
+    windows = _Windows(open_, high, low, close, starts, ends)
+    results = [_simulate_one(windows, tp, discount, stale, qty) for tp, discount, stale in zip(take_profit, buy_discount, stale_buy)]
+    equity, max_drawdown, traded, trips, holding = (np.array(values) for values in zip(*results)) if results else [np.zeros(0)] * 5
+    return {
+        "pnl": equity,
+        "return_pct": equity / capital * 100,
+        "max_drawdown": max_drawdown,
+        "max_drawdown_pct": max_drawdown / capital * 100,
+        "turnover": traded / capital,
+        "round_trips": trips.astype(np.int64),
+        "holding": holding.astype(bool),
+    }
+
+
+class _Windows:
+    """Per decision: the close it is taken at, the close its window ends at and the window's lowest low and highest high."""
+
+    def __init__(self, open_, high, low, close, starts, ends):
+        self.open, self.high, self.low = open_, high, low
+        self.starts, self.ends = starts, ends
+        self.count = len(starts)
+        self.close = close[starts]
+        self.end_close = close[ends]
+        # window k holds the bars starts[k] + 1 .. ends[k], fmin/fmax skip NaN like the comparisons bar by bar
+        self.low_min = np.fmin.reduceat(low[1:], starts) if self.count else np.zeros(0)
+        self.high_max = np.fmax.reduceat(high[1:], starts) if self.count else np.zeros(0)
+
+    def first_bar(self, k, series, hit):
+        """The first bar of window k for which hit(series) is true."""
+        start = self.starts[k] + 1
+        return start + int(np.argmax(hit(series[start:self.ends[k] + 1])))
+
+
+def _search(start, end, condition):
+    """
+    First index in [start, end) where condition(block_start, block_stop) is true, end if none.
+    Blocks grow from 64 indices, so nearby events cost one small comparison and far ones a few large ones.
+    """
+    size = 64
+    while start < end:
+        stop = min(end, start + size)
+        hits = np.flatnonzero(condition(start, stop))
+        if len(hits):
+            return start + int(hits[0])
+        start = stop
+        size *= 2
+    return end
+
+
+def _simulate_one(w, take_profit, buy_discount, stale_buy, qty):
+    """
+    Simulates one combination by jumping from event to event (fill, replaced buy) instead of stepping
+    every decision. Returns (pnl, max_drawdown, traded, round_trips, holding).
+    """
+    n = w.count
+    cash_delta = np.zeros(n)
+    hold_delta = np.zeros(n)
+    traded = 0.0
+    trips = 0
+    holding = False
+
+    def replaced_buy_event(s, e):
+        # while every decision replaces the stale buy, it follows the closes: buy_k = round(close_k * buy_discount),
+        # until a window reaches it or the next close leaves it in place
+        buy = np.round(w.close[s:e] * buy_discount, 2)
+        replaced_next = np.zeros(e - s, dtype=bool)
+        last = min(e, n - 1)
+        replaced_next[:last - s] = buy[:last - s] < w.close[s + 1:last + 1] * stale_buy
+        return (w.low_min[s:e] <= buy) | ~replaced_next
+
+    # with no buy resting, the first decision places one
+    k = 0
+    while k < n:
+        # decision k (re)places the buy at its close
+        k = _search(k, n, replaced_buy_event)
+        if k == n:
+            break
+        buy_px = np.round(w.close[k] * buy_discount, 2)
+        if not w.low_min[k] <= buy_px:
+            # the buy rests from decision k on, until a window reaches it or a close makes it stale
+            k = _search(k + 1, n, lambda s, e: (w.low_min[s:e] <= buy_px) | (buy_px < w.close[s:e] * stale_buy))
+            if k == n:
+                break
+            if buy_px < w.close[k] * stale_buy:
+                continue
+        j = w.first_bar(k, w.low, lambda low: low <= buy_px)
+        fill = float(np.minimum(buy_px, w.open[j]))
+        cash_delta[k] -= qty * fill
+        traded += qty * fill
+        hold_delta[k] = 1
+        holding = True
+        # the sell is placed at the next decision and rests until a window reaches it
+        k += 1
+        if k == n:
+            break
+        sell_px = np.round(w.close[k] * take_profit, 2)
+        k = _search(k, n, lambda s, e: w.high_max[s:e] >= sell_px)
+        if k == n:
+            break
+        j = w.first_bar(k, w.high, lambda high: high >= sell_px)
+        fill = float(np.maximum(sell_px, w.open[j]))
+        cash_delta[k] += qty * fill
+        traded += qty * fill
+        hold_delta[k] = -1
+        trips += 1
+        holding = False
+        k += 1
+
+    cash = np.cumsum(cash_delta)
+    equity = cash + np.cumsum(hold_delta) * (qty * w.end_close)
+    peak = np.maximum.accumulate(equity) if n else equity
+    np.maximum(peak, 0, out=peak)
+    max_drawdown = max(0.0, float((peak - equity).max())) if n else 0.0
+    return (float(equity[-1]) if n else 0.0), max_drawdown, traded, trips, holding
+
+
+def _init_worker(bars):
+    global _bars
+    _bars = bars
+
+
+def _run_chunk(every, combos, qty):
+    """Runs one chunk of combinations (take_profit, buy_discount, stale_buy) sharing `every` on the worker's bars."""
+    combos = np.asarray(combos, dtype=np.float64)
+    results = simulate(*_bars, combos[:, 0], combos[:, 1], combos[:, 2], every, qty)
+    rows = []
+    for i, (take_profit, buy_discount, stale_buy) in enumerate(combos):
+        row = {"take_profit": take_profit, "buy_discount": buy_discount, "stale_buy": stale_buy, "every": every}
+        row.update({key: values[i].item() for key, values in results.items()})
+        rows.append(row)
+    return rows
+
+
+def _chunks(grid):
+    """One chunk per `every`, its combinations share the reduction of the bars to decision windows."""
+    by_every = {}
+    for take_profit, buy_discount, stale_buy, every in grid:
+        by_every.setdefault(int(every), []).append((take_profit, buy_discount, stale_buy))
+    return list(by_every.items())
+
+
+def run_grid(bars, grid, *, qty=DipParams().qty, max_workers=None):
+    """
+    Backtests every (take_profit, buy_discount, stale_buy, every) of grid over bars, a tuple of
+    float64 arrays (open, high, low, close). Returns one result dict per combination, best P&L first.
+    """
+    bars = tuple(np.ascontiguousarray(a, dtype=np.float64) for a in bars)
+    grid = list(grid)
+    workers = max_workers or int(os.getenv("BACKTEST_MAX_WORKERS", str(os.cpu_count() or 1)))
+    chunks = _chunks(grid)
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(bars)
+        rows = [row for every, combos in chunks for row in _run_chunk(every, combos, qty)]
+    else:
+        # the bars are sent once per worker, not once per chunk
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(bars,)) as executor:
+            futures = [executor.submit(_run_chunk, every, combos, qty) for every, combos in chunks]
+            rows = [row for future in futures for row in future.result()]
+    return sorted(rows, key=lambda row: row["pnl"], reverse=True)
+
+
+def make_grid(take_profit, buy_discount, stale_buy, every):
+    return list(itertools.product(take_profit, buy_discount, stale_buy, every))
+
+
+def load_bars(*, symbol=None, period="2y", interval="1h", csv=None):
+    """Reads (open, high, low, close) from a CSV file (any column case) or from the bar cache."""
+    import pandas as pd
+    if csv:
+        frame = pd.read_csv(csv)
+        frame.columns = [str(c).lower() for c in frame.columns]
+    else:
+        from investor_agent.utils.market_data import get_bars
+        frame = get_bars(symbol, period=period, interval=interval)
+        frame.columns = [str(c).lower() for c in frame.columns]
+    frame = frame.dropna(subset=["open", "high", "low", "close"])
+    return tuple(frame[c].to_numpy(dtype=np.float64) for c in ("open", "high", "low", "close"))
+
+
+def format_results(rows, top=20):
+    lines = [f"{'tp':>6} {'buy':>6} {'stale':>6} {'every':>6} {'P&L':>11} {'ret %':>8} {'max DD':>10} {'DD %':>7} {'turnover':>9} {'trips':>6}"]
+    for r in rows[:top]:
+        lines.append(f"{r['take_profit']:>6.3f} {r['buy_discount']:>6.3f} {r['stale_buy']:>6.3f} {r['every']:>6} "
+                     f"{r['pnl']:>11.2f} {r['return_pct']:>8.2f} {r['max_drawdown']:>10.2f} {r['max_drawdown_pct']:>7.2f} "
+                     f"{r['turnover']:>9.2f} {r['round_trips']:>6}")
+    return "\n".join(lines)
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main():
+    defaults = DipParams()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbol", default=defaults.symbol)
+    parser.add_argument("--period", default="2y", help="bar cache period, e.g. 5d, 6mo, 2y")
+    parser.add_argument("--interval", default="1h", help="bar cache interval, e.g. 1m, 1h, 1d")
+    parser.add_argument("--csv", help="read bars with open, high, low and close columns from this file instead")
+    parser.add_argument("--take-profit", default=str(defaults.take_profit), help="comma-separated values")
+    parser.add_argument("--buy-discount", default=str(defaults.buy_discount), help="comma-separated values")
+    parser.add_argument("--stale-buy", default=str(defaults.stale_buy), help="comma-separated values")
+    parser.add_argument("--every", default="1", help="comma-separated decision intervals, in bars")
+    parser.add_argument("--qty", type=int, default=defaults.qty)
+    parser.add_argument("--workers", type=int, help="processes, defaults to BACKTEST_MAX_WORKERS or the CPU count")
+    parser.add_argument("--top", type=int, default=20, help="rows to print")
+    parser.add_argument("--json", help="also write all results to this file")
+    args = parser.parse_args()
+
+    bars = load_bars(symbol=args.symbol, period=args.period, interval=args.interval, csv=args.csv)
+    grid = make_grid(_floats(args.take_profit), _floats(args.buy_discount), _floats(args.stale_buy),
+                     [int(v) for v in _floats(args.every)])
+    started = time.perf_counter()
+    rows = run_grid(bars, grid, qty=args.qty, max_workers=args.workers)
+    print(format_results(rows, args.top))
+    print(f"{len(grid)} combinations over {len(bars[3])} bars in {time.perf_counter() - started:.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
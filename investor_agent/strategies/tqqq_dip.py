@@ -0,0 +1,171 @@
+from typing import NamedTuple, Optional
+
+from investor_agent.utils import TradingClientSingleton, AccountSnapshot, submit_limit_buy_order, submit_limit_sell_order
+from investor_agent.utils.common import run_concurrently
+
+"""
+Deterministic executor of the TQQQ buy-the-dip pipeline.
+
+Every decision of the pipeline (price, position size, open limit orders)
+is answered by one direct call to the same utils the agent's tools use,
+the three reads run concurrently. The LLM is only asked for the optional
+summary, see summarize(). Rules, with P the current price:
+  - 100+ shares held and no open limit sell: sell 100 at P * 1.05
+  - 100+ shares held and an open limit buy: cancel it
+  - fewer shares and no open limit buy: buy 100 at P * 0.97
+  - fewer shares and the latest open limit buy is below P * 0.95
+    (the price ran away from it): cancel it and buy 100 at P * 0.97
+"""
+
+
+class DipParams(NamedTuple):
+    symbol: str = "TQQQ"
+    qty: int = 100
+    take_profit: float = 1.05
+    buy_discount: float = 0.97
+    stale_buy: float = 0.95
+
+
+class OpenLimitOrder(NamedTuple):
+    id: str
+    side: str
+    qty: float
+    limit_price: float
+    submitted_at: object
+
+
+class DipState(NamedTuple):
+    price: float
+    shares: float
+    open_buys: list[OpenLimitOrder]
+    open_sells: list[OpenLimitOrder]
+    paper: bool
+
+
+class DipAction(NamedTuple):
+    kind: str  # "buy", "sell" or "cancel"
+    qty: Optional[float] = None
+    limit_price: Optional[float] = None
+    order_id: Optional[str] = None
+    reason: str = ""
+
+    def __str__(self):
+        if self.kind == "cancel":
+            return f"cancel order {self.order_id} ({self.reason})"
+        text = f"limit {self.kind} {self.qty} at {self.limit_price} ({self.reason})"
+        return f"{text}, order {self.order_id}" if self.order_id else text
+
+
+class DipResult(NamedTuple):
+    params: DipParams
+    state: DipState
+    actions: list[DipAction]
+    dry_run: bool
+
+    def __str__(self):
+        p, s = self.params, self.state
+        lines = [f"{p.symbol} at {s.price:.2f} on the {'paper' if s.paper else 'prod'} account, {s.shares:g} shares held, "
+                 f"{len(s.open_buys)} open limit buys, {len(s.open_sells)} open limit sells."]
+        if not self.actions:
+            lines.append("Nothing to do.")
+        lines += [("Would " if self.dry_run else "") + str(action) for action in self.actions]
+        return "\n".join(lines)
+
+
+def _value(field):
+    return getattr(field, "value", field)
+
+
+def _open_limit_orders(symbol):
+    from alpaca.trading.requests import GetOrdersRequest, QueryOrderStatus
+    orders = TradingClientSingleton.get_instance().get_orders(
+        filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, symbols=[symbol], nested=True))
+    return [OpenLimitOrder(str(order.id), _value(order.side), float(order.qty or 0), float(order.limit_price), order.submitted_at)
+            for order in orders
+            if _value(order.order_type) == "limit" and _value(order.status) not in ("canceled", "pending_cancel")]
+
+
+def _shares(symbol):
+    from investor_agent.utils.position_book import PositionBook
+    return sum(float(pos.qty) for pos in PositionBook.get_instance().get_positions() if pos.symbol == symbol)
+
+
+def _price(symbol):
+    from investor_agent.utils.quotes import get_quote
+    quote = get_quote(symbol)
+    return quote.last_price or quote.mid_price
+
+
+def read_state(params: DipParams = DipParams()) -> DipState:
+    """Reads the price, the position and the open limit orders of params.symbol concurrently."""
+    results = run_concurrently({
+        "price": lambda: _price(params.symbol),
+        "shares": lambda: _shares(params.symbol),
+        "orders": lambda: _open_limit_orders(params.symbol),
+    })
+    for result in results.values():
+        if isinstance(result, Exception):
+            raise result
+    orders = sorted(results["orders"], key=lambda order: order.submitted_at, reverse=True)
+    return DipState(
+        price=float(results["price"]),
+        shares=results["shares"],
+        open_buys=[order for order in orders if order.side == "buy"],
+        open_sells=[order for order in orders if order.side == "sell"],
+        paper=TradingClientSingleton.is_paper())
+
+
+def plan(state: DipState, params: DipParams = DipParams()) -> list[DipAction]:
+    """The actions of the strategy for the given state, without side effects."""
+    if not state.price or state.price <= 0:
+        raise ValueError(f"No valid price for {params.symbol}: {state.price}")
+    sell_price = round(state.price * params.take_profit, 2)
+    buy_price = round(state.price * params.buy_discount, 2)
+    actions = []
+    if state.shares >= params.qty:
+        if not state.open_sells:
+            actions.append(DipAction("sell", params.qty, sell_price, reason=f"{state.shares:g} shares held"))
+        actions += [DipAction("cancel", order_id=buy.id, reason="already holding the position") for buy in state.open_buys]
+    elif not state.open_buys:
+        actions.append(DipAction("buy", params.qty, buy_price, reason="no position and no open buy"))
+    else:
+        latest = state.open_buys[0]
+        if latest.limit_price < state.price * params.stale_buy:
+            actions.append(DipAction("cancel", order_id=latest.id, reason=f"limit {latest.limit_price} is too far below the price"))
+            actions.append(DipAction("buy", params.qty, buy_price, reason="replacing the stale buy"))
+    return actions
+
+
+def execute(actions: list[DipAction], params: DipParams = DipParams()) -> list[DipAction]:
+    """Cancels, then submits, in plan order. Returns the actions with the ids of the submitted orders."""
+    done = []
+    for action in actions:
+        if action.kind == "cancel":
+            TradingClientSingleton.get_instance().cancel_order_by_id(order_id=action.order_id)
+            AccountSnapshot.invalidate()
+            done.append(action)
+        elif action.kind == "buy":
+            done.append(action._replace(order_id=submit_limit_buy_order(params.symbol, action.qty, action.limit_price)))
+        elif action.kind == "sell":
+            done.append(action._replace(order_id=submit_limit_sell_order(params.symbol, action.qty, action.limit_price)))
+        else:
+            raise ValueError(f"Unknown action: {action.kind}")
+    return done
+
+
+def run_dip_strategy(params: DipParams = DipParams(), *, dry_run=False, paper_only=True) -> DipResult:
+    """One run of the pipeline. With paper_only a prod account is switched to paper first, with dry_run nothing is sent."""
+    if paper_only and not TradingClientSingleton.is_paper():
+        TradingClientSingleton.switch_to_paper_account()
+    state = read_state(params)
+    actions = plan(state, params)
+    if not dry_run:
+        actions = execute(actions, params)
+    return DipResult(params, state, actions, dry_run)
+
+
+def summarize(result: DipResult, agent) -> str:
+    """Asks the agent for a short human readable summary of the run."""
+    response, _ = agent.send_message(
+        f"Summarize this run of the {result.params.symbol} buy-the-dip strategy for the user in a few sentences:\n{result}")
+    return response
@@ -1,9 +1,11 @@
-from alpaca.trading.client import TradingClient
-from investor_agent.utils.common import parse_date
+from investor_agent.utils.common import parse_date, run_concurrently
+from investor_agent.utils.rate_limit import GovernedClient, RateLimitGovernor
 import os
-from dotenv import load_dotenv
-from alpaca.trading.requests import StopLimitOrderRequest, StopOrderRequest, MarketOrderRequest, OrderClass, TimeInForce, LimitOrderRequest, StopLossRequest, TakeProfitRequest, OrderSide
-from alpaca.data.historical import StockHistoricalDataClient
+import re
+import threading
+import time
+
+# alpaca is imported inside the functions that use it, so importing the tools stays cheap
 
 
 # For lazy instantiation
@@ -25,39 +27,87 @@ class TradingClientSingleton:
     def switch_to_prod_account(cls):
         cls._paper = False
 
+    @classmethod
+    def get_credentials(cls, paper=False):
+        """Returns (api_key_id, secret_key) of the paper (.env.dev) or prod (.env.prod) account."""
+        from dotenv import load_dotenv
+        load_dotenv(".env.dev" if paper else ".env.prod", override=True)
+        return os.getenv('ALPACA_API_KEY_ID'), os.getenv('ALPACA_SECRET_KEY')
+
     @classmethod
     def get_instance(cls):
-        if not cls._paper:
+        return cls.get_client(cls._paper)
+
+    @classmethod
+    def get_client(cls, paper):
+        """Returns the trading client of the given account type, regardless of the current switch."""
+        from alpaca.trading.client import TradingClient
+        if not paper:
             if cls._instance_prod is not None:
                 return cls._instance_prod
             else:
-                load_dotenv(".env.prod", override=True)
-                api_key_id = os.getenv('ALPACA_API_KEY_ID')
-                secret_key = os.getenv('ALPACA_SECRET_KEY')
-                cls._instance_prod = TradingClient(api_key_id, secret_key, paper=cls._paper)
+                api_key_id, secret_key = cls.get_credentials(paper=False)
+                cls._instance_prod = GovernedClient(TradingClient(api_key_id, secret_key, paper=False), RateLimitGovernor.get_instance("prod"))
                 return cls._instance_prod
         else:
             if cls._instance_paper is not None:
                 return cls._instance_paper
             else:
-                load_dotenv(".env.dev", override=True)
-                api_key_id = os.getenv('ALPACA_API_KEY_ID')
-                secret_key = os.getenv('ALPACA_SECRET_KEY')
-                cls._instance_paper = TradingClient(api_key_id, secret_key, paper=cls._paper)
+                api_key_id, secret_key = cls.get_credentials(paper=True)
+                cls._instance_paper = GovernedClient(TradingClient(api_key_id, secret_key, paper=True), RateLimitGovernor.get_instance("paper"))
                 return cls._instance_paper
             
+    @classmethod
+    def get_rate_limit_usage(cls):
+        """Returns the request budget usage of the current account's API key."""
+        return RateLimitGovernor.get_instance("paper" if cls._paper else "prod").usage()
+
     @classmethod
     def get_histrical_data_client(cls):
+        from alpaca.data.historical import StockHistoricalDataClient
         if cls._data_instance_prod is not None:
             return cls._data_instance_prod
         else:
-            load_dotenv(".env.prod", override=True)
-            api_key_id = os.getenv('ALPACA_API_KEY_ID')
-            secret_key = os.getenv('ALPACA_SECRET_KEY')
-            cls._data_instance_prod = StockHistoricalDataClient(api_key_id, secret_key)
+            api_key_id, secret_key = cls.get_credentials(paper=False)
+            # the data client uses the prod key, so it shares the prod budget
+            cls._data_instance_prod = GovernedClient(StockHistoricalDataClient(api_key_id, secret_key), RateLimitGovernor.get_instance("prod"))
             return cls._data_instance_prod
 
 
+class AccountSnapshot:
+    """
+    Short-lived cache of get_account(), one per account type (paper/prod).
+    All account fields are read from one snapshot instead of one HTTP call per field.
+    Order submissions and cancellations invalidate it.
+    """
+    _snapshots = {}
+    _lock = threading.Lock()
+    ttl = float(os.getenv("ACCOUNT_SNAPSHOT_TTL_SECONDS", "5"))
+
+    @classmethod
+    def get(cls):
+        paper = TradingClientSingleton.is_paper()
+        with cls._lock:
+            snapshot = cls._snapshots.get(paper)
+            if snapshot is not None and time.monotonic() - snapshot[1] < cls.ttl:
+                return snapshot[0]
+            account = TradingClientSingleton.get_instance().get_account()
+            cls._snapshots[paper] = (account, time.monotonic())
+            return account
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._snapshots.clear()
+
+
+def submit_order(order_data):
+    """Submits an order request and invalidates the cached account snapshot."""
+    order = TradingClientSingleton.get_instance().submit_order(order_data=order_data)
+    AccountSnapshot.invalidate()
+    return order
+
+
 def create_option_ticker(
     underlying_symbol: str,
     expiration_date: str,
@@ -102,16 +152,15 @@ def submit_sell_market_order(
     symbol: str,
     qty: float,
     *,
-    time_in_force=TimeInForce.DAY):
+    time_in_force="day"):
+    from alpaca.trading.requests import MarketOrderRequest, OrderSide
     market_order_data = MarketOrderRequest(
         symbol=symbol,
         qty=qty,
         side=OrderSide.SELL,
         time_in_force=time_in_force
     )
-    market_order = TradingClientSingleton.get_instance().submit_order(
-        order_data=market_order_data
-    )
+    market_order = submit_order(market_order_data)
     return str(market_order.id)
 
 
@@ -119,17 +168,16 @@ def submit_market_order(
     symbol: str,
     qty: float,
     *,
-    time_in_force=TimeInForce.DAY,
+    time_in_force="day",
     side: str):
+    from alpaca.trading.requests import MarketOrderRequest
     market_order_data = MarketOrderRequest(
         symbol=symbol,
         qty=qty,
         side=side,
         time_in_force=time_in_force
     )
-    market_order = TradingClientSingleton.get_instance().submit_order(
-        order_data=market_order_data
-    )
+    market_order = submit_order(market_order_data)
     return str(market_order.id)
 
 
@@ -137,9 +185,10 @@ def submit_buy_market_order(
     symbol: str,
     qty: float,
     *,
-    time_in_force=TimeInForce.DAY,
+    time_in_force="day",
     take_profit_price: float,
     stop_loss_price: float):
+    from alpaca.trading.requests import MarketOrderRequest, OrderSide, OrderClass, TakeProfitRequest, StopLossRequest
     market_order_data = MarketOrderRequest(
         symbol=symbol,
         qty=qty,
@@ -149,9 +198,7 @@ def submit_buy_market_order(
         take_profit=TakeProfitRequest(limit_price=take_profit_price),
         stop_loss=StopLossRequest(stop_price=stop_loss_price)
     )
-    market_order = TradingClientSingleton.get_instance().submit_order(
-        order_data=market_order_data
-    )
+    market_order = submit_order(market_order_data)
     return market_order.id
 
 
@@ -160,7 +207,8 @@ def submit_limit_sell_order(
     qty: float,
     limit_price: float,
     *,
-    time_in_force=TimeInForce.GTC):
+    time_in_force="gtc"):
+    from alpaca.trading.requests import LimitOrderRequest, OrderSide
     limit_order_data = LimitOrderRequest(
         symbol=symbol,
         qty=qty,
@@ -168,7 +216,7 @@ def submit_limit_sell_order(
         time_in_force=time_in_force,
         limit_price=limit_price
     )
-    order = TradingClientSingleton.get_instance().submit_order(order_data=limit_order_data)
+    order = submit_order(limit_order_data)
     return str(order.id)
 
 
@@ -177,9 +225,10 @@ def submit_limit_buy_order(
     qty: float,
     limit_price: float,
     *,
-    time_in_force=TimeInForce.GTC,
+    time_in_force="gtc",
     take_profit_price: float = None,
     stop_loss_price: float = None):
+    from alpaca.trading.requests import LimitOrderRequest, OrderSide, OrderClass, TakeProfitRequest, StopLossRequest
     take_profit_order = None
     stop_loss_order = None
     order_class = OrderClass.SIMPLE
@@ -198,7 +247,7 @@ def submit_limit_buy_order(
         take_profit=take_profit_order,
         stop_loss=stop_loss_order
     )
-    return str(TradingClientSingleton.get_instance().submit_order(order_data=limit_order_data).id)
+    return str(submit_order(limit_order_data).id)
 
 
 def submit_stop_sell_order(
@@ -206,7 +255,8 @@ def submit_stop_sell_order(
     qty: float,
     stop_price: float,
     *,
-    time_in_force=TimeInForce.GTC):
+    time_in_force="gtc"):
+    from alpaca.trading.requests import StopOrderRequest, OrderSide
     stop_order_data = StopOrderRequest(
         symbol=symbol,
         qty=qty,
@@ -214,7 +264,7 @@ def submit_stop_sell_order(
         time_in_force=time_in_force,
         stop_price=stop_price
     )
-    return str(TradingClientSingleton.get_instance().submit_order(order_data=stop_order_data).id)
+    return str(submit_order(stop_order_data).id)
 
 
 def submit_stop_limit_sell_order(
@@ -223,7 +273,8 @@ def submit_stop_limit_sell_order(
     stop_price: float,
     limit_price: float,
     *,
-    time_in_force=TimeInForce.GTC):
+    time_in_force="gtc"):
+    from alpaca.trading.requests import StopLimitOrderRequest, OrderSide
     stop_limit_order_data = StopLimitOrderRequest(
         symbol=symbol,
         qty=qty,
@@ -232,4 +283,114 @@ def submit_stop_limit_sell_order(
         stop_price=stop_price,
         limit_price=limit_price
     )
-    return str(TradingClientSingleton.get_instance().submit_order(order_data=stop_limit_order_data).id)
+    return str(submit_order(stop_limit_order_data).id)
+
+
+# order type -> name of its request class in alpaca.trading.requests
+ORDER_REQUEST_TYPES = {
+    "market": "MarketOrderRequest",
+    "limit": "LimitOrderRequest",
+    "stop": "StopOrderRequest",
+    "stop_limit": "StopLimitOrderRequest",
+}
+
+
+# OCC option symbol, e.g. AAPL231201C00195000
+OPTION_SYMBOL = re.compile(r"^[A-Z]{1,5}\d{6}[CP]\d{8}$")
+
+
+def build_order_request(spec: dict):
+    """
+    Builds an order request from a spec dict, raises ValueError if the spec is invalid.
+
+    Keys: symbol (or underlying_symbol, expiration_date, option_type and strike_price for an option),
+    qty, side ('buy' or 'sell'), type ('market', 'limit', 'stop' or 'stop_limit', default 'market'),
+    limit_price, stop_price, time_in_force ('day' or 'gtc', default 'day' for market orders and 'gtc' otherwise),
+    take_profit_price and stop_loss_price (both make it a bracket order, one of them a one-triggers-other order).
+    Stock market buys need both, like submit_buy_market_order.
+    """
+    from alpaca.trading import requests as order_requests
+    from alpaca.trading.requests import OrderSide, TimeInForce, OrderClass, TakeProfitRequest, StopLossRequest
+    spec = dict(spec)
+    order_type = str(spec.pop("type", "market")).lower()
+    if order_type not in ORDER_REQUEST_TYPES:
+        raise ValueError(f"Invalid order type {order_type!r}: should be one of {', '.join(ORDER_REQUEST_TYPES)}")
+    side = str(spec.pop("side", "")).lower()
+    if side not in ("buy", "sell"):
+        raise ValueError(f"Invalid side {side!r}: should be 'buy' or 'sell'")
+    symbol = spec.pop("symbol", None)
+    is_option = symbol is None or bool(OPTION_SYMBOL.match(str(symbol).upper()))
+    if symbol is None:
+        try:
+            symbol = create_option_ticker(spec.pop("underlying_symbol"), spec.pop("expiration_date"),
+                                          spec.pop("option_type"), float(spec.pop("strike_price")))
+        except KeyError as e:
+            raise ValueError(f"Missing {e.args[0]}: give a symbol or the option contract fields")
+    qty = float(spec.pop("qty", 0))
+    if qty <= 0:
+        raise ValueError("Invalid qty: should be a positive number")
+    fields = {
+        "symbol": symbol,
+        "qty": qty,
+        "side": OrderSide(side),
+        "time_in_force": TimeInForce(str(spec.pop("time_in_force", "day" if order_type == "market" else "gtc")).lower()),
+    }
+    for price in ("limit_price", "stop_price"):
+        if price in spec:
+            fields[price] = float(spec.pop(price))
+    take_profit_price = spec.pop("take_profit_price", None)
+    stop_loss_price = spec.pop("stop_loss_price", None)
+    if order_type == "market" and side == "buy" and not is_option and (take_profit_price is None or stop_loss_price is None):
+        # same exit strategy rule as buy_stock_by_market_price
+        raise ValueError(f"Market buy of {symbol} needs both take_profit_price and stop_loss_price")
+    if take_profit_price is not None or stop_loss_price is not None:
+        # a bracket needs both exit legs, a single one is attached as OTO
+        fields["order_class"] = OrderClass.BRACKET if take_profit_price is not None and stop_loss_price is not None else OrderClass.OTO
+        if take_profit_price is not None:
+            fields["take_profit"] = TakeProfitRequest(limit_price=float(take_profit_price))
+        if stop_loss_price is not None:
+            fields["stop_loss"] = StopLossRequest(stop_price=float(stop_loss_price))
+    if spec:
+        raise ValueError(f"Unknown order fields: {', '.join(spec)}")
+    # the request models validate the prices required by the order type
+    return getattr(order_requests, ORDER_REQUEST_TYPES[order_type])(**fields)
+
+
+def _spec_symbol(spec):
+    """The symbol of an order spec, the OCC symbol for option contract fields, None if it has neither."""
+    if not isinstance(spec, dict):
+        return None
+    if spec.get("symbol") is not None:
+        return spec["symbol"]
+    try:
+        return create_option_ticker(spec["underlying_symbol"], spec["expiration_date"],
+                                    spec["option_type"], float(spec["strike_price"]))
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def submit_orders(specs: list[dict], *, max_workers: int = None):
+    """
+    Validates all order specs (see build_order_request) and, only if all are valid, submits them
+    concurrently with at most max_workers (default ORDER_SUBMIT_MAX_WORKERS) requests in flight.
+
+    Returns one dict per spec, in order: {"symbol", "id"} for a submitted order, {"index", "symbol", "error"} otherwise.
+    """
+    requests = []
+    errors = {}
+    for i, spec in enumerate(specs):
+        try:
+            requests.append(build_order_request(spec))
+        except (ValueError, TypeError) as e:
+            requests.append(None)
+            errors[i] = e
+    if errors:
+        return [{"index": i, "symbol": _spec_symbol(spec), "error": f"{errors[i]}" if i in errors else "not submitted, another order is invalid"}
+                for i, spec in enumerate(specs)]
+
+    max_workers = max_workers or int(os.getenv("ORDER_SUBMIT_MAX_WORKERS", "4"))
+    results = run_concurrently({i: (lambda request=request: submit_order(request)) for i, request in enumerate(requests)},
+                               max_workers=max_workers)
+    return [{"index": i, "symbol": request.symbol, "error": str(result)} if isinstance(result, Exception) else
+            {"symbol": request.symbol, "id": str(result.id)}
+            for i, (request, result) in enumerate(zip(requests, results.values()))]
@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from investor_agent.utils.common import cache_dir
+
+"""
+On-disk OHLCV bar store used by the technical indicator calls.
+
+Bars are kept per (symbol, interval) as a single columnar float64 array
+of shape (columns, bars): row 0 holds the bar timestamps as epoch seconds,
+the other rows hold the yfinance fields listed in meta.json. Reads use
+np.load(mmap_mode='r'), so serving a period only touches the requested tail.
+Only bars newer than the last cached timestamp are downloaded.
+"""
+
+PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def period_start(period: str, *, now=None):
+    """
+    Converts a yfinance period string (e.g. '5d', '3mo', '1y', 'ytd', 'max') to a UTC start timestamp.
+    Returns None for 'max'.
+    """
+    now = now or pd.Timestamp.now(tz="UTC")
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz="UTC")
+    match = PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"Invalid period: {period}")
+    amount, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.DateOffset(days=amount)
+    if unit == "wk":
+        return now - pd.DateOffset(weeks=amount)
+    if unit == "mo":
+        return now - pd.DateOffset(months=amount)
+    return now - pd.DateOffset(years=amount)
+
+
+class BarCache:
+    _instance = None
+
+    def __init__(self, root=None, *, max_entries=None, refresh_seconds=None):
+        self.root = root or cache_dir("bars")
+        self.max_entries = max_entries or int(os.getenv("BAR_CACHE_MAX_ENTRIES", "512"))
+        # bars refreshed less than refresh_seconds ago are served without a top-up request
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(os.getenv("BAR_CACHE_REFRESH_SECONDS", "60"))
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = BarCache()
+        return cls._instance
+
+    def get(self, symbol: str, period: str = '3mo', interval: str = '1d') -> pd.DataFrame:
+        """
+        Returns bars for the symbol covering the period, topping up the local store if needed.
+        """
+        return self.get_many([symbol], period=period, interval=interval)[symbol]
+
+    def get_many(self, symbols: list[str], period: str = '3mo', interval: str = '1d') -> dict[str, pd.DataFrame]:
+        """
+        Returns bars for several symbols. Symbols that are missing or stale are fetched
+        with a single multi-symbol download instead of one request per symbol.
+        The result is keyed by the symbols as given, they are looked up upper-cased like yfinance returns them.
+        """
+        requested = list(dict.fromkeys(symbols))
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in requested))
+        start = period_start(period)
+        if start is not None and not interval.endswith(("m", "h")):
+            start = start.normalize()
+        covered_from = start.timestamp() if start is not None else None
+        with ExitStack() as stack:
+            # locks are always taken in the same order, so concurrent batches cannot deadlock
+            for symbol in sorted(symbols, key=str.upper):
+                stack.enter_context(self._lock_for(symbol, interval))
+            missing, stale = [], {}
+            for symbol in symbols:
+                cached = self._load(symbol, interval)
+                if cached is None or not self._covers(cached, start):
+                    missing.append(symbol)
+                elif time.time() - cached["refreshed_at"] >= self.refresh_seconds:
+                    stale[symbol] = cached
+                else:
+                    self._touch(symbol, interval)
+
+            fetched = {}
+            if missing:
+                fetched = self._download_many(missing, period=period, interval=interval)
+                for symbol, frame in fetched.items():
+                    if not frame.empty:
+                        self._store(symbol, interval, frame, covered_from=covered_from)
+            if stale:
+                self._top_up(stale, interval)
+
+            result = {}
+            for symbol in symbols:
+                cached = self._load(symbol, interval)
+                if cached is not None:
+                    result[symbol] = self._to_frame(cached, start)
+                elif symbol in fetched:
+                    # the store could not be written (e.g. read-only disk) or there is no data
+                    result[symbol] = fetched[symbol]
+                else:
+                    result[symbol] = self._download_many([symbol], period=period, interval=interval)[symbol]
+            return {symbol: result[symbol.upper()] for symbol in requested}
+
+    def invalidate(self, symbol: str, interval: str = '1d'):
+        with self._lock_for(symbol, interval):
+            shutil.rmtree(self._key_dir(symbol, interval), ignore_errors=True)
+
+    def _lock_for(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol.upper(), interval), threading.Lock())
+
+    def _key_dir(self, symbol, interval):
+        return os.path.join(self.root, interval, symbol.upper())
+
+    def _covers(self, cached, start):
+        if start is None:
+            return cached["covered_from"] is None
+        return cached["covered_from"] is not None and cached["covered_from"] <= start.timestamp()
+
+    def _download_many(self, symbols, **kwargs):
+        frame = yf.download(symbols if len(symbols) > 1 else symbols[0], group_by="ticker", progress=False, **kwargs)
+        if not isinstance(frame.columns, pd.MultiIndex):
+            return {symbols[0]: frame}
+        frames = {}
+        for symbol in symbols:
+            if symbol in frame.columns.get_level_values(0):
+                frames[symbol] = frame[symbol].dropna(how="all")
+            else:
+                frames[symbol] = pd.DataFrame()
+        return frames
+
+    def _top_up(self, stale, interval):
+        since = min(cached["data"][0, -1] for cached in stale.values())
+        since = pd.Timestamp(since, unit="s", tz="UTC").strftime("%Y-%m-%d")
+        try:
+            fresh_frames = self._download_many(list(stale), start=since, interval=interval)
+        except Exception as e:
+            print(f"Bar cache top-up failed for {', '.join(stale)} ({interval}): {e}")
+            fresh_frames = {}
+        for symbol, cached in stale.items():
+            fresh = fresh_frames.get(symbol)
+            if fresh is None or fresh.empty:
+                self._write_meta(symbol, interval, cached["columns"], cached["covered_from"], cached["tz"], cached.get("index_name"))
+                continue
+            old = self._to_frame(cached, None)
+            # the last cached bar may have been incomplete, fresh rows replace the overlap
+            old = old[old.index < fresh.index[0]]
+            merged = pd.concat([old, fresh[[c for c in cached["columns"] if c in fresh.columns]]])
+            self._store(symbol, interval, merged, covered_from=cached["covered_from"])
+
+    def _load(self, symbol, interval):
+        key_dir = self._key_dir(symbol, interval)
+        meta_path = os.path.join(key_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r") as meta_file:
+                meta = json.load(meta_file)
+            data = np.load(os.path.join(key_dir, "bars.npy"), mmap_mode="r")
+            if data.ndim != 2 or data.shape[0] != len(meta["columns"]) + 1:
+                raise ValueError(f"unexpected shape {data.shape}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Dropping corrupted bar cache entry {key_dir}: {e}")
+            shutil.rmtree(key_dir, ignore_errors=True)
+            return None
+        meta["data"] = data
+        meta["refreshed_at"] = os.path.getmtime(meta_path)
+        return meta
+
+    def _store(self, symbol, interval, frame, *, covered_from):
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        index = frame.index
+        tz = str(index.tz) if index.tz is not None else None
+        utc_index = index.tz_convert("UTC") if tz else index.tz_localize("UTC")
+        seconds = (utc_index - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+        columns = [str(c) for c in frame.columns]
+        data = np.empty((len(columns) + 1, len(frame)), dtype=np.float64)
+        data[0] = seconds
+        data[1:] = frame.to_numpy(dtype=np.float64).T
+
+        key_dir = self._key_dir(symbol, interval)
+        os.makedirs(key_dir, exist_ok=True)
+        tmp_path = os.path.join(key_dir, f"bars.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+        try:
+            np.save(tmp_path, data)
+            os.replace(tmp_path, os.path.join(key_dir, "bars.npy"))
+            self._write_meta(symbol, interval, columns, covered_from, tz, index.name)
+        except OSError as e:
+            print(f"Could not write bar cache entry {key_dir}: {e}")
+            shutil.rmtree(key_dir, ignore_errors=True)
+            return
+        self._evict()
+
+    def _write_meta(self, symbol, interval, columns, covered_from, tz, index_name):
+        key_dir = self._key_dir(symbol, interval)
+        tmp_path = os.path.join(key_dir, f"meta.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as meta_file:
+            json.dump({"columns": columns, "covered_from": covered_from, "tz": tz, "index_name": index_name or "Date"}, meta_file)
+        os.replace(tmp_path, os.path.join(key_dir, "meta.json"))
+
+    def _touch(self, symbol, interval):
+        # access time is tracked on bars.npy, refresh time on meta.json
+        try:
+            os.utime(os.path.join(self._key_dir(symbol, interval), "bars.npy"))
+        except OSError:
+            pass
+
+    def _to_frame(self, cached, start):
+        data = cached["data"]
+        first = 0 if start is None else int(np.searchsorted(data[0], start.timestamp(), side="left"))
+        window = np.array(data[:, first:])
+        index = pd.to_datetime(window[0].astype(np.int64), unit="s", utc=True)
+        if cached["tz"]:
+            index = index.tz_convert(cached["tz"])
+        else:
+            index = index.tz_localize(None)
+        index.name = cached.get("index_name", "Date")
+        return pd.DataFrame(window[1:].T, index=index, columns=cached["columns"])
+
+    def _evict(self):
+        entries = []
+        for interval in os.listdir(self.root):
+            interval_dir = os.path.join(self.root, interval)
+            if not os.path.isdir(interval_dir):
+                continue
+            for symbol in os.listdir(interval_dir):
+                bars_path = os.path.join(interval_dir, symbol, "bars.npy")
+                try:
+                    entries.append((os.path.getmtime(bars_path), os.path.join(interval_dir, symbol)))
+                except OSError:
+                    continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, key_dir in entries[:len(entries) - self.max_entries]:
+            shutil.rmtree(key_dir, ignore_errors=True)
+
+
+def get_bars(symbol: str, period: str = '3mo', interval: str = '1d') -> pd.DataFrame:
+    return BarCache.get_instance().get(symbol, period=period, interval=interval)
+
+
+def get_bars_many(symbols: list[str], period: str = '3mo', interval: str = '1d') -> dict[str, pd.DataFrame]:
+    return BarCache.get_instance().get_many(symbols, period=period, interval=interval)
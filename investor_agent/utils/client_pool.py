@@ -0,0 +1,204 @@
+import gc
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from types import FunctionType, ModuleType
+
+"""
+Bounded pool of per-chat agent clients.
+
+Clients are created on first use by a factory and kept in LRU order. When the
+pool grows beyond its max size, the least recently used client is evicted,
+as is every client unused for longer than the idle TTL. Clients for which
+is_pinned() is true (e.g. with scheduled jobs) are never evicted, evicted
+clients are passed to on_evict() to release their resources.
+"""
+
+
+def _walk(roots, seen):
+    """Yields the objects reachable from roots whose ids are not in seen, adding their ids to it."""
+    excluded = (type, ModuleType, FunctionType)
+    objects = list(roots)
+    while objects:
+        next_objects = []
+        for o in objects:
+            if isinstance(o, excluded) or id(o) in seen:
+                continue
+            seen.add(id(o))
+            next_objects.append(o)
+        yield from next_objects
+        objects = gc.get_referents(*next_objects)
+
+
+def shared_ids(roots) -> set:
+    """Ids of the objects reachable from roots, to leave them out of estimate_size."""
+    seen = set()
+    for _ in _walk(roots, seen):
+        pass
+    return seen
+
+
+def estimate_size(obj, shared=frozenset()) -> int:
+    """
+    Approximate deep size of an object in bytes. Classes, modules and functions (usually shared) are not counted,
+    nor are objects whose ids are in shared (see shared_ids), e.g. the agent templates clients are built from.
+    """
+    return sum(sys.getsizeof(o, 0) for o in _walk([obj], set(shared)))
+
+
+class _Entry:
+    def __init__(self, client, build_seconds):
+        self.client = client
+        self.build_seconds = build_seconds
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class _KeyLock:
+    """Serializes the builds of one key, kept while any caller holds or waits for it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+class ClientPool:
+    def __init__(self, factory, *, max_size=None, idle_ttl=None, is_pinned=None, on_evict=None, shared=None):
+        self.factory = factory
+        # returns the objects all clients share, they are left out of the clients' approximate sizes
+        self.shared = shared or (lambda: ())
+        self.max_size = max_size or int(os.getenv("BOT_MAX_CLIENTS", "50"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("BOT_CLIENT_IDLE_TTL_SECONDS", "21600"))
+        self.is_pinned = is_pinned or (lambda client: False)
+        self.on_evict = on_evict or (lambda client: None)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._sweeper = None
+        self._stopped = threading.Event()
+
+    def get(self, key):
+        """Returns the client of key, creating it if needed, and marks it as most recently used."""
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None:
+                return entry.client
+            key_lock = self._key_locks.setdefault(key, _KeyLock())
+            key_lock.users += 1
+        # build outside the pool lock, so one slow build does not block other chats
+        try:
+            with key_lock.lock:
+                with self._lock:
+                    entry = self._touch(key)
+                if entry is None:
+                    started = time.monotonic()
+                    entry = _Entry(self.factory(key), time.monotonic() - started)
+                    with self._lock:
+                        self._entries[key] = entry
+                        # the new client is returned, it must not be evicted even if every older one is pinned
+                        evicted = self._evict_locked(keep=key)
+                    self._release(evicted)
+        finally:
+            with self._lock:
+                key_lock.users -= 1
+                if not key_lock.users:
+                    del self._key_locks[key]
+        return entry.client
+
+    def drop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._release([(key, entry)])
+        return entry is not None
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _touch(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(key)
+        return entry
+
+    def _evict_locked(self, keep=None):
+        now = time.monotonic()
+        evicted = []
+        for key, entry in list(self._entries.items()):
+            over_size = len(self._entries) > self.max_size
+            idle = now - entry.last_used > self.idle_ttl
+            if not over_size and not idle:
+                # entries are in LRU order, the rest was used more recently
+                break
+            if key == keep or self._pinned(entry):
+                continue
+            evicted.append((key, self._entries.pop(key)))
+        return evicted
+
+    def _pinned(self, entry):
+        try:
+            return self.is_pinned(entry.client)
+        except Exception as e:
+            print(f"Could not check if a client is pinned: {e}")
+            return True
+
+    def _release(self, evicted):
+        for key, entry in evicted:
+            print(f"Evicting client {key}")
+            try:
+                self.on_evict(entry.client)
+            except Exception as e:
+                print(f"Error while evicting client {key}: {e}")
+
+    def evict_idle(self):
+        with self._lock:
+            evicted = self._evict_locked()
+        self._release(evicted)
+
+    def start_sweeper(self, interval=60):
+        """Evicts idle clients every `interval` seconds on a daemon thread."""
+        def sweep():
+            while not self._stopped.wait(interval):
+                self.evict_idle()
+        self._sweeper = threading.Thread(target=sweep, name="client-pool-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def prewarm(self, keys):
+        """Creates the clients of keys (at most max_size of them) on a background thread."""
+        def warm():
+            for key in list(keys)[:self.max_size]:
+                if self._stopped.is_set():
+                    return
+                try:
+                    self.get(key)
+                except Exception as e:
+                    print(f"Could not pre-warm the client {key}: {e}")
+                    traceback.print_exc()
+        thread = threading.Thread(target=warm, name="client-pool-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """One dict per client, least recently used first: idle and age seconds, build time, approximate size and pinning."""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.items())
+        shared = shared_ids(self.shared())
+        return [{
+            "key": key,
+            "idle_seconds": round(now - entry.last_used),
+            "age_seconds": round(now - entry.created_at),
+            "build_seconds": round(entry.build_seconds, 2),
+            "approx_bytes": estimate_size(entry.client, shared),
+            "pinned": self._pinned(entry),
+        } for key, entry in entries]
@@ -1,6 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from zoneinfo import ZoneInfo
 from datetime import datetime
-from dateutil import parser
+import os
 
 
 NASDAQ_TZ=ZoneInfo("America/New_York")
@@ -11,4 +13,27 @@ def now():
 
 
 def parse_date(date_str: str):
-    return parser.parse(date_str, tzinfos={'': NASDAQ_TZ})
\ No newline at end of file
+    from dateutil import parser
+    return parser.parse(date_str, tzinfos={'': NASDAQ_TZ})
+
+
+def cache_dir(*parts):
+    """
+    Returns (and creates) a directory for local caches.
+    The root can be overridden with INVESTOR_AGENT_CACHE_DIR.
+    """
+    root = os.getenv("INVESTOR_AGENT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "investor_agent"))
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def run_concurrently(tasks: dict, max_workers: int = None):
+    """
+    Runs the callables of `tasks` on a bounded thread pool, each in a copy of the caller's context
+    (so e.g. a market data session is shared). Returns {name: result}, a failed task maps to its exception.
+    """
+    max_workers = max_workers or int(os.getenv("FAN_OUT_MAX_WORKERS", "8"))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)) or 1) as executor:
+        futures = {name: executor.submit(copy_context().run, fn) for name, fn in tasks.items()}
+    return {name: future.exception() or future.result() for name, future in futures.items()}
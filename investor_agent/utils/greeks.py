@@ -0,0 +1,163 @@
+import os
+from datetime import datetime, time as day_time
+from typing import NamedTuple
+
+import numpy as np
+
+from investor_agent.utils.common import NASDAQ_TZ, now
+
+"""
+Vectorized Black-Scholes pricing, greeks and implied volatility.
+
+Every function takes NumPy arrays (or scalars, broadcast together) so a whole
+option chain is priced in one pass. Units: time to expiry in years, rates and
+volatilities as decimals, theta per calendar day, vega per 1% of volatility.
+"""
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+SECONDS_PER_YEAR = 365 * 24 * 3600
+MARKET_CLOSE = day_time(16, 0)
+
+
+def risk_free_rate() -> float:
+    return float(os.getenv("RISK_FREE_RATE", "0.04"))
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    # erfc by Chebyshev fitting (Numerical Recipes erfcc), relative error below 1.2e-7
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.5 * z)
+    erfc = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+    return np.where(x >= 0, 1 - 0.5 * erfc, 0.5 * erfc)
+
+
+class Greeks(NamedTuple):
+    price: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+    iv: np.ndarray = None
+
+
+def _d1_d2(S, K, T, r, sigma):
+    sigma_sqrt_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / sigma_sqrt_t
+    return d1, d1 - sigma_sqrt_t
+
+
+def bs_price(S, K, T, r, sigma, is_call):
+    d1, d2 = _d1_d2(S, K, T, r, sigma)
+    discounted_strike = K * np.exp(-r * T)
+    call = S * norm_cdf(d1) - discounted_strike * norm_cdf(d2)
+    # put-call parity
+    return np.where(is_call, call, call - S + discounted_strike)
+
+
+def bs_vega(S, K, T, r, sigma):
+    """Vega per 1.0 of volatility (not per 1%)."""
+    d1, _ = _d1_d2(S, K, T, r, sigma)
+    return S * norm_pdf(d1) * np.sqrt(T)
+
+
+def black_scholes(S, K, T, r, sigma, is_call) -> Greeks:
+    """Price and greeks of European options. is_call is a boolean array (True for calls)."""
+    S, K, T, r, sigma, is_call = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, r, sigma)),
+                                                     np.asarray(is_call, dtype=bool))
+    d1, d2 = _d1_d2(S, K, T, r, sigma)
+    sqrt_t = np.sqrt(T)
+    discounted_strike = K * np.exp(-r * T)
+    pdf_d1 = norm_pdf(d1)
+    cdf_d1 = norm_cdf(d1)
+    cdf_d2 = norm_cdf(d2)
+    call_price = S * cdf_d1 - discounted_strike * cdf_d2
+    decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+    call_theta = decay - r * discounted_strike * cdf_d2
+    put_theta = decay + r * discounted_strike * (1 - cdf_d2)
+    return Greeks(
+        price=np.where(is_call, call_price, call_price - S + discounted_strike),
+        delta=np.where(is_call, cdf_d1, cdf_d1 - 1),
+        gamma=pdf_d1 / (S * sigma * sqrt_t),
+        theta=np.where(is_call, call_theta, put_theta) / 365,
+        vega=S * pdf_d1 * sqrt_t / 100,
+    )
+
+
+def implied_volatility(price, S, K, T, r, is_call, *, tol=1e-6, max_iter=100, low=1e-4, high=5.0):
+    """
+    Implied volatility of European option prices, NaN where the price is outside the no-arbitrage bounds.
+
+    Newton steps are taken for all unconverged options at once. Each option keeps a bracket
+    [lo, hi] around its solution, a Newton step leaving the bracket (or a vanishing vega) falls back
+    to bisection, so every option converges even deep in or out of the money.
+    """
+    price, S, K, T, r, is_call = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, S, K, T, r)),
+                                                     np.asarray(is_call, dtype=bool))
+    price, S, K, T, r, is_call = (a.ravel() for a in (price, S, K, T, r, is_call))
+    discounted_strike = K * np.exp(-r * T)
+    lower = np.where(is_call, np.maximum(S - discounted_strike, 0), np.maximum(discounted_strike - S, 0))
+    upper = np.where(is_call, S, discounted_strike)
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(price) & (T > 0) & (S > 0) & (K > 0) & (price > lower) & (price < upper)
+
+    iv = np.full(price.shape, np.nan)
+    idx = np.flatnonzero(valid)
+    # Brenner-Subrahmanyam approximation as the starting point
+    sigma = np.clip(SQRT_2PI / np.sqrt(T[idx]) * price[idx] / S[idx], 0.05, 2.0)
+    lo = np.full(idx.shape, low)
+    hi = np.full(idx.shape, high)
+    for _ in range(max_iter):
+        if not len(idx):
+            break
+        s, k, t, rate, call = S[idx], K[idx], T[idx], r[idx], is_call[idx]
+        diff = bs_price(s, k, t, rate, sigma, call) - price[idx]
+        vega = bs_vega(s, k, t, rate, sigma)
+        done = (np.abs(diff) < tol) | (hi - lo < 1e-10)
+        iv[idx[done]] = sigma[done]
+        # the price grows with volatility, so the sign of diff tells which side of the solution sigma is on
+        hi = np.where(diff > 0, sigma, hi)
+        lo = np.where(diff < 0, sigma, lo)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            step = sigma - diff / vega
+        step = np.where((vega > 1e-12) & (step > lo) & (step < hi), step, 0.5 * (lo + hi))
+        keep = ~done
+        idx, sigma, lo, hi = idx[keep], step[keep], lo[keep], hi[keep]
+    return iv.reshape(np.shape(valid))
+
+
+def market_close(day) -> datetime:
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=NASDAQ_TZ)
+
+
+def years_to_expiry(expiration_dates, as_of: datetime = None):
+    """Years from as_of (default now) until the market close of each expiration date."""
+    as_of = as_of or now()
+    seconds = [(market_close(day) - as_of).total_seconds() for day in expiration_dates]
+    return np.maximum(np.array(seconds, dtype=float), 60) / SECONDS_PER_YEAR
+
+
+def contract_greeks(contracts, underlying_closes: dict, *, r: float = None) -> Greeks:
+    """
+    Greeks of Alpaca option contracts, using the implied volatility of each contract's last close price.
+    The option close is priced against the underlying's close of the same day (underlying_closes maps
+    dates to closes), with the time to expiry counted from that close, so both prices are simultaneous.
+    Contracts without a close price or without an underlying close for its date get NaN.
+    """
+    r = risk_free_rate() if r is None else r
+    strikes = np.array([float(c.strike_price) for c in contracts])
+    prices = np.array([float(c.close_price) if c.close_price else np.nan for c in contracts])
+    is_call = np.array(["call" in str(c.type).lower() for c in contracts])
+    days = [c.close_price_date for c in contracts]
+    S = np.array([underlying_closes.get(day, np.nan) if day else np.nan for day in days], dtype=float)
+    seconds = np.array([(market_close(c.expiration_date) - market_close(day)).total_seconds() if day else np.nan
+                        for c, day in zip(contracts, days)])
+    T = np.maximum(seconds, 60) / SECONDS_PER_YEAR
+    iv = implied_volatility(prices, S, strikes, T, r, is_call)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        greeks = black_scholes(S, strikes, T, r, iv, is_call)
+    return greeks._replace(iv=iv)
@@ -0,0 +1,191 @@
+import numpy as np
+
+"""
+NumPy kernels behind the technical indicators.
+
+All kernels take raw float64 arrays, either 1-D (time) or 2-D (time x ticker),
+work along axis 0 and return arrays of the same shape. They reproduce the
+pandas semantics the indicator calls were written against: rolling windows
+are NaN until full and while they contain a NaN, EMAs use adjust=False.
+"""
+
+
+def wrap(values, like):
+    """Wraps a kernel result into the pandas type of `like` (Series or DataFrame), keeping its labels."""
+    if values.ndim == 2:
+        return type(like)(values, index=like.index, columns=like.columns)
+    return type(like)(values, index=like.index, name=getattr(like, "name", None))
+
+
+def shift(x, periods=1):
+    out = np.empty_like(x)
+    out[:periods] = np.nan
+    out[periods:] = x[:-periods]
+    return out
+
+
+def rolling_mean(x, window):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty_like(x)
+    if len(x) < window:
+        out[:] = np.nan
+        return out
+    nans = np.isnan(x)
+    has_nans = nans.any()
+    sums = np.cumsum(np.where(nans, 0.0, x) if has_nans else x, axis=0)
+    out[:window - 1] = np.nan
+    out[window - 1] = sums[window - 1]
+    np.subtract(sums[window:], sums[:-window], out=out[window:])
+    out[window - 1:] /= window
+    if has_nans:
+        nan_counts = np.cumsum(nans, axis=0, dtype=np.int64)
+        nan_counts[window:] -= nan_counts[:-window].copy()
+        out[window - 1:][nan_counts[window - 1:] > 0] = np.nan
+    return out
+
+
+def _rolling_extreme(x, window, reduce):
+    # `window` passes over shifted contiguous slices beat a strided sliding-window reduction for short windows
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full_like(x, np.nan)
+    n = len(x)
+    if n >= window:
+        extreme = out[window - 1:]
+        extreme[:] = x[window - 1:]
+        for lag in range(1, window):
+            reduce(extreme, x[window - 1 - lag:n - lag], out=extreme)
+    return out
+
+
+def rolling_min(x, window):
+    return _rolling_extreme(x, window, np.minimum)
+
+
+def rolling_max(x, window):
+    return _rolling_extreme(x, window, np.maximum)
+
+
+def ema(x, span):
+    """
+    Exponential moving average with adjust=False, seeded with the first value.
+
+    y[t] = w * y[t-1] + a * x[t] is evaluated in closed form per block of rows:
+    y[s+k] = w^(k+1) * y[s-1] + a * w^k * cumsum(w^-j * x[s+j]). The block length
+    keeps w^-j far from overflow. Leading NaNs stay NaN and the average is seeded
+    at the first finite value. Later NaNs hold the previous average and, like
+    pandas' ewm(adjust=False, ignore_na=False), the next value is weighted against
+    it with the decay of the whole gap; columns with such gaps go through _ema_gaps.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+    out = np.full_like(x, np.nan)
+    if len(x) == 0:
+        return out
+    squeeze = x.ndim == 1
+    if squeeze:
+        x = x[:, None]
+        out = out[:, None]
+
+    finite = ~np.isnan(x)
+    first = None
+    if finite.all():
+        carry = x[0].copy()
+    else:
+        has_values = finite.any(axis=0)
+        first = np.where(has_values, finite.argmax(axis=0), len(x))
+        gaps = (~finite & (np.arange(len(x))[:, None] > first)).any(axis=0)
+        if gaps.any():
+            out[:, gaps] = _ema_gaps(x[:, gaps], alpha)
+            if not gaps.all():
+                out[:, ~gaps] = ema(x[:, ~gaps], span)
+            return out[:, 0] if squeeze else out
+        # only leading NaNs left, they are replaced by the seed and set back to NaN at the end
+        columns = np.arange(x.shape[1])
+        carry = np.where(has_values, x[np.minimum(first, len(x) - 1), columns], 0.0)
+        x = np.where(finite, x, carry)
+
+    if decay == 0:
+        out[:] = x
+    else:
+        block = int(max(1, min(4096, 300 / -np.log(decay))))
+        steps = np.arange(block, dtype=np.float64)
+        inverse_powers = (decay ** -steps)[:, None]
+        powers = (decay ** steps)[:, None]
+        for start in range(0, len(x), block):
+            chunk = x[start:start + block]
+            size = len(chunk)
+            sums = np.multiply(chunk, inverse_powers[:size])
+            np.cumsum(sums, axis=0, out=sums)
+            sums *= alpha
+            sums += decay * carry
+            np.multiply(sums, powers[:size], out=out[start:start + size])
+            carry = out[start + size - 1]
+    if first is not None:
+        out[np.arange(len(x))[:, None] < first] = np.nan
+    return out[:, 0] if squeeze else out
+
+
+def _ema_gaps(x, alpha):
+    """Row by row EMA of a 2-D array with NaN gaps, the recursion of pandas' ewm(adjust=False, ignore_na=False)."""
+    decay = 1 - alpha
+    out = np.empty_like(x)
+    average = x[0].copy()
+    # decay^k, k the number of rows since the last value: y = (decay^k * y_prev + alpha * x) / (decay^k + alpha)
+    old_weight = np.ones(x.shape[1])
+    out[0] = average
+    for i in range(1, len(x)):
+        value = x[i]
+        observed = ~np.isnan(value)
+        started = ~np.isnan(average)
+        old_weight[started] *= decay
+        update = started & observed
+        average[update] = (old_weight[update] * average[update] + alpha * value[update]) / (old_weight[update] + alpha)
+        old_weight[update] = 1.0
+        seed = ~started & observed
+        average[seed] = value[seed]
+        out[i] = average
+    return out
+
+
+def rsi(close, period=14):
+    close = np.asarray(close, dtype=np.float64)
+    delta = close - shift(close)
+    # fmax drops NaN deltas (the first bar), which count as zero gain and zero loss
+    avg_gain = rolling_mean(np.fmax(delta, 0.0), period)
+    np.negative(delta, out=delta)
+    avg_loss = rolling_mean(np.fmax(delta, 0.0, out=delta), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = np.divide(avg_gain, avg_loss, out=avg_gain)
+        rs += 1
+        np.divide(100, rs, out=rs)
+        return np.subtract(100, rs, out=rs)
+
+
+def macd(close, short_window=12, long_window=26, signal_window=9):
+    close = np.asarray(close, dtype=np.float64)
+    macd_line = ema(close, short_window)
+    macd_line -= ema(close, long_window)
+    return macd_line, ema(macd_line, signal_window)
+
+
+def stochastic(high, low, close, period=14, smooth_d=3):
+    low_min = rolling_min(low, period)
+    high_max = rolling_max(high, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        high_max -= low_min
+        stochastic_k = np.subtract(np.asarray(close, dtype=np.float64), low_min, out=low_min)
+        stochastic_k *= 100
+        stochastic_k /= high_max
+    return stochastic_k, rolling_mean(stochastic_k, smooth_d)
+
+
+def atr(high, low, close, period=14):
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    prev_close = shift(np.asarray(close, dtype=np.float64))
+    true_range = high - low
+    np.fmax(true_range, np.abs(high - prev_close), out=true_range)
+    np.subtract(low, prev_close, out=prev_close)
+    np.fmax(true_range, np.abs(prev_close, out=prev_close), out=true_range)
+    return rolling_mean(true_range, period)
@@ -0,0 +1,197 @@
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils.common import NASDAQ_TZ, cache_dir, now
+
+"""
+Exchange calendar cache and a scheduler that only runs during market hours.
+
+MarketCalendar keeps Alpaca's trading calendar (trading days with their
+open and close, including early closes) in a local JSON file and refetches
+it once MARKET_CALENDAR_TTL_HOURS (24) old or when a date beyond the cached
+range is asked for. MarketHoursScheduler runs a job at slots aligned to the
+session open (open, open + interval, ... before the close). Weekends and
+holidays have no sessions, so nothing runs then. A slot that has passed
+while the previous run was still going is skipped, runs never pile up.
+"""
+
+CALENDAR_DAYS_AHEAD = 60
+# no market closure is longer than a few days
+SLOT_SEARCH_DAYS = 7
+# next_slot gives up after this many days without a session (e.g. an empty calendar)
+SLOT_SEARCH_LIMIT_DAYS = 31
+# wait before computing the next slot again after a failure (e.g. the calendar could not be fetched)
+SLOT_RETRY_SECONDS = 60
+
+
+class Session(NamedTuple):
+    day: date
+    open: datetime
+    close: datetime
+
+
+def _aware(value):
+    return value.replace(tzinfo=NASDAQ_TZ) if value.tzinfo is None else value.astimezone(NASDAQ_TZ)
+
+
+class MarketCalendar:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, path=None, *, ttl=None):
+        self.path = path or os.path.join(cache_dir("calendar"), "calendar.json")
+        self.ttl = ttl if ttl is not None else float(os.getenv("MARKET_CALENDAR_TTL_HOURS", "24")) * 3600
+        self._sessions = {}
+        self._start = self._end = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = MarketCalendar()
+            return cls._instance
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            start, end = date.fromisoformat(data["start"]), date.fromisoformat(data["end"])
+            fetched_at = float(data["fetched_at"])
+            sessions = {}
+            for day, open_, close in data["sessions"]:
+                session = Session(date.fromisoformat(day), datetime.fromisoformat(open_), datetime.fromisoformat(close))
+                sessions[session.day] = session
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing or damaged file, the calendar is fetched on first use
+            return
+        self._start, self._end, self._fetched_at, self._sessions = start, end, fetched_at, sessions
+
+    def _save(self):
+        data = {
+            "start": self._start.isoformat(),
+            "end": self._end.isoformat(),
+            "fetched_at": self._fetched_at,
+            "sessions": [[s.day.isoformat(), s.open.isoformat(), s.close.isoformat()] for s in self._sessions.values()],
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def _refresh(self, start, end):
+        from alpaca.trading.requests import GetCalendarRequest
+        calendar = TradingClientSingleton.get_instance().get_calendar(filters=GetCalendarRequest(start=start, end=end))
+        self._sessions = {c.date: Session(c.date, _aware(c.open), _aware(c.close)) for c in calendar}
+        self._start, self._end = start, end
+        # wall clock, the file outlives the process
+        self._fetched_at = time.time()
+        self._save()
+
+    def _ensure(self, start, end):
+        with self._lock:
+            stale = time.time() - self._fetched_at > self.ttl
+            if stale or self._start is None or start < self._start or end > self._end:
+                self._refresh(min(start, now().date()), max(end, now().date() + timedelta(days=CALENDAR_DAYS_AHEAD)))
+
+    def sessions(self, start: date, end: date) -> list[Session]:
+        """Trading sessions from start to end (both inclusive), oldest first."""
+        self._ensure(start, end)
+        return [s for day, s in sorted(self._sessions.items()) if start <= day <= end]
+
+    def session_at(self, moment: datetime = None):
+        """The session open at moment (default now), or None if the market is closed."""
+        moment = moment or now()
+        for session in self.sessions(moment.date(), moment.date()):
+            if session.open <= moment < session.close:
+                return session
+        return None
+
+    def is_open(self, moment: datetime = None) -> bool:
+        return self.session_at(moment) is not None
+
+    def next_slot(self, interval: timedelta, after: datetime = None):
+        """
+        The first slot at or after `after` (default now), slots are open + k * interval before the close.
+        Raises LookupError if there is no session in the SLOT_SEARCH_LIMIT_DAYS after `after`.
+        """
+        after = after or now()
+        day = after.date()
+        while day <= after.date() + timedelta(days=SLOT_SEARCH_LIMIT_DAYS):
+            for session in self.sessions(day, day + timedelta(days=SLOT_SEARCH_DAYS)):
+                if session.close <= after:
+                    continue
+                k = max(0, -(-(after - session.open) // interval))
+                slot = session.open + k * interval
+                if slot < session.close:
+                    return slot
+            day += timedelta(days=SLOT_SEARCH_DAYS + 1)
+        raise LookupError(f"No trading session in the {SLOT_SEARCH_LIMIT_DAYS} days after {after}")
+
+
+class MarketHoursScheduler:
+    def __init__(self, job, interval: timedelta, *, calendar=None, stop_event=None):
+        self.job = job
+        self.interval = interval
+        self.calendar = calendar or MarketCalendar.get_instance()
+        self.stop_event = stop_event or threading.Event()
+        self.runs = 0
+        self.skipped = 0
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        """Stops the scheduler on SIGINT and SIGTERM. Only possible from the main thread."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+    def run(self):
+        """
+        Runs the job at every slot until stop() is called. A failing run is printed, the next slot still runs.
+        If the next slot cannot be computed, it is tried again after SLOT_RETRY_SECONDS.
+        """
+        last_slot = None
+        while not self.stop_event.is_set():
+            current = now()
+            try:
+                slot = self.calendar.next_slot(self.interval, current)
+                missed = self._missed_slots(last_slot, current) if last_slot is not None else 0
+            except Exception as e:
+                print(f"Could not compute the next slot, retrying in {SLOT_RETRY_SECONDS}s: {e}")
+                traceback.print_exc()
+                self.stop_event.wait(SLOT_RETRY_SECONDS)
+                continue
+            if missed:
+                self.skipped += missed
+                print(f"Skipped {missed} slots missed by the previous run")
+            print(f"Next run at {slot}")
+            # sleep in chunks, so a changed system clock or a stop is noticed
+            while not self.stop_event.is_set() and now() < slot:
+                self.stop_event.wait(min(60.0, (slot - now()).total_seconds()))
+            if self.stop_event.is_set():
+                break
+            try:
+                self.job()
+            except Exception as e:
+                print(f"Error: {e}")
+                traceback.print_exc()
+            self.runs += 1
+            last_slot = slot
+
+    def _missed_slots(self, last_slot, current):
+        missed = 0
+        slot = self.calendar.next_slot(self.interval, last_slot + timedelta(microseconds=1))
+        while slot < current:
+            missed += 1
+            slot = self.calendar.next_slot(self.interval, slot + timedelta(microseconds=1))
+        return missed
@@ -0,0 +1,118 @@
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+"""
+Request-scoped market data.
+
+Every tool call made inside `with market_data_session():` (one agent turn)
+gets the same bars for the same (symbol, period, interval), so a turn that
+calls calculate_rsi and analyze_stock for one ticker reads it once.
+Concurrent identical requests from different threads (e.g. two chats asking
+about the same symbol) wait on one in-flight fetch instead of starting their own.
+Returned frames are shared, callers must treat them as read-only.
+"""
+
+_session = ContextVar("market_data_session", default=None)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, concurrent callers with the same key get its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = Future()
+                self._calls[key] = call
+        if not leader:
+            return call.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_bars_flight = SingleFlight()
+
+
+@contextmanager
+def market_data_session():
+    """Shares fetched bars between all tool calls made inside the block."""
+    if _session.get() is not None:
+        # nested sessions reuse the outer one
+        yield
+        return
+    token = _session.set({})
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def get_bars(symbol: str, period: str = '3mo', interval: str = '1d'):
+    key = (symbol.upper(), period, interval)
+    session = _session.get()
+    if session is not None and key in session:
+        return session[key]
+    from investor_agent.utils.bar_cache import BarCache
+    bars = _bars_flight.do(key, lambda: BarCache.get_instance().get(symbol, period=period, interval=interval))
+    if session is not None:
+        session[key] = bars
+    return bars
+
+
+def get_bars_many(symbols: list[str], period: str = '3mo', interval: str = '1d'):
+    session = _session.get()
+    if session is None:
+        session = {}
+    result = {}
+    missing = []
+    for symbol in symbols:
+        key = (symbol.upper(), period, interval)
+        if key in session:
+            result[symbol] = session[key]
+        else:
+            missing.append(symbol)
+    if missing:
+        from investor_agent.utils.bar_cache import BarCache
+        # the bar cache serializes fetches per symbol, concurrent batches share what the first one stored
+        fetched = BarCache.get_instance().get_many(missing, period=period, interval=interval)
+        for symbol, bars in fetched.items():
+            session[(symbol.upper(), period, interval)] = bars
+            result[symbol] = bars
+    return result
+
+
+def aligned_panel(frames: dict, fields=("High", "Low", "Close")):
+    """
+    A (bar x (field, ticker)) panel of the frames, right-aligned so the last row holds every ticker's last bar.
+    Rows missing one of the fields are dropped per ticker first, so trading calendars that differ between
+    tickers (foreign holidays, halts, recent listings) leave no NaN gaps inside a series, shorter histories
+    just start with NaN. The index is the bar position, not a date.
+    """
+    import numpy as np
+    import pandas as pd
+    series = {ticker: frame[list(fields)].dropna() for ticker, frame in frames.items()}
+    length = max((len(s) for s in series.values()), default=0)
+    columns = {}
+    for field in fields:
+        for ticker, s in series.items():
+            values = np.full(length, np.nan)
+            values[length - len(s):] = s[field].to_numpy(dtype=np.float64)
+            columns[(field, ticker)] = values
+    return pd.DataFrame(columns, columns=pd.MultiIndex.from_tuples(columns) if columns else None)
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import date
+
+import numpy as np
+from alpaca.trading.requests import GetOptionContractsRequest, AssetStatus
+
+from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils.common import now, parse_date, run_concurrently
+from investor_agent.utils.greeks import contract_greeks
+from investor_agent.utils.quotes import get_quote
+
+"""
+Cache of complete option chains per underlying.
+
+A chain holds every active contract of an underlying (all pages, calls and
+puts fetched concurrently) and is refetched after OPTION_CHAIN_TTL_SECONDS.
+Contracts are indexed by expiry and then by strike, so the nearest strike
+of an expiry is found with bisect instead of sorting the whole chain.
+"""
+
+PAGE_LIMIT = 10000  # the maximum page size of the contracts endpoint
+OPTION_TYPES = ("call", "put")
+
+
+def normalize_option_type(option_type: str) -> str:
+    option_type = option_type.lower()
+    if option_type == "c":
+        return "call"
+    if option_type == "p":
+        return "put"
+    return option_type
+
+
+class OptionChain:
+    """All contracts of one underlying and type, indexed by expiry and strike."""
+
+    def __init__(self, contracts):
+        contracts = sorted(contracts, key=lambda c: (c.expiration_date, c.strike_price))
+        self.expiries = []
+        # expiry -> (sorted strikes, contracts in the same order)
+        self.by_expiry = {}
+        for contract in contracts:
+            expiry = contract.expiration_date
+            if expiry not in self.by_expiry:
+                self.expiries.append(expiry)
+                self.by_expiry[expiry] = ([], [])
+            strikes, expiry_contracts = self.by_expiry[expiry]
+            strikes.append(contract.strike_price)
+            expiry_contracts.append(contract)
+        self.fetched_at = time.monotonic()
+
+    def __len__(self):
+        return sum(len(strikes) for strikes, _ in self.by_expiry.values())
+
+    def expiries_from(self, day: date):
+        """Expiries on or after the given day, nearest first."""
+        return self.expiries[bisect_left(self.expiries, day):]
+
+    def contracts(self, expiry: date):
+        return self.by_expiry.get(expiry, ([], []))[1]
+
+    def nearest_strike(self, expiry: date, strike_price: float, accept=lambda contract: True):
+        """
+        Returns the accepted contract of the expiry whose strike is closest to strike_price,
+        walking outwards from the bisect position. None if no contract is accepted.
+        """
+        strikes, contracts = self.by_expiry.get(expiry, ([], []))
+        right = bisect_left(strikes, strike_price)
+        left = right - 1
+        while left >= 0 or right < len(strikes):
+            if right >= len(strikes) or (left >= 0 and strike_price - strikes[left] <= strikes[right] - strike_price):
+                candidate = contracts[left]
+                left -= 1
+            else:
+                candidate = contracts[right]
+                right += 1
+            if accept(candidate):
+                return candidate
+        return None
+
+
+class OptionChainCache:
+    _instance = None
+
+    def __init__(self, *, ttl=None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("OPTION_CHAIN_TTL_SECONDS", "300"))
+        self._chains = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = OptionChainCache()
+        return cls._instance
+
+    def get_chain(self, underlying_symbol: str, option_type: str) -> OptionChain:
+        underlying_symbol = underlying_symbol.upper()
+        with self._lock:
+            lock = self._locks.setdefault(underlying_symbol, threading.Lock())
+        # one fetch per underlying at a time, concurrent callers wait for it
+        with lock:
+            chains = self._chains.get(underlying_symbol)
+            if chains is None or time.monotonic() - chains["call"].fetched_at > self.ttl:
+                chains = self._fetch(underlying_symbol)
+                self._chains[underlying_symbol] = chains
+        return chains[normalize_option_type(option_type)]
+
+    def invalidate(self, underlying_symbol: str = None):
+        if underlying_symbol is None:
+            self._chains.clear()
+        else:
+            self._chains.pop(underlying_symbol.upper(), None)
+
+    def _fetch(self, underlying_symbol):
+        # pages are chained by next_page_token, so calls and puts are paged in parallel
+        results = run_concurrently({
+            option_type: lambda option_type=option_type: self._fetch_all_pages(underlying_symbol, option_type)
+            for option_type in OPTION_TYPES
+        })
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+        return {option_type: OptionChain(contracts) for option_type, contracts in results.items()}
+
+    @staticmethod
+    def _fetch_all_pages(underlying_symbol, option_type):
+        client = TradingClientSingleton.get_instance()
+        contracts = []
+        page_token = None
+        while True:
+            response = client.get_option_contracts(GetOptionContractsRequest(
+                underlying_symbols=[underlying_symbol],
+                status=AssetStatus.ACTIVE,
+                type=option_type,
+                expiration_date_gte=now().date(),
+                limit=PAGE_LIMIT,
+                page_token=page_token,
+            ))
+            contracts.extend(response.option_contracts or [])
+            page_token = response.next_page_token
+            if not page_token:
+                return contracts
+
+
+def find_option_contract(underlying_symbol: str, option_type: str, expiration_date: str = None,
+                         strike_price: float = None, min_open_interest: int = 0, target_delta: float = None):
+    """
+    Returns the contract with at least min_open_interest in the given or else the nearest expiry with a match.
+    With target_delta the contract whose delta (from the last closes, see contract_greeks) is closest to it is chosen,
+    otherwise the one with the strike closest to strike_price (defaults to the underlying's current price).
+    """
+    option_type = normalize_option_type(option_type)
+    chain = OptionChainCache.get_instance().get_chain(underlying_symbol, option_type)
+    expiries = [parse_date(expiration_date).date()] if expiration_date else chain.expiries_from(now().date())
+    accept = lambda c: c.open_interest and int(c.open_interest) >= min_open_interest
+
+    if target_delta is not None:
+        target_delta = abs(float(target_delta))
+        # accept both 0.3 and 30 for a 30-delta option, puts have negative deltas
+        target_delta = target_delta / 100 if target_delta > 1 else target_delta
+        target_delta = -target_delta if option_type == "put" else target_delta
+        closes = underlying_closes(underlying_symbol)
+        for expiry in expiries:
+            contracts = [c for c in chain.contracts(expiry) if accept(c)]
+            if not contracts:
+                continue
+            distance = np.abs(contract_greeks(contracts, closes).delta - target_delta)
+            if not np.isnan(distance).all():
+                return contracts[int(np.nanargmin(distance))]
+        return None
+
+    if strike_price is None:
+        strike_price = current_price(underlying_symbol)
+    for expiry in expiries:
+        contract = chain.nearest_strike(expiry, float(strike_price), accept)
+        if contract is not None:
+            return contract
+    return None
+
+
+def current_price(symbol: str) -> float:
+    quote = get_quote(symbol)
+    return quote.last_price or quote.mid_price
+
+
+def underlying_closes(symbol: str) -> dict:
+    """Daily closes of the last 3 months by date, the option close prices are priced against them."""
+    from investor_agent.utils.market_data import get_bars
+    close = get_bars(symbol)["Close"].dropna()
+    return {timestamp.date(): float(price) for timestamp, price in close.items()}
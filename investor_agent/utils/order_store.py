@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from alpaca.common.enums import Sort
+from alpaca.trading.requests import GetOrdersRequest, QueryOrderStatus
+
+from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils.common import cache_dir
+
+"""
+Local SQLite copy of the account's order history, used by the closed-order tools.
+
+The store syncs incrementally: each sync asks only for orders submitted after
+the newest stored order, then refreshes stored orders that were still open
+(their status can change). Orders are indexed by symbol,
+underlying, status, side and submission time per account type (paper/prod).
+Syncs run at most every ORDER_STORE_SYNC_SECONDS.
+"""
+
+# statuses Alpaca reports under the "closed" order query
+CLOSED_STATUSES = ("filled", "canceled", "expired", "rejected", "replaced")
+PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    underlying TEXT NOT NULL,
+    status TEXT NOT NULL,
+    side TEXT,
+    submitted_at REAL NOT NULL,
+    updated_at REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_submitted ON orders (account, submitted_at);
+CREATE INDEX IF NOT EXISTS orders_symbol ON orders (account, symbol, submitted_at);
+CREATE INDEX IF NOT EXISTS orders_underlying ON orders (account, underlying, submitted_at);
+CREATE INDEX IF NOT EXISTS orders_status ON orders (account, status, submitted_at);
+CREATE INDEX IF NOT EXISTS orders_side ON orders (account, side, submitted_at);
+"""
+
+
+def _value(field):
+    return getattr(field, "value", field)
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else None
+
+
+def underlying_symbol(symbol: str) -> str:
+    """The underlying of an OCC option symbol (e.g. AAPL231201C00195000 -> AAPL), or the symbol itself."""
+    prefix = symbol[:-15] if len(symbol) > 15 else symbol
+    return prefix if prefix.isalpha() else symbol
+
+
+class OrderStore:
+    _instance = None
+
+    def __init__(self, path=None, *, sync_seconds=None):
+        self.path = path or os.path.join(cache_dir("orders"), "orders.sqlite3")
+        self.sync_seconds = sync_seconds if sync_seconds is not None else float(os.getenv("ORDER_STORE_SYNC_SECONDS", "30"))
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._synced_at = {}
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = OrderStore()
+        return cls._instance
+
+    @staticmethod
+    def _account():
+        return "paper" if TradingClientSingleton.is_paper() else "prod"
+
+    def sync(self, *, force=False):
+        """Fetches orders submitted after the cursor of the current account and upserts them."""
+        account = self._account()
+        with self._lock:
+            synced_at = self._synced_at.get(account)
+            if not force and synced_at is not None and time.monotonic() - synced_at < self.sync_seconds:
+                return
+            client = TradingClientSingleton.get_instance()
+            cursor = self._connection.execute("SELECT MAX(submitted_at) FROM orders WHERE account = ?", (account,)).fetchone()[0]
+            seen = set()
+            while True:
+                # `after` is exclusive, step back a little so orders sharing the cursor timestamp are not skipped
+                after = datetime.fromtimestamp(cursor, tz=timezone.utc) - timedelta(milliseconds=1) if cursor is not None else None
+                orders = client.get_orders(filter=GetOrdersRequest(
+                    status=QueryOrderStatus.ALL,
+                    after=after,
+                    direction=Sort.ASC,
+                    limit=PAGE_SIZE,
+                    nested=True  # show nested multi-leg orders
+                ))
+                self._upsert(account, orders)
+                seen.update(str(order.id) for order in orders)
+                if len(orders) < PAGE_SIZE:
+                    break
+                next_cursor = _timestamp(orders[-1].submitted_at)
+                if cursor is not None and next_cursor <= cursor:
+                    break
+                cursor = next_cursor
+            self._refresh_open_orders(client, account, seen)
+            self._synced_at[account] = time.monotonic()
+
+    def _refresh_open_orders(self, client, account, seen):
+        """Updates stored orders that were still open, their status may have changed since they were stored."""
+        stored_open = {row[0] for row in self._connection.execute(
+            f"SELECT id FROM orders WHERE account = ? AND status NOT IN ({','.join('?' * len(CLOSED_STATUSES))})",
+            (account, *CLOSED_STATUSES))} - seen
+        if not stored_open:
+            return
+        open_orders = client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=PAGE_SIZE, nested=True))
+        self._upsert(account, open_orders)
+        # the rest was closed meanwhile, usually just a few orders
+        for order_id in stored_open - {str(order.id) for order in open_orders}:
+            self._upsert(account, [client.get_order_by_id(order_id)])
+
+    def _upsert(self, account, orders):
+        rows = [(
+            str(order.id),
+            account,
+            order.symbol or "",
+            underlying_symbol(order.symbol or ""),
+            str(_value(order.status)),
+            str(_value(order.side)) if order.side is not None else None,
+            _timestamp(order.submitted_at),
+            _timestamp(order.updated_at),
+            str(order),
+        ) for order in orders]
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO orders (id, account, symbol, underlying, status, side, submitted_at, updated_at, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def closed_orders(self, *, limit=10, symbol=None, ticker=None, after=None, until=None):
+        """
+        Returns the text of the newest closed orders of the current account.
+
+        Args:
+            limit: The maximum number of orders to return.
+            symbol: Exact order symbol to match.
+            ticker: A stock ticker (matches the stock and its options) or part of an option symbol.
+            after: Only orders submitted after this epoch timestamp.
+            until: Only orders submitted before this epoch timestamp.
+        """
+        self.sync()
+        query = [f"SELECT text FROM orders WHERE account = ? AND status IN ({','.join('?' * len(CLOSED_STATUSES))})"]
+        params = [self._account(), *CLOSED_STATUSES]
+        if symbol:
+            query.append("AND symbol = ?")
+            params.append(symbol.upper())
+        if ticker:
+            if ticker.isalpha() and len(ticker) <= 5:
+                query.append("AND underlying = ?")
+                params.append(ticker.upper())
+            else:
+                query.append("AND symbol LIKE ?")
+                params.append(f"%{ticker.upper()}%")
+        if after is not None:
+            query.append("AND submitted_at > ?")
+            params.append(after)
+        if until is not None:
+            query.append("AND submitted_at < ?")
+            params.append(until)
+        query.append("ORDER BY submitted_at DESC LIMIT ?")
+        params.append(int(limit))
+        with self._lock:
+            return [row[0] for row in self._connection.execute(" ".join(query), params)]
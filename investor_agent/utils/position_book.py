@@ -0,0 +1,207 @@
+import asyncio
+import os
+import threading
+import time
+from decimal import Decimal
+
+from alpaca.trading.stream import TradingStream
+
+from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils.streams import ReconnectBackoff, StreamRunner
+
+"""
+Locally maintained positions, one book per account type (paper/prod).
+
+The book loads all positions once over REST and then applies fills from
+Alpaca's trade_updates stream, so portfolio reads need no network call.
+A background thread reconciles against REST every
+POSITION_BOOK_RECONCILE_SECONDS to correct any drift. While the stream is
+not connected, reads go to REST as before. Set POSITION_BOOK_STREAM=0 to
+disable the stream, TRADING_STREAM_URL points it at another endpoint
+(e.g. a local stand-in for tests).
+"""
+
+FILL_EVENTS = ("fill", "partial_fill")
+
+
+class _TradingStream(ReconnectBackoff, TradingStream):
+    on_connect = None
+    on_disconnect = None
+
+    async def _start_ws(self):
+        await super()._start_ws()
+        if self.on_connect is not None:
+            self.on_connect()
+
+    async def close(self):
+        await super().close()
+        if self.on_disconnect is not None:
+            self.on_disconnect()
+
+
+class PositionBook:
+    _books = {}
+    _books_lock = threading.Lock()
+
+    def __init__(self, paper, *, reconcile_seconds=None, url_override=None, credentials=None):
+        self.paper = paper
+        self.reconcile_seconds = reconcile_seconds or float(os.getenv("POSITION_BOOK_RECONCILE_SECONDS", "300"))
+        self.url_override = url_override
+        self.credentials = credentials
+        self.positions = {}
+        self.reconciled_at = None
+        self.stream_connected = False
+        # one list per running reconcile, collecting the fills applied while it fetches
+        self._fills_during_fetch = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.runner = StreamRunner(f"position-book-{'paper' if paper else 'prod'}", self._make_stream)
+        self._reconciler = None
+
+    @classmethod
+    def get_instance(cls):
+        """Returns the book of the current account, starting its stream on first use unless POSITION_BOOK_STREAM=0."""
+        paper = TradingClientSingleton.is_paper()
+        with cls._books_lock:
+            book = cls._books.get(paper)
+            if book is None:
+                book = PositionBook(paper, url_override=os.getenv("TRADING_STREAM_URL"))
+                cls._books[paper] = book
+                if os.getenv("POSITION_BOOK_STREAM", "1") != "0":
+                    book.start()
+        return book
+
+    def start(self):
+        self._stopped.clear()
+        self.runner.start()
+        self._reconciler = threading.Thread(target=self._reconcile_periodically, name=f"{self.runner.name}-reconcile", daemon=True)
+        self._reconciler.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.runner.stop()
+        self.stream_connected = False
+
+    def get_positions(self):
+        """Returns all open positions, from memory while the stream is connected and the book is loaded."""
+        if not self.stream_connected or self.reconciled_at is None:
+            return self.reconcile()
+        return list(self.positions.values())
+
+    def reconcile(self):
+        """
+        Reloads all positions over REST. Fills applied while the request is in flight are applied
+        again on top of its result, as it may or may not include them (stream fills carry the
+        resulting position_qty, so applying one twice is harmless).
+        """
+        fills = []
+        with self._lock:
+            self._fills_during_fetch.append(fills)
+        try:
+            positions = TradingClientSingleton.get_client(self.paper).get_all_positions()
+        finally:
+            with self._lock:
+                self._fills_during_fetch.remove(fills)
+        new_symbols = []
+        with self._lock:
+            self.positions = {pos.symbol: pos for pos in positions}
+            for order, price, qty, position_qty in fills:
+                closed = position_qty is not None and Decimal(str(position_qty)) == 0
+                if not self._apply_locked(order, price, qty, position_qty) and not closed:
+                    new_symbols.append(order.symbol)
+            self.reconciled_at = time.monotonic()
+        for symbol in dict.fromkeys(new_symbols):
+            self.load_position(symbol)
+        return list(self.positions.values())
+
+    def apply_fill(self, order, price, qty, position_qty=None):
+        """
+        Updates the position of the order's symbol with a fill of `qty` at `price`.
+        Returns False if the symbol is not in the book yet, see load_position.
+        """
+        with self._lock:
+            for fills in self._fills_during_fetch:
+                fills.append((order, price, qty, position_qty))
+            return self._apply_locked(order, price, qty, position_qty)
+
+    def _apply_locked(self, order, price, qty, position_qty):
+        symbol = order.symbol
+        # quantities stay decimal strings, floats would round fractional shares
+        fill_qty = Decimal(str(qty)) if str(order.side).lower().endswith("buy") else -Decimal(str(qty))
+        pos = self.positions.get(symbol)
+        if pos is None:
+            return False
+        new_qty = Decimal(str(position_qty)) if position_qty is not None else Decimal(pos.qty) + fill_qty
+        if new_qty == 0:
+            del self.positions[symbol]
+        else:
+            self.positions[symbol] = self._filled(pos, float(price), fill_qty, new_qty)
+        return True
+
+    def load_position(self, symbol):
+        """Loads the full position model of a symbol new to the book over REST, instead of building it by hand."""
+        try:
+            pos = TradingClientSingleton.get_client(self.paper).get_open_position(symbol)
+        except Exception as e:
+            print(f"Could not load the new position {symbol}: {e}")
+            return
+        with self._lock:
+            self.positions[symbol] = pos
+
+    @staticmethod
+    def _filled(pos, price, fill_qty, new_qty):
+        qty = str(new_qty)
+        old_qty, fill_qty, new_qty = float(pos.qty), float(fill_qty), float(new_qty)
+        multiplier = 100 if "option" in str(pos.asset_class).lower() else 1
+        cost_basis = float(pos.cost_basis)
+        if old_qty * new_qty < 0:
+            # the position flipped sides, what is left was opened by this fill
+            cost_basis = new_qty * price * multiplier
+        elif abs(new_qty) > abs(old_qty):
+            cost_basis += fill_qty * price * multiplier
+        else:
+            cost_basis *= new_qty / old_qty
+        market_value = new_qty * price * multiplier
+        unrealized_pl = market_value - cost_basis
+        return pos.model_copy(update={
+            "qty": qty,
+            "qty_available": qty,
+            "avg_entry_price": str(cost_basis / (new_qty * multiplier)),
+            "cost_basis": str(cost_basis),
+            "current_price": str(price),
+            "market_value": str(market_value),
+            "unrealized_pl": str(unrealized_pl),
+            "unrealized_plpc": str(unrealized_pl / abs(cost_basis)) if cost_basis else "0",
+        })
+
+    def _make_stream(self):
+        api_key_id, secret_key = self.credentials or TradingClientSingleton.get_credentials(paper=self.paper)
+        stream = _TradingStream(api_key_id, secret_key, paper=self.paper, url_override=self.url_override)
+        stream.subscribe_trade_updates(self._on_trade_update)
+        stream.on_connect = self._on_connect
+        stream.on_disconnect = self._on_disconnect
+        return stream
+
+    def _on_connect(self):
+        # fills missed while disconnected are covered by a full reload on the next read
+        self.reconciled_at = None
+        self.stream_connected = True
+
+    def _on_disconnect(self):
+        self.stream_connected = False
+
+    async def _on_trade_update(self, data):
+        if str(data.event).lower().split(".")[-1] in FILL_EVENTS and data.price is not None and data.qty is not None:
+            if not self.apply_fill(data.order, data.price, data.qty, data.position_qty):
+                # the REST call must not block the stream's event loop
+                await asyncio.to_thread(self.load_position, data.order.symbol)
+
+    def _reconcile_periodically(self):
+        while not self._stopped.wait(self.reconcile_seconds):
+            if not self.stream_connected:
+                continue
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"Position book reconcile failed: {e}")
@@ -0,0 +1,125 @@
+import os
+import time
+from functools import lru_cache
+
+from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils.quotes import Quote, QuoteService, mid_price
+from investor_agent.utils.streams import ReconnectBackoff, StreamRunner
+
+"""
+Optional in-memory last-quote/last-trade table fed by Alpaca's market data stream.
+
+Enabled by listing symbols in QUOTE_STREAM_SYMBOLS (comma-separated).
+QUOTE_STREAM_FEED selects 'iex' (default) or 'sip', QUOTE_STREAM_URL points the
+stream at another endpoint, e.g. a local websocket stand-in for tests.
+Handlers replace whole immutable Quote entries, so readers never take a lock.
+"""
+
+
+@lru_cache(maxsize=None)
+def _stream_class():
+    # defined on first use, so importing this module does not load alpaca
+    from alpaca.data.live import StockDataStream
+
+    class _StockDataStream(ReconnectBackoff, StockDataStream):
+        pass
+    return _StockDataStream
+
+
+class QuoteStream:
+    _instance = None
+
+    def __init__(self, symbols, *, feed="iex", url_override=None, credentials=None):
+        self.symbols = frozenset(s.upper() for s in symbols)
+        from alpaca.data.enums import DataFeed
+        self.feed = DataFeed(feed)
+        self.url_override = url_override
+        self.credentials = credentials
+        self.table = {}
+        self.runner = StreamRunner("quote-stream", self._make_stream)
+
+    @classmethod
+    def get_instance(cls):
+        return cls._instance
+
+    def is_subscribed(self, symbol: str) -> bool:
+        return symbol.upper() in self.symbols
+
+    def get(self, symbol: str):
+        """Returns the latest streamed Quote for a subscribed symbol, or None."""
+        return self.table.get(symbol.upper())
+
+    def start(self):
+        self.runner.start()
+        return self
+
+    def stop(self):
+        self.runner.stop()
+
+    def _make_stream(self):
+        api_key_id, secret_key = self.credentials or TradingClientSingleton.get_credentials(paper=False)
+        stream = _stream_class()(api_key_id, secret_key, feed=self.feed, url_override=self.url_override)
+        stream.subscribe_quotes(self._on_quote, *self.symbols)
+        stream.subscribe_trades(self._on_trade, *self.symbols)
+        return stream
+
+    async def _on_quote(self, quote):
+        previous = self.table.get(quote.symbol)
+        last_price = previous.last_price if previous else None
+        self.table[quote.symbol] = Quote(
+            symbol=quote.symbol,
+            bid_price=quote.bid_price,
+            ask_price=quote.ask_price,
+            mid_price=mid_price(quote.bid_price, quote.ask_price, last_price),
+            last_price=last_price,
+            quote_timestamp=quote.timestamp,
+            trade_timestamp=previous.trade_timestamp if previous else None,
+            fetched_at=time.time())
+
+    async def _on_trade(self, trade):
+        previous = self.table.get(trade.symbol)
+        if previous is None:
+            # no quote yet, bid and ask stay unknown and readers fall back to the trade price
+            self.table[trade.symbol] = Quote(trade.symbol, None, None, trade.price, trade.price, None, trade.timestamp, time.time())
+            return
+        self.table[trade.symbol] = previous._replace(
+            last_price=trade.price,
+            mid_price=mid_price(previous.bid_price, previous.ask_price, trade.price),
+            trade_timestamp=trade.timestamp,
+            fetched_at=time.time())
+
+
+def start_quote_stream(symbols=None):
+    """
+    Starts the quote stream for the given symbols (defaults to QUOTE_STREAM_SYMBOLS) and
+    makes the quote service read subscribed symbols from it. Returns None if there is nothing to subscribe.
+    """
+    if symbols is None:
+        symbols = [s.strip() for s in os.getenv("QUOTE_STREAM_SYMBOLS", "").split(",") if s.strip()]
+    if not symbols:
+        return None
+    if QuoteStream._instance is not None:
+        QuoteStream._instance.stop()
+    stream = QuoteStream(symbols, feed=os.getenv("QUOTE_STREAM_FEED", "iex"), url_override=os.getenv("QUOTE_STREAM_URL"))
+    QuoteStream._instance = stream
+    QuoteService.get_instance().live_table = stream
+    return stream.start()
+
+
+def with_live_prices(positions):
+    """Returns the positions with current_price and market_value taken from fresh quote stream entries of subscribed stocks."""
+    stream = QuoteStream.get_instance()
+    if stream is None:
+        return positions
+    # stale entries (quiet symbol, stalled stream) keep the price the positions came with
+    max_age = QuoteService.get_instance().ttl
+    updated = []
+    for pos in positions:
+        quote = stream.get(pos.symbol) if stream.is_subscribed(pos.symbol) else None
+        if quote is not None and quote.age() > max_age:
+            quote = None
+        price = quote and (quote.last_price or quote.mid_price)
+        if price:
+            pos = pos.model_copy(update={"current_price": str(price), "market_value": str(float(pos.qty) * price)})
+        updated.append(pos)
+    return updated
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple, Optional
+from datetime import datetime
+
+from investor_agent.utils import TradingClientSingleton
+
+"""
+Latest-quote service shared by the price tools.
+
+Quotes are cached for QUOTE_TTL_SECONDS. Lookups for uncached symbols that
+arrive within QUOTE_BATCH_WINDOW_MS of each other are merged into one
+multi-symbol latest-quote request (plus one latest-trade request for the
+last price). Every Quote carries its exchange timestamps, so callers can
+decide themselves whether it is fresh enough. Symbols subscribed on the
+quote stream (see quote_stream.py) are served from its table instead.
+"""
+
+
+class Quote(NamedTuple):
+    symbol: str
+    # None until the stream has seen a quote for the symbol
+    bid_price: Optional[float]
+    ask_price: Optional[float]
+    mid_price: float
+    last_price: Optional[float]
+    quote_timestamp: Optional[datetime]
+    trade_timestamp: Optional[datetime]
+    # local time.time() when the quote was received
+    fetched_at: float
+
+    def age(self) -> float:
+        """Seconds since the quote was received."""
+        return time.time() - self.fetched_at
+
+    def __str__(self):
+        return (f"{self.symbol}: bid {self.bid_price} ask {self.ask_price} mid {self.mid_price} "
+                f"last {self.last_price} (quote at {self.quote_timestamp}, trade at {self.trade_timestamp})")
+
+
+def mid_price(bid_price, ask_price, last_price=None):
+    if bid_price and ask_price:
+        return (bid_price + ask_price) / 2
+    return ask_price or bid_price or last_price or 0.0
+
+
+class QuoteService:
+    _instance = None
+
+    def __init__(self, *, ttl=None, batch_window=None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("QUOTE_TTL_SECONDS", "2"))
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv("QUOTE_BATCH_WINDOW_MS", "5")) / 1000
+        self._cache = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+        # an optional QuoteStream, subscribed symbols are served from it without a request
+        self.live_table = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = QuoteService()
+        return cls._instance
+
+    def get_quote(self, symbol: str, *, max_age: float = None) -> Quote:
+        return self.get_quotes([symbol], max_age=max_age)[symbol.upper()]
+
+    def get_quotes(self, symbols: list[str], *, max_age: float = None) -> dict[str, Quote]:
+        """
+        Returns the latest quote per symbol (keys are upper-cased).
+        Cached and streamed quotes older than max_age (defaults to the TTL) are fetched again.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        result = {}
+        waiting = {}
+        with self._lock:
+            for symbol in {s.upper() for s in symbols}:
+                live = self.live_table.get(symbol) if self.live_table is not None else None
+                if live is not None and live.age() <= max_age:
+                    result[symbol] = live
+                    continue
+                cached = self._cache.get(symbol)
+                if cached is not None and cached.age() <= max_age:
+                    result[symbol] = cached
+                    continue
+                future = self._pending.get(symbol)
+                if future is None:
+                    future = Future()
+                    self._pending[symbol] = future
+                waiting[symbol] = future
+            if waiting and not self._flush_scheduled:
+                self._flush_scheduled = True
+                timer = threading.Timer(self.batch_window, self._flush)
+                timer.daemon = True
+                timer.start()
+        for symbol, future in waiting.items():
+            result[symbol] = future.result()
+        return result
+
+    def put(self, quote: Quote):
+        """Stores a quote received from elsewhere (e.g. a stream)."""
+        with self._lock:
+            self._cache[quote.symbol] = quote
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        if not pending:
+            return
+        try:
+            quotes = self._fetch(list(pending))
+        except Exception as e:
+            if len(pending) == 1:
+                next(iter(pending.values())).set_exception(e)
+                return
+            # one bad symbol must not fail the lookups it was batched with
+            quotes = {}
+            for symbol, future in list(pending.items()):
+                try:
+                    quotes.update(self._fetch([symbol]))
+                except Exception as symbol_error:
+                    future.set_exception(symbol_error)
+                    del pending[symbol]
+        with self._lock:
+            self._cache.update(quotes)
+        for symbol, future in pending.items():
+            if symbol in quotes:
+                future.set_result(quotes[symbol])
+            else:
+                future.set_exception(KeyError(f"No quote for {symbol}"))
+
+    def _fetch(self, symbols):
+        from alpaca.data.requests import StockLatestQuoteRequest, StockLatestTradeRequest
+        data_client = TradingClientSingleton.get_histrical_data_client()
+        latest_quotes = data_client.get_stock_latest_quote(StockLatestQuoteRequest(symbol_or_symbols=symbols))
+        latest_trades = data_client.get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=symbols))
+        fetched_at = time.time()
+        quotes = {}
+        for symbol, quote in latest_quotes.items():
+            trade = latest_trades.get(symbol)
+            last_price = trade.price if trade is not None else None
+            quotes[symbol] = Quote(
+                symbol=symbol,
+                bid_price=quote.bid_price,
+                ask_price=quote.ask_price,
+                mid_price=mid_price(quote.bid_price, quote.ask_price, last_price),
+                last_price=last_price,
+                quote_timestamp=quote.timestamp,
+                trade_timestamp=trade.timestamp if trade is not None else None,
+                fetched_at=fetched_at)
+        return quotes
+
+
+def get_quote(symbol: str, *, max_age: float = None) -> Quote:
+    return QuoteService.get_instance().get_quote(symbol, max_age=max_age)
@@ -0,0 +1,166 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from investor_agent.utils.streams import backoff_delay
+
+"""
+Process-wide governor for Alpaca's per-minute request budget.
+
+Every trading and data client call takes a token from the bucket of its API
+key (ALPACA_REQUESTS_PER_MINUTE, default 200, refilled continuously). Calls
+run in one of two lanes: order calls (submit, cancel, replace, close, exercise)
+may use the whole bucket and go first, reads leave ALPACA_ORDER_RESERVE
+tokens for them and wait while an order call is waiting. A 429 response
+pauses the bucket for its Retry-After (or a jittered backoff) and the call is
+retried up to ALPACA_MAX_RETRIES times.
+"""
+
+ORDERS = "orders"
+READS = "reads"
+ORDER_METHOD_PREFIXES = ("submit_", "cancel_", "replace_", "close_", "exercise_")
+
+
+def lane_of(method_name: str) -> str:
+    return ORDERS if method_name.startswith(ORDER_METHOD_PREFIXES) else READS
+
+
+class RateLimitGovernor:
+    _governors = {}
+    _governors_lock = threading.Lock()
+
+    def __init__(self, name, *, requests_per_minute=None, order_reserve=None):
+        self.name = name
+        self.capacity = requests_per_minute or int(os.getenv("ALPACA_REQUESTS_PER_MINUTE", "200"))
+        self.order_reserve = order_reserve if order_reserve is not None else int(os.getenv("ALPACA_ORDER_RESERVE", "20"))
+        self.refill_per_second = self.capacity / 60
+        self._tokens = float(self.capacity)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {ORDERS: 0, READS: 0}
+        self._calls = {ORDERS: 0, READS: 0}
+        self._throttled = 0
+        self._recent = deque()
+        self._cond = threading.Condition()
+
+    @classmethod
+    def get_instance(cls, name):
+        """Returns the governor of an API key ('paper' or 'prod'), the budget is per key."""
+        with cls._governors_lock:
+            governor = cls._governors.get(name)
+            if governor is None:
+                governor = RateLimitGovernor(name)
+                cls._governors[name] = governor
+            return governor
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.refill_per_second)
+        self._refilled_at = now
+
+    def acquire(self, lane=READS):
+        """Blocks until the lane may make one request."""
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    floor = 0 if lane == ORDERS else self.order_reserve
+                    if now < self._paused_until:
+                        wait = self._paused_until - now
+                    elif lane == READS and self._waiting[ORDERS]:
+                        wait = None  # woken up when the order call got its token
+                    elif self._tokens >= floor + 1:
+                        self._tokens -= 1
+                        self._calls[lane] += 1
+                        self._recent.append(now)
+                        return
+                    else:
+                        wait = (floor + 1 - self._tokens) / self.refill_per_second
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[lane] -= 1
+                self._cond.notify_all()
+
+    def throttled(self, retry_after=None, attempt=1):
+        """Records a 429 response and pauses all lanes for retry_after seconds (or a jittered backoff)."""
+        delay = retry_after + random.uniform(0, 1) if retry_after is not None else backoff_delay(attempt, base=1.0)
+        with self._cond:
+            self._throttled += 1
+            # the server says the budget is used up, whatever our count was
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+    def usage(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            return {
+                "key": self.name,
+                "requests_per_minute": self.capacity,
+                "available": int(self._tokens),
+                "used_last_minute": len(self._recent),
+                "calls": dict(self._calls),
+                "waiting": dict(self._waiting),
+                "throttled_responses": self._throttled,
+                "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+            }
+
+
+def _retry_after(error):
+    response = getattr(getattr(error, "_http_error", None), "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _status_code(error):
+    try:
+        return getattr(error, "status_code", None)
+    except Exception:
+        return None
+
+
+class GovernedClient:
+    """Proxy of an Alpaca REST client that passes every method call through a RateLimitGovernor."""
+
+    def __init__(self, client, governor, *, max_retries=None):
+        self._client = client
+        self._governor = governor
+        self._max_retries = max_retries if max_retries is not None else int(os.getenv("ALPACA_MAX_RETRIES", "3"))
+        # the client's own 429 retry sleeps a fixed time without Retry-After, the governor handles 429 instead
+        retry_codes = getattr(client, "_retry_codes", None)
+        if isinstance(retry_codes, list):
+            client._retry_codes = [code for code in retry_codes if code != 429]
+
+    @property
+    def governor(self):
+        return self._governor
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        lane = lane_of(name)
+
+        def governed(*args, **kwargs):
+            attempt = 0
+            while True:
+                self._governor.acquire(lane)
+                try:
+                    return attr(*args, **kwargs)
+                except Exception as e:
+                    if _status_code(e) != 429 or attempt >= self._max_retries:
+                        raise
+                    attempt += 1
+                    self._governor.throttled(_retry_after(e), attempt)
+
+        governed.__name__ = name
+        return governed
@@ -0,0 +1,240 @@
+"""
+Universe-wide RSI / MACD / Stochastic / ATR screener.
+
+Bars of the whole universe are loaded once (one batched bar cache read) into
+a (field x time x ticker) float64 array in shared memory. Worker processes
+attach to it by name and compute the indicator kernels on a slice of tickers
+each, only the last values travel back. The pool is kept between screens and
+uses the spawn start method, so it can be started from a threaded process
+like the bot. Small universes are computed in process.
+
+Named universes (sp500, nasdaq100) are read from Wikipedia's constituent
+tables with pandas.read_html and cached for UNIVERSE_TTL_DAYS (7).
+
+Usage (from the repository root):
+    python -m investor_agent.utils.screener --universe nasdaq100
+    python -m investor_agent.utils.screener --universe AAPL,MSFT,NVDA --interval 1h --period 1mo --json hits.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from investor_agent.utils import indicator_kernels as kernels
+from investor_agent.utils.common import cache_dir
+
+FIELDS = ("High", "Low", "Close")
+# last values computed per ticker: RSI, MACD - signal (now and one bar earlier), %K, ATR, close
+RESULT_ROWS = 6
+
+UNIVERSES = {
+    "sp500": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
+    "nasdaq100": "https://en.wikipedia.org/wiki/Nasdaq-100",
+}
+TICKER_COLUMNS = ("Symbol", "Ticker")
+
+
+def load_universe(name: str) -> list[str]:
+    """Tickers of a named universe (see UNIVERSES), or the given comma-separated tickers."""
+    key = name.strip().lower()
+    if key not in UNIVERSES:
+        return [t.strip().upper() for t in name.split(",") if t.strip()]
+    path = os.path.join(cache_dir("universes"), f"{key}.json")
+    ttl = float(os.getenv("UNIVERSE_TTL_DAYS", "7")) * 86400
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+        with open(path) as f:
+            return json.load(f)
+    import pandas as pd
+    # the constituents table is the one with a ticker column
+    table, column = next((t, c) for t in pd.read_html(UNIVERSES[key]) for c in TICKER_COLUMNS if c in t.columns)
+    # Yahoo spells class shares with a dash (BRK-B)
+    tickers = [str(t).strip().upper().replace(".", "-") for t in table[column].dropna()]
+    with open(path, "w") as f:
+        json.dump(tickers, f)
+    return tickers
+
+
+class Hit(NamedTuple):
+    ticker: str
+    signal: str  # "oversold" or "overbought"
+    score: float
+    rsi: float
+    stochastic_k: float
+    macd: str
+    atr_pct: float
+    close: float
+
+
+def compute_last_values(panel):
+    """
+    Indicator values at the last bar for every ticker of a (field x time x ticker) panel of High, Low, Close.
+    Returns a (RESULT_ROWS x ticker) array.
+    """
+    high, low, close = (np.ascontiguousarray(panel[i]) for i in range(len(FIELDS)))
+    out = np.full((RESULT_ROWS, close.shape[1]), np.nan)
+    if len(close) < 2:
+        return out
+    macd, signal_line = kernels.macd(close)
+    out[0] = kernels.rsi(close)[-1]
+    out[1] = macd[-1] - signal_line[-1]
+    out[2] = macd[-2] - signal_line[-2]
+    out[3] = kernels.stochastic(high, low, close)[0][-1]
+    out[4] = kernels.atr(high, low, close)[-1]
+    out[5] = close[-1]
+    return out
+
+
+_attached = {}
+
+
+def _compute_slice(name, shape, start, stop):
+    """Runs in a worker: computes the tickers start:stop of the shared panel `name`."""
+    if name not in _attached:
+        # a new screen allocates a new block, the old attachment can go
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        # spawned workers share the parent's resource tracker, the parent unlinks the block
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    panel = np.ndarray(shape, dtype=np.float64, buffer=_attached[name].buf)
+    return compute_last_values(panel[:, :, start:stop])
+
+
+class Screener:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, *, max_workers=None, inline_cells=None):
+        self.max_workers = max_workers or int(os.getenv("SCREENER_MAX_WORKERS", str(os.cpu_count() or 1)))
+        # panels smaller than this (time x ticker cells) are not worth the round trip to the workers
+        self.inline_cells = inline_cells if inline_cells is not None else int(os.getenv("SCREENER_INLINE_CELLS", "200000"))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = Screener()
+            return cls._instance
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def load_panel(self, tickers, *, period="3mo", interval="1d"):
+        """Returns (tickers with data, bar index, right-aligned panel array) for the tickers from the bar cache."""
+        from investor_agent.utils.market_data import aligned_panel, get_bars_many
+        frames = {t: f for t, f in get_bars_many(tickers, period=period, interval=interval).items() if not f.empty}
+        if not frames:
+            return [], None, np.empty((len(FIELDS), 0, 0))
+        panel = aligned_panel(frames, FIELDS)
+        names = list(frames)
+        array = np.stack([panel[field].reindex(columns=names).to_numpy(dtype=np.float64) for field in FIELDS])
+        return names, panel.index, array
+
+    def compute(self, panel):
+        """The (RESULT_ROWS x ticker) last values of a (field x time x ticker) panel, spread over the worker pool."""
+        fields, bars, tickers = panel.shape
+        workers = min(self.max_workers, tickers)
+        if workers <= 1 or bars * tickers < self.inline_cells:
+            return compute_last_values(panel)
+        block = shared_memory.SharedMemory(create=True, size=panel.nbytes)
+        shared = np.ndarray(panel.shape, dtype=np.float64, buffer=block.buf)
+        try:
+            shared[:] = panel
+            # two slices per worker even out uneven slices
+            size = math.ceil(tickers / (workers * 2))
+            with self._lock:
+                pool = self._pool()
+                futures = [pool.submit(_compute_slice, block.name, panel.shape, start, min(start + size, tickers))
+                           for start in range(0, tickers, size)]
+            return np.concatenate([future.result() for future in futures], axis=1)
+        finally:
+            # the view must go before the buffer can be closed
+            del shared
+            block.close()
+            block.unlink()
+
+    def screen(self, tickers, *, period="3mo", interval="1d"):
+        """Ranked oversold and overbought hits of the tickers: (oversold, overbought, tickers without data)."""
+        names, _, panel = self.load_panel(tickers, period=period, interval=interval)
+        missing = [t for t in tickers if t not in set(names)]
+        if not names:
+            return [], [], missing
+        values = self.compute(panel)
+        oversold, overbought = [], []
+        for i, ticker in enumerate(names):
+            rsi, macd_now, macd_before, k, atr, close = values[:, i]
+            if np.isnan(rsi) or np.isnan(close):
+                missing.append(ticker)
+                continue
+            macd = "Buy" if macd_now > 0 > macd_before else "Sell" if macd_now < 0 < macd_before else "-"
+            atr_pct = atr / close * 100 if close else float("nan")
+            # one point per signal, plus how far RSI and %K are past their thresholds
+            low_score = (rsi < 30) + (k < 20) + (macd == "Buy") + max(0.0, 30 - rsi) / 30 + max(0.0, 20 - k) / 20
+            high_score = (rsi > 70) + (k > 80) + (macd == "Sell") + max(0.0, rsi - 70) / 30 + max(0.0, k - 80) / 20
+            if rsi < 30 or k < 20:
+                oversold.append(Hit(ticker, "oversold", float(low_score), float(rsi), float(k), macd, float(atr_pct), float(close)))
+            if rsi > 70 or k > 80:
+                overbought.append(Hit(ticker, "overbought", float(high_score), float(rsi), float(k), macd, float(atr_pct), float(close)))
+        oversold.sort(key=lambda hit: hit.score, reverse=True)
+        overbought.sort(key=lambda hit: hit.score, reverse=True)
+        return oversold, overbought, missing
+
+
+def screen_universe(universe, *, period="3mo", interval="1d"):
+    return Screener.get_instance().screen(load_universe(universe), period=period, interval=interval)
+
+
+def format_hits(title, hits, top=None):
+    lines = [f"{title}:", f"{'Tkr':<6} {'score':>5} {'RSI':>6} {'%K':>6} {'MACDs':>5} {'ATR%':>6} {'close':>9}"]
+    for hit in hits[:top]:
+        lines.append(f"{hit.ticker:<6} {hit.score:>5.2f} {hit.rsi:>6.2f} {hit.stochastic_k:>6.2f} {hit.macd:>5} {hit.atr_pct:>6.2f} {hit.close:>9.2f}")
+    if not hits:
+        lines.append("None")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--universe", default="nasdaq100", help="sp500, nasdaq100 or comma-separated tickers")
+    parser.add_argument("--period", default="3mo")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--top", type=int, default=20, help="hits to print per side")
+    parser.add_argument("--workers", type=int, help="processes, defaults to SCREENER_MAX_WORKERS or the CPU count")
+    parser.add_argument("--json", help="also write all hits to this file")
+    args = parser.parse_args()
+
+    if args.workers:
+        Screener._instance = Screener(max_workers=args.workers)
+    started = time.perf_counter()
+    oversold, overbought, missing = screen_universe(args.universe, period=args.period, interval=args.interval)
+    print(format_hits("Oversold", oversold, args.top))
+    print(format_hits("Overbought", overbought, args.top))
+    if missing:
+        print(f"No data for: {', '.join(missing)}")
+    print(f"Screened in {time.perf_counter() - started:.2f}s")
+    Screener.get_instance().close()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"oversold": [h._asdict() for h in oversold], "overbought": [h._asdict() for h in overbought],
+                       "missing": missing}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
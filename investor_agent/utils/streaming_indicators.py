@@ -0,0 +1,313 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+
+"""
+Stateful versions of the indicators in technical_momentum_indicator_calls.
+
+Each indicator is seeded from history once (from_history) and then advanced
+with update(bar) in constant time, where bar is any mapping with 'High',
+'Low' and 'Close' (a dict or a DataFrame row). The values match the batch
+calculate_* functions up to floating point error. snapshot() returns a plain
+dict that restore() turns back into an equivalent indicator.
+
+NaN values are handled like in indicator_kernels: rolling means, minima and
+maxima are NaN while their window holds a NaN, an Ema holds its value over a
+NaN gap and weighs the next value against it with the decay of the whole gap,
+and a NaN close counts as no gain and no loss in the RSI.
+"""
+
+NAN = float("nan")
+
+
+def _fmax(*values):
+    """Largest value that is not NaN, NaN if all are (np.fmax)."""
+    values = [v for v in values if not math.isnan(v)]
+    return max(values) if values else NAN
+
+
+class RollingMean:
+    """Simple moving average over the last `window` values, NaN until the window is full or while it holds a NaN."""
+
+    # the running sum is recomputed from the window this often to stop floating point drift
+    RESYNC_EVERY = 1024
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.nan_count = 0
+        self.updates = 0
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            dropped = self.values[0]
+            if math.isnan(dropped):
+                self.nan_count -= 1
+            else:
+                self.total -= dropped
+        self.values.append(value)
+        if math.isnan(value):
+            self.nan_count += 1
+        else:
+            self.total += value
+        self.updates += 1
+        if self.updates % self.RESYNC_EVERY == 0:
+            self.total = math.fsum(v for v in self.values if not math.isnan(v))
+        if len(self.values) < self.window or self.nan_count:
+            return NAN
+        return self.total / self.window
+
+    def snapshot(self) -> dict:
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        rolling = cls(snapshot["window"])
+        for value in snapshot["values"]:
+            rolling.update(value)
+        return rolling
+
+
+class RollingExtreme:
+    """
+    Rolling min or max over the last `window` values, kept in a monotonic deque of (position, value).
+    NaN until the window is full or while it holds a NaN.
+    """
+
+    def __init__(self, window: int, *, is_max: bool):
+        self.window = window
+        self.is_max = is_max
+        self.candidates = deque()
+        self.position = 0
+        self.last_nan = None
+
+    def update(self, value: float) -> float:
+        if math.isnan(value):
+            # NaN compares false with everything, it is tracked by position instead of entering the deque
+            self.last_nan = self.position
+        elif self.is_max:
+            while self.candidates and self.candidates[-1][1] <= value:
+                self.candidates.pop()
+        else:
+            while self.candidates and self.candidates[-1][1] >= value:
+                self.candidates.pop()
+        if not math.isnan(value):
+            self.candidates.append((self.position, value))
+        if self.candidates and self.candidates[0][0] <= self.position - self.window:
+            self.candidates.popleft()
+        self.position += 1
+        if self.position < self.window or (self.last_nan is not None and self.last_nan >= self.position - self.window):
+            return NAN
+        return self.candidates[0][1]
+
+    def snapshot(self) -> dict:
+        return {"window": self.window, "is_max": self.is_max, "candidates": [list(c) for c in self.candidates],
+                "position": self.position, "last_nan": self.last_nan}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        extreme = cls(snapshot["window"], is_max=snapshot["is_max"])
+        extreme.candidates = deque(tuple(c) for c in snapshot["candidates"])
+        extreme.position = snapshot["position"]
+        extreme.last_nan = snapshot["last_nan"]
+        return extreme
+
+
+class Ema:
+    """
+    Exponential moving average with adjust=False semantics, seeded with the first value that is not NaN.
+    Over a NaN gap it keeps its value, like pandas' ewm(adjust=False, ignore_na=False).
+    """
+
+    def __init__(self, span: int):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.value = None
+        # decay^k, k the number of updates since the last value
+        self.old_weight = 1.0
+
+    def update(self, value: float) -> float:
+        if self.value is None:
+            if math.isnan(value):
+                return NAN
+            self.value = value
+            return self.value
+        self.old_weight *= 1 - self.alpha
+        if not math.isnan(value):
+            self.value = (self.old_weight * self.value + self.alpha * value) / (self.old_weight + self.alpha)
+            self.old_weight = 1.0
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"span": self.span, "value": self.value, "old_weight": self.old_weight}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        ema = cls(snapshot["span"])
+        ema.value = snapshot["value"]
+        ema.old_weight = snapshot["old_weight"]
+        return ema
+
+
+class StreamingIndicator(ABC):
+    """Base class: seeding from history and snapshot/restore."""
+
+    @classmethod
+    def from_history(cls, data, **params):
+        """
+        Creates the indicator and feeds it every bar of the given stock data.
+
+        Args:
+            data (pd.DataFrame): Stock data containing 'High', 'Low', and 'Close' prices.
+            params: Indicator parameters, same names as the batch functions.
+        """
+        indicator = cls(**params)
+        for high, low, close in zip(data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy()):
+            indicator.update({'High': float(high), 'Low': float(low), 'Close': float(close)})
+        return indicator
+
+    @abstractmethod
+    def update(self, bar):
+        """Advances the indicator by one bar and returns its current value(s)."""
+
+    @abstractmethod
+    def snapshot(self) -> dict:
+        """The indicator state as a plain dict."""
+
+    @classmethod
+    @abstractmethod
+    def restore(cls, snapshot: dict):
+        """Rebuilds an indicator from snapshot()."""
+
+
+class StreamingRSI(StreamingIndicator):
+    """Incremental calculate_rsi: simple moving averages of gains and losses over `period` bars."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = RollingMean(period)
+        self.avg_loss = RollingMean(period)
+        self.value = NAN
+
+    def update(self, bar) -> float:
+        close = float(bar['Close'])
+        # the first bar has no delta, the batch version counts it and NaN deltas as zero gain and zero loss
+        delta = NAN if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        avg_gain = self.avg_gain.update(_fmax(delta, 0.0))
+        avg_loss = self.avg_loss.update(_fmax(-delta, 0.0))
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            self.value = NAN
+        elif avg_loss == 0:
+            self.value = 100.0 if avg_gain > 0 else NAN
+        else:
+            self.value = 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "prev_close": self.prev_close, "avg_gain": self.avg_gain.snapshot(),
+                "avg_loss": self.avg_loss.snapshot(), "value": self.value}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        rsi = cls(snapshot["period"])
+        rsi.prev_close = snapshot["prev_close"]
+        rsi.avg_gain = RollingMean.restore(snapshot["avg_gain"])
+        rsi.avg_loss = RollingMean.restore(snapshot["avg_loss"])
+        rsi.value = snapshot["value"]
+        return rsi
+
+
+class StreamingMACD(StreamingIndicator):
+    """Incremental calculate_macd, returns (macd, signal_line) for every bar."""
+
+    def __init__(self, short_window: int = 12, long_window: int = 26, signal_window: int = 9):
+        self.short_ema = Ema(short_window)
+        self.long_ema = Ema(long_window)
+        self.signal_ema = Ema(signal_window)
+        self.value = (NAN, NAN)
+
+    def update(self, bar) -> tuple[float, float]:
+        close = float(bar['Close'])
+        macd = self.short_ema.update(close) - self.long_ema.update(close)
+        self.value = (macd, self.signal_ema.update(macd))
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"short_ema": self.short_ema.snapshot(), "long_ema": self.long_ema.snapshot(),
+                "signal_ema": self.signal_ema.snapshot(), "value": list(self.value)}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        macd = cls()
+        macd.short_ema = Ema.restore(snapshot["short_ema"])
+        macd.long_ema = Ema.restore(snapshot["long_ema"])
+        macd.signal_ema = Ema.restore(snapshot["signal_ema"])
+        macd.value = tuple(snapshot["value"])
+        return macd
+
+
+class StreamingStochastic(StreamingIndicator):
+    """Incremental calculate_stochastic, returns (%K, %D) for every bar."""
+
+    def __init__(self, period: int = 14, smooth_k: int = 3, smooth_d: int = 3):
+        self.period = period
+        self.smooth_k = smooth_k
+        self.low_min = RollingExtreme(period, is_max=False)
+        self.high_max = RollingExtreme(period, is_max=True)
+        self.stochastic_d = RollingMean(smooth_d)
+        self.value = (NAN, NAN)
+
+    def update(self, bar) -> tuple[float, float]:
+        low_min = self.low_min.update(float(bar['Low']))
+        high_max = self.high_max.update(float(bar['High']))
+        if math.isnan(low_min) or high_max == low_min:
+            stochastic_k = NAN
+        else:
+            stochastic_k = 100 * (float(bar['Close']) - low_min) / (high_max - low_min)
+        self.value = (stochastic_k, self.stochastic_d.update(stochastic_k))
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "smooth_k": self.smooth_k, "low_min": self.low_min.snapshot(),
+                "high_max": self.high_max.snapshot(), "stochastic_d": self.stochastic_d.snapshot(), "value": list(self.value)}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        stochastic = cls(snapshot["period"], snapshot["smooth_k"])
+        stochastic.low_min = RollingExtreme.restore(snapshot["low_min"])
+        stochastic.high_max = RollingExtreme.restore(snapshot["high_max"])
+        stochastic.stochastic_d = RollingMean.restore(snapshot["stochastic_d"])
+        stochastic.value = tuple(snapshot["value"])
+        return stochastic
+
+
+class StreamingATR(StreamingIndicator):
+    """Incremental calculate_atr: simple moving average of the true range over `period` bars."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.atr = RollingMean(period)
+        self.value = NAN
+
+    def update(self, bar) -> float:
+        high, low = float(bar['High']), float(bar['Low'])
+        prev_close = NAN if self.prev_close is None else self.prev_close
+        true_range = _fmax(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.prev_close = float(bar['Close'])
+        self.value = self.atr.update(true_range)
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {"period": self.period, "prev_close": self.prev_close, "atr": self.atr.snapshot(), "value": self.value}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        atr = cls(snapshot["period"])
+        atr.prev_close = snapshot["prev_close"]
+        atr.atr = RollingMean.restore(snapshot["atr"])
+        atr.value = snapshot["value"]
+        return atr
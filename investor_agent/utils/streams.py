@@ -0,0 +1,77 @@
+import asyncio
+import random
+import threading
+import traceback
+
+"""
+Helpers for running Alpaca websocket streams in the background.
+
+alpaca-py reconnects and resubscribes on websocket errors by itself, but it
+retries a refused connection in a tight loop. ReconnectBackoff adds jittered
+exponential backoff between connection attempts, StreamRunner restarts a
+stream whose run() returned (e.g. after an auth failure) until stop() is called.
+"""
+
+
+def backoff_delay(attempt, *, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ReconnectBackoff:
+    """Mixin for alpaca stream classes, waits before reconnecting after failed connection attempts."""
+
+    _failed_connects = 0
+
+    async def _start_ws(self):
+        if self._failed_connects:
+            await asyncio.sleep(backoff_delay(self._failed_connects))
+        try:
+            await super()._start_ws()
+        except Exception:
+            self._failed_connects += 1
+            raise
+        self._failed_connects = 0
+
+
+class StreamRunner:
+    """Runs a stream created by make_stream() on a daemon thread and restarts it whenever it exits."""
+
+    def __init__(self, name, make_stream):
+        self.name = name
+        self.make_stream = make_stream
+        self.stream = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.stop()
+            except Exception as e:
+                print(f"Error while stopping {self.name}: {e}")
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def _run(self):
+        attempt = 0
+        while not self._stopped.is_set():
+            try:
+                self.stream = self.make_stream()
+                self.stream.run()
+                attempt = 0
+            except Exception as e:
+                print(f"{self.name} failed: {e}")
+                traceback.print_exc()
+            attempt += 1
+            self._stopped.wait(backoff_delay(attempt))
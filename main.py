@@ -1,4 +1,5 @@
 import common
+from investor_agent.utils.market_data import market_data_session
 
 
 
@@ -23,6 +24,7 @@ if __name__ == "__main__":
         user_input = input("You: ")
         if user_input == "exit":
             break
-        response, h = clt.send_message(user_input, history=history)
+        with market_data_session():
+            response, h = clt.send_message(user_input, history=history)
         history += h
         print("Jessica:", response)
\ No newline at end of file
@@ -1,14 +1,17 @@
-from gemini_agents_toolkit.pipeline import Pipeline
-from gemini_agents_toolkit.history_utils import print_history
-from gemini_agents_toolkit.agent_utils import start_debug_chat
 import investor_agent
+from investor_agent.strategies import run_dip_strategy, tqqq_dip
+from investor_agent.utils.market_calendar import MarketHoursScheduler
+from investor_agent.utils.market_data import market_data_session
+from investor_agent.utils.quote_stream import start_quote_stream
 
-import vertexai
+from datetime import timedelta
+import os
 import time
-import traceback
 
-
-vertexai.init(project="gemini-trading-backend", location="us-west1")
+# the LLM only writes the optional summary, PIPELINE_LLM_SUMMARY=1 turns it on
+LLM_SUMMARY = os.getenv("PIPELINE_LLM_SUMMARY", "0") == "1"
+DRY_RUN = os.getenv("PIPELINE_DRY_RUN", "0") == "1"
+INTERVAL = timedelta(minutes=float(os.getenv("PIPELINE_INTERVAL_MINUTES", "60")))
 
 
 def on_message(message):
@@ -16,66 +19,29 @@ def on_message(message):
 
 
 def create_client():
-    return investor_agent.create_agent(model_name="gemini-1.5-pro-002", debug=False, on_message=on_message)
+    import vertexai
+    vertexai.init(project="gemini-trading-backend", location="us-west1")
+    return investor_agent.create_agent(model_name="gemini-1.5-pro-002", debug=False, on_message=on_message,
+                                       add_scheduling_functions=False)
 
 
 def run_the_pipeline():
-    investor_agent = create_client()
-
-    pipeline = Pipeline(default_agent=investor_agent, use_convert_to_bool_agent=True, debug=False)
-    # if not pipeline.boolean_step("is the market open now?")[0]:
-    #     print(pipeline.summary())
-    #     return
-    pipeline.if_step("Is the current account a production account (not a paper account)?", 
-                     then_steps=["Switch to paper account"], 
-                     else_steps=[])
-    tqqq_price, _ = pipeline.int_step("Get the current TQQQ price")
-    limit_sell_price = tqqq_price * 1.05
-    stop_loss_price = tqqq_price * 0.01
-    buy_price = tqqq_price * 0.97
-        # Check if we currently own at least 100 shares of TQQQ
-    own_more_than_100, _ = pipeline.boolean_step("Do I currently own 100 or more shares of TQQQ?")
-    if own_more_than_100:
-        # Check if a limit sell order for TQQQ already exists
-        if pipeline.boolean_step("Does a limit sell order for TQQQ already exist?")[0]:
-            print(pipeline.summarize_full_history()[0])
-        else:
-            pipeline.step(f"Place a limit sell order for 100 shares of TQQQ at {limit_sell_price}")
+    started = time.perf_counter()
+    result = run_dip_strategy(dry_run=DRY_RUN)
+    print(result)
+    print(f"Pipeline run took {time.perf_counter() - started:.2f}s")
+    if LLM_SUMMARY:
+        print(tqqq_dip.summarize(result, create_client()))
 
-    # Check if there's an active (non-canceled) limit buy order for TQQQ
-    is_there_a_limit_buy, history_with_buy_order = pipeline.boolean_step(
-        "Is there an active (non-canceled, not pending cancel) limit buy order for TQQQ?"
-    )
-    if is_there_a_limit_buy:
-        if own_more_than_100:
-            pipeline.step("Cancel the active limit buy order for TQQQ", history=history_with_buy_order)
-        else:
-            _, history_with_buy_orders = pipeline.step("Retrieve the latest active limit buy orders for TQQQ", 
-                                                       history=history_with_buy_order)
-            limit_buy_price, _ = pipeline.float_step(
-                "Get the limit buy price of the latest active limit buy order for TQQQ", 
-                history=history_with_buy_orders
-            )
-            pipeline.if_step(
-                f"Is the limit buy price strictly lower than {limit_buy_price * 0.95}?",
-                then_steps=[
-                    "Cancel the active limit buy order for TQQQ",
-                    f"Place a limit buy order for 100 shares of TQQQ at {buy_price}"
-                ],
-                else_steps=[],
-                history=history_with_buy_orders
-            )
-    elif not own_more_than_100:
-        pipeline.step(f"Place a limit buy order for 100 shares of TQQQ at {buy_price}")
 
-    pipeline.summarize_full_history()[0]
+def run_in_session():
+    with market_data_session():
+        run_the_pipeline()
 
 
-# run the pipeline once each 1 hour
-while True:
-    try:
-        run_the_pipeline()  
-    except Exception as e:
-        print(f"Error: {e}")
-        traceback.print_exc()
-    time.sleep(36000)  
\ No newline at end of file
+if __name__ == "__main__":
+    start_quote_stream()
+    # runs every INTERVAL from the market open, only while the market is open
+    scheduler = MarketHoursScheduler(run_in_session, INTERVAL)
+    scheduler.install_signal_handlers()
+    scheduler.run()
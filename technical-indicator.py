@@ -1,5 +1,5 @@
-import yfinance as yf
 import pandas as pd
+from investor_agent.utils.bar_cache import get_bars
 """
 RSI:
 Buy: RSI < 30
@@ -66,8 +66,7 @@ def calculate_atr(data, period=14):
 
 # Stock Data Fetching
 def get_stock_data(ticker, period='3mo', interval='1d'):
-    stock_data = yf.download(ticker, period=period, interval=interval)
-    return stock_data
+    return get_bars(ticker, period=period, interval=interval)
 
 # Signal Check for RSI
 def check_rsi_signal(rsi):
@@ -1,25 +1,57 @@
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 from telegram import Bot
 from dotenv import load_dotenv
-from telegram_client import send_message
+import telegram_client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import traceback
 import common
+import investor_agent
+from investor_agent.utils.market_data import market_data_session
+from investor_agent.utils.quote_stream import start_quote_stream
+from investor_agent.utils.client_pool import ClientPool
 
 chat_ids = [str(id) for id in os.getenv('TELEGRAM_CHAT_IDS').split(',')]
 telegram_token = os.getenv('TELEGRAM_TOKEN')
 with open("version", "r") as version_file:
     VERSION = version_file.read()
 
-CLIENTS = {
-}
+
+# agent turns run on worker threads, one turn at a time per chat and at most BOT_MAX_CONCURRENT_TURNS overall
+MAX_CONCURRENT_TURNS = int(os.getenv("BOT_MAX_CONCURRENT_TURNS", "4"))
+TURN_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TURNS, thread_name_prefix="agent-turn")
+CHAT_QUEUES = {}
+CHAT_WORKERS = {}
+TURN_STATS = {"running": 0, "completed": 0, "failed": 0}
 
 def generate_client_function(chat_id):
     def send_msg_to_user(msg: str):
         """Send a message to the user. Use this function to send messages to the user, not just return text string. Text string that you generate(that is not passed to this function) can be random. User will not see it."""
-        send_message(chat_id, msg)
+        telegram_client.queue_message(chat_id, msg)
     return send_msg_to_user
 
 
+def has_scheduled_jobs(clt):
+    scheduler = getattr(clt, "scheduler", None)
+    return scheduler is not None and bool(scheduler.get_jobs())
+
+
+def shutdown_client(clt):
+    # jobs are reloaded from GCS by the next client of the chat, the old scheduler must not run them twice
+    scheduler = getattr(clt, "scheduler", None)
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+
+
+CLIENTS = ClientPool(
+    lambda chat_id: common.create_client(str(chat_id), generate_client_function(str(chat_id))),
+    is_pinned=has_scheduled_jobs,
+    on_evict=shutdown_client,
+    shared=investor_agent.AgentTemplate.instances)
+
+
 async def get_version(update, context):
     await update.message.reply_text(f"Version: {VERSION}")
 
@@ -27,27 +59,78 @@ async def get_version(update, context):
 async def drop_client(update, context):
     if str(update.message.chat_id) not in chat_ids:
         return
-    CLIENTS.pop(update.message.chat_id, None)
+    CLIENTS.drop(update.message.chat_id)
     await update.message.reply_text("Client dropped.")
 
 
+async def client_stats(update, context):
+    if str(update.message.chat_id) not in chat_ids:
+        return
+    stats = await asyncio.get_running_loop().run_in_executor(None, CLIENTS.stats)
+    lines = [f"Clients: {len(stats)}/{CLIENTS.max_size}, idle TTL {CLIENTS.idle_ttl:.0f}s"]
+    lines += [f"{s['key']}: idle {s['idle_seconds']}s, age {s['age_seconds']}s, built in {s['build_seconds']}s, "
+              f"~{s['approx_bytes'] / 1024:.0f} KiB{', pinned' if s['pinned'] else ''}" for s in stats]
+    await update.message.reply_text("\n".join(lines))
+
+
 async def start(update, context):
     if str(update.message.chat_id) not in chat_ids:
         return
     await update.message.reply_text('One sec, warming up.')
 
 
+def run_turn(chat_id, text):
+    """Runs one agent turn, on a worker thread."""
+    clt = CLIENTS.get(chat_id)
+    with market_data_session():
+        clt.send_message(text)
+
+
+async def run_chat_turns(chat_id):
+    """Runs the queued messages of a chat one after another, other chats run in parallel."""
+    loop = asyncio.get_running_loop()
+    queue = CHAT_QUEUES[chat_id]
+    try:
+        while queue:
+            text = queue.popleft()
+            TURN_STATS["running"] += 1
+            try:
+                await loop.run_in_executor(TURN_EXECUTOR, run_turn, chat_id, text)
+                TURN_STATS["completed"] += 1
+            except Exception as e:
+                TURN_STATS["failed"] += 1
+                print(f"Agent turn for {chat_id} failed: {e}")
+                traceback.print_exc()
+            finally:
+                TURN_STATS["running"] -= 1
+    finally:
+        del CHAT_WORKERS[chat_id]
+        if not queue:
+            CHAT_QUEUES.pop(chat_id, None)
+
+
 async def message(update, context):
     if update and update.message and str(update.message.chat_id) not in chat_ids:
         return
-    clt = CLIENTS.get(update.message.chat_id, None)
-    if not clt:
-        clt = common.create_client(str(update.message.chat_id), generate_client_function(str(update.message.chat_id)))
-        CLIENTS[update.message.chat_id] = clt
-    clt.send_message(update.message.text)
+    chat_id = update.message.chat_id
+    CHAT_QUEUES.setdefault(chat_id, deque()).append(update.message.text)
+    if chat_id not in CHAT_WORKERS:
+        CHAT_WORKERS[chat_id] = asyncio.get_running_loop().create_task(run_chat_turns(chat_id))
     # await update.message.reply_text(answer)
 
 
+async def queue_stats(update, context):
+    if str(update.message.chat_id) not in chat_ids:
+        return
+    waiting = {chat_id: len(queue) for chat_id, queue in CHAT_QUEUES.items() if queue}
+    await update.message.reply_text(
+        f"Turns in progress: {TURN_STATS['running']} (at most {MAX_CONCURRENT_TURNS} run at once)\n"
+        f"Waiting messages: {sum(waiting.values())}\n"
+        f"Active chats: {len(CHAT_WORKERS)}\n"
+        f"Waiting per chat: {waiting}\n"
+        f"Completed: {TURN_STATS['completed']}, failed: {TURN_STATS['failed']}")
+
+
 async def get_chat_id(update, context):
     chat_id = update.message.chat_id
     await update.message.reply_text(f"Your chat ID is: {chat_id}")
@@ -56,9 +139,18 @@ async def get_chat_id(update, context):
 bot = Bot(token=telegram_token)
 
 
+async def close_telegram_client(application):
+    # messages the agent queued last are still sent before the process exits
+    await asyncio.get_running_loop().run_in_executor(None, telegram_client.close, 30)
+
+
 def main():
     print("starting")
-    application = Application.builder().bot(bot).build()
+    start_quote_stream()
+    CLIENTS.start_sweeper()
+    if os.getenv("BOT_PREWARM_CLIENTS", "1") != "0":
+        CLIENTS.prewarm([int(chat_id) for chat_id in chat_ids])
+    application = Application.builder().bot(bot).post_shutdown(close_telegram_client).build()
     start_handler = CommandHandler('start', start)
     application.add_handler(start_handler)
     drop_client_handler = CommandHandler('drop_client', drop_client)
@@ -67,6 +159,10 @@ def main():
     application.add_handler(get_version_handler)
     get_chat_id_handler = CommandHandler('get_chat_id', get_chat_id)
     application.add_handler(get_chat_id_handler)    
+    queue_stats_handler = CommandHandler('queue_stats', queue_stats)
+    application.add_handler(queue_stats_handler)
+    client_stats_handler = CommandHandler('client_stats', client_stats)
+    application.add_handler(client_stats_handler)
 
     main_handler = MessageHandler(filters.TEXT, message)
     application.add_handler(main_handler)
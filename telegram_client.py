@@ -1,17 +1,181 @@
-from urllib.parse import quote
+import asyncio
 import os
-import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
 telegram_token = os.getenv('TELEGRAM_TOKEN')
 
-def send_message(chat_id, message_to_send):
+"""
+Outbound Telegram messages go through one asyncio queue on a background thread.
+
+queue_message() only enqueues and returns a Future, so callers (the bot's event
+loop, agent worker threads) never wait for the network, send_message() waits
+for Telegram's answer. close() sends what is queued on shutdown. Messages
+are POSTed over one pooled HTTP client, at most TELEGRAM_GLOBAL_PER_SECOND
+(30) per second overall and one per TELEGRAM_PER_CHAT_INTERVAL (1s) per chat.
+Messages arriving for the same chat within TELEGRAM_MERGE_WINDOW_MS are merged
+into one, longer texts are split at Telegram's 4096 character limit. 429s
+are retried after Telegram's retry_after, other failures with a backoff.
+"""
+
+MAX_MESSAGE_LENGTH = 4096
+MAX_ATTEMPTS = 5
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """Splits text into chunks of at most `limit` characters, preferably at line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut < limit // 2:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class TelegramSender:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, token, *, global_per_second=None, per_chat_interval=None, merge_window=None, base_url="https://api.telegram.org"):
+        self.url = f"{base_url}/bot{token}/sendMessage"
+        self.global_interval = 1 / (global_per_second or float(os.getenv("TELEGRAM_GLOBAL_PER_SECOND", "30")))
+        self.per_chat_interval = per_chat_interval if per_chat_interval is not None else float(os.getenv("TELEGRAM_PER_CHAT_INTERVAL", "1"))
+        self.merge_window = merge_window if merge_window is not None else float(os.getenv("TELEGRAM_MERGE_WINDOW_MS", "300")) / 1000
+        self._pending = {}
+        self._drainers = {}
+        self._chat_ready_at = {}
+        self._next_global_slot = 0.0
+        self._client = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="telegram-sender", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = TelegramSender(telegram_token)
+            return cls._instance
+
+    def send(self, chat_id, text) -> Future:
+        """Queues a message, thread-safe. The Future resolves to Telegram's answer for the last chunk it was sent in."""
+        future = Future()
+        self._loop.call_soon_threadsafe(self._enqueue, str(chat_id), text, future)
+        return future
+
+    def flush(self, timeout=None):
+        """Waits until every queued message was sent (or failed)."""
+        asyncio.run_coroutine_threadsafe(self._wait_idle(), self._loop).result(timeout)
+
+    def close(self, timeout=None):
+        self.flush(timeout)
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _enqueue(self, chat_id, text, future):
+        self._pending.setdefault(chat_id, deque()).append((text, future))
+        if chat_id not in self._drainers:
+            self._drainers[chat_id] = self._loop.create_task(self._drain(chat_id))
+
+    async def _wait_idle(self):
+        while self._drainers:
+            await asyncio.gather(*self._drainers.values(), return_exceptions=True)
+
+    async def _drain(self, chat_id):
+        try:
+            # give the agent a moment to send the rest of a burst
+            await asyncio.sleep(self.merge_window)
+            pending = self._pending[chat_id]
+            while pending:
+                batch = self._take_batch(pending)
+                text = "\n\n".join(text for text, _ in batch)
+                try:
+                    result = None
+                    for chunk in split_message(text):
+                        result = await self._send_chunk(chat_id, chunk)
+                except Exception as e:
+                    print(f"Could not send a message to {chat_id}: {e}")
+                    for _, future in batch:
+                        future.set_exception(e)
+                else:
+                    for _, future in batch:
+                        future.set_result(result)
+        finally:
+            del self._drainers[chat_id]
+            if not self._pending.get(chat_id):
+                self._pending.pop(chat_id, None)
+
+    @staticmethod
+    def _take_batch(pending):
+        """Takes the queued messages of a chat that fit into one Telegram message (at least one)."""
+        batch = [pending.popleft()]
+        length = len(batch[0][0])
+        while pending and length + 2 + len(pending[0][0]) <= MAX_MESSAGE_LENGTH:
+            length += 2 + len(pending[0][0])
+            batch.append(pending.popleft())
+        return batch
+
+    async def _wait_for_slot(self, chat_id):
+        now = time.monotonic()
+        ready_at = max(self._chat_ready_at.get(chat_id, 0.0), self._next_global_slot, now)
+        self._next_global_slot = ready_at + self.global_interval
+        self._chat_ready_at[chat_id] = ready_at + self.per_chat_interval
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+    async def _send_chunk(self, chat_id, text):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await self._wait_for_slot(chat_id)
+            try:
+                response = await self._client.post(self.url, json={"chat_id": chat_id, "text": text})
+                result = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                print(f"Telegram request failed ({e}), retrying")
+                await asyncio.sleep(min(30, 2 ** attempt))
+                continue
+            if response.status_code == 429:
+                retry_after = result.get("parameters", {}).get("retry_after", 1)
+                # the chat may not send again before retry_after
+                self._chat_ready_at[chat_id] = time.monotonic() + retry_after
+                continue
+            if response.status_code >= 500 and attempt < MAX_ATTEMPTS:
+                await asyncio.sleep(min(30, 2 ** attempt))
+                continue
+            print("answer is: " + str(result))
+            return result
+        raise RuntimeError(f"Telegram kept rejecting messages to {chat_id}: {result}")
+
+
+def queue_message(chat_id, message_to_send) -> Future:
+    """Queues a message without waiting, the Future resolves to Telegram's answer."""
     print(message_to_send)
-    # Encode the message to be safely used in a URL
-    encoded_message = quote(message_to_send)
-    url = f"https://api.telegram.org/bot{telegram_token}/sendMessage?chat_id={chat_id}&text={encoded_message}"
-    result = requests.get(url).json()
-    print("answer is: " + str(result))
-    return result
+    return TelegramSender.get_instance().send(chat_id, message_to_send)
+
+
+def send_message(chat_id, message_to_send):
+    """Sends a message and returns Telegram's answer."""
+    return queue_message(chat_id, message_to_send).result()
+
+
+def close(timeout=None):
+    """Sends the queued messages and stops the sender, if one was started."""
+    with TelegramSender._instance_lock:
+        sender, TelegramSender._instance = TelegramSender._instance, None
+    if sender is not None:
+        sender.close(timeout)
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+class StandInServer:
+    """
+    Websocket server on its own event loop thread, standing in for an Alpaca stream endpoint.
+    handler(server, websocket) is awaited for every connection, drop() closes the open ones.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.connections = []
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self._server = self.call(self._serve())
+        self.url = f"ws://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+
+    async def _serve(self):
+        import websockets
+        return await websockets.serve(self._handle, "127.0.0.1", 0)
+
+    async def _handle(self, websocket, *args):
+        self.connections.append(websocket)
+        await self.handler(self, websocket)
+
+    def call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout=10)
+
+    def send(self, message):
+        """Sends the message to the latest connection."""
+        self.call(self.connections[-1].send(message))
+
+    def drop(self):
+        # the client may reconnect while they are closed, leave its new connection open
+        for websocket in list(self.connections):
+            self.call(websocket.close())
+
+    def close(self):
+        self._server.close()
+        self.call(self._server.wait_closed())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    @staticmethod
+    def wait_until(condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("timed out waiting for the stream")
+            time.sleep(0.02)
+
+
+@pytest.fixture
+def stand_in_server():
+    servers = []
+
+    def start(handler):
+        server = StandInServer(handler)
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.close()
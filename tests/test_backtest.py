@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from investor_agent.strategies import backtest
+
+
+def reference(open_, high, low, close, take_profit, buy_discount, stale_buy, every, qty):
+    """Bar by bar scalar simulation of one combination, the semantics simulate() vectorizes."""
+    holding, buy_px, sell_px = False, None, None
+    cash = traded = peak = max_drawdown = equity = 0.0
+    trips = 0
+    for d in range(0, len(close) - 1, every):
+        price = close[d]
+        if holding and sell_px is None:
+            sell_px = round(price * take_profit, 2)
+        if holding:
+            buy_px = None
+        elif buy_px is None or buy_px < price * stale_buy:
+            buy_px = round(price * buy_discount, 2)
+        end = min(d + every, len(close) - 1)
+        for j in range(d + 1, end + 1):
+            if not holding and buy_px is not None and low[j] <= buy_px:
+                fill = min(buy_px, open_[j])
+                cash -= qty * fill
+                traded += qty * fill
+                holding, buy_px = True, None
+                break
+            if holding and sell_px is not None and high[j] >= sell_px:
+                fill = max(sell_px, open_[j])
+                cash += qty * fill
+                traded += qty * fill
+                holding, sell_px = False, None
+                trips += 1
+                break
+        equity = cash + holding * qty * close[end]
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+    return {"pnl": equity, "max_drawdown": max_drawdown, "turnover": traded / (qty * close[0]), "round_trips": trips}
+
+
+def random_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    # opens away from the previous close, so some bars gap through the limits
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.01, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, n)))
+    return open_, high, low, close
+
+
+def test_gap_through_fills_and_stale_buy_replacement():
+    #                     0      1      2      3      4      5
+    open_ = np.array([100.0, 99.0, 100.0, 100.0, 108.0, 108.0])
+    high = np.array([100.0, 100.0, 111.0, 101.0, 109.0, 108.0])
+    low = np.array([100.0, 98.0, 99.0, 99.0, 107.0, 107.0])
+    close = np.array([100.0, 99.0, 110.0, 100.0, 108.0, 107.0])
+    # bar 0: buy at 97, bar 2 closes at 110 so 97 < 110 * 0.95 is replaced by 106.70,
+    # bar 3 opens at 100 below it (bought at 100), bar 4 opens at 108 above the 105 take profit (sold at 108)
+    results = backtest.simulate(open_, high, low, close, [1.05], [0.97], [0.95], 1, qty=1)
+    assert results["pnl"][0] == pytest.approx(8.0)
+    assert results["round_trips"][0] == 1
+    assert results["turnover"][0] == pytest.approx(2.08)
+    assert not results["holding"][0]
+
+
+@pytest.mark.parametrize("every", [1, 3, 10])
+def test_simulate_matches_scalar_reference(every):
+    bars = random_bars(2000)
+    combos = [(1.02, 0.99, 0.98), (1.05, 0.97, 0.95), (1.03, 0.995, 0.9)]
+    take_profit, buy_discount, stale_buy = zip(*combos)
+    results = backtest.simulate(*bars, take_profit, buy_discount, stale_buy, every, qty=10)
+    for i, combo in enumerate(combos):
+        expected = reference(*bars, *combo, every, 10)
+        assert expected["round_trips"] > 0
+        for key, value in expected.items():
+            assert results[key][i] == pytest.approx(value, rel=1e-9, abs=1e-9), key
+
+
+def test_simulate_rejects_every_below_one():
+    with pytest.raises(ValueError):
+        backtest.simulate(*random_bars(10), [1.05], [0.97], [0.95], 0)
+
+
+def test_one_chunk_per_every():
+    grid = backtest.make_grid([1.03, 1.05], [0.97, 0.99], [0.95], [1, 4, 8])
+    chunks = backtest._chunks(grid)
+    assert [every for every, _ in chunks] == [1, 4, 8]
+    assert all(len(combos) == 4 for _, combos in chunks)
+
+
+def test_run_grid_matches_simulate_across_workers():
+    bars = random_bars(1500, seed=4)
+    grid = backtest.make_grid([1.02, 1.05], [0.97, 0.99], [0.95], [1, 3, 10])
+    rows = backtest.run_grid(bars, grid, qty=10, max_workers=2)
+    assert len(rows) == len(grid)
+    for row in rows:
+        expected = reference(*bars, row["take_profit"], row["buy_discount"], row["stale_buy"], row["every"], 10)
+        for key, value in expected.items():
+            assert row[key] == pytest.approx(value, rel=1e-9, abs=1e-9), key
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from investor_agent.utils.client_pool import ClientPool
+
+
+class Client:
+    def __init__(self, key, pinned=False):
+        self.key = key
+        self.pinned = pinned
+
+
+def test_new_client_is_kept_when_all_older_ones_are_pinned():
+    evicted = []
+    pool = ClientPool(lambda key: Client(key, pinned=key != "new"), max_size=2, is_pinned=lambda c: c.pinned,
+                      on_evict=evicted.append)
+    pool.get("a")
+    pool.get("b")
+    client = pool.get("new")
+    assert evicted == []
+    assert "new" in pool
+    assert pool.get("new") is client
+
+
+def test_least_recently_used_client_is_evicted():
+    evicted = []
+    pool = ClientPool(Client, max_size=2, on_evict=evicted.append)
+    pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+    assert [c.key for c in evicted] == ["b"]
+    assert "a" in pool and "c" in pool
+
+
+def test_one_build_per_key_while_it_is_dropped():
+    building = threading.Event()
+    release = threading.Event()
+    builds = []
+
+    def factory(key):
+        builds.append(key)
+        building.set()
+        release.wait(5)
+        return Client(key)
+
+    pool = ClientPool(factory, max_size=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("a"))) for _ in range(3)]
+    threads[0].start()
+    building.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # dropping the key must not hand a caller arriving now a second build lock
+    pool.drop("a")
+    late = threading.Thread(target=lambda: results.append(pool.get("a")))
+    late.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads + [late]:
+        thread.join(5)
+    assert builds == ["a"]
+    assert len(results) == 4 and all(client is results[0] for client in results)
+    assert pool._key_locks == {}
@@ -0,0 +1,32 @@
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+
+from investor_agent.utils import greeks
+
+
+def contract(strike, close_price, close_price_date, option_type="call", expiration_date=date(2026, 12, 18)):
+    return SimpleNamespace(strike_price=strike, close_price=close_price, close_price_date=close_price_date,
+                           type=option_type, expiration_date=expiration_date)
+
+
+def test_contract_greeks_price_against_the_underlying_close_of_the_same_day():
+    day, sigma, r = date(2026, 10, 16), 0.35, 0.04
+    T = greeks.years_to_expiry([date(2026, 12, 18)], greeks.market_close(day))
+    strikes = np.array([90.0, 100.0, 110.0])
+    prices = greeks.black_scholes(100.0, strikes, T, r, sigma, [True, False, True]).price
+    contracts = [contract(k, str(p), day, t) for k, p, t in zip(strikes, prices, ("call", "put", "call"))]
+    # a later close of the underlying must not change the greeks of the options' closes
+    closes = {day: 100.0, date(2026, 10, 17): 120.0}
+    result = greeks.contract_greeks(contracts, closes, r=r)
+    np.testing.assert_allclose(result.iv, sigma, atol=1e-5)
+    expected = greeks.black_scholes(100.0, strikes, T, r, sigma, [True, False, True])
+    np.testing.assert_allclose(result.delta, expected.delta, atol=1e-5)
+
+
+def test_contract_greeks_are_nan_without_a_matching_close():
+    contracts = [contract(100.0, "5.0", date(2026, 10, 16)), contract(100.0, None, None), contract(100.0, "5.0", date(2026, 9, 1))]
+    result = greeks.contract_greeks(contracts, {date(2026, 10, 16): 100.0}, r=0.04)
+    assert np.isfinite(result.delta[0])
+    assert np.isnan(result.delta[1:]).all()
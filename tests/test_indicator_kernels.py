@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from investor_agent.utils import indicator_kernels as kernels
+
+
+def random_walk(rows, columns, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, (rows, columns)), axis=0)
+
+
+@pytest.mark.parametrize("span", [5, 12, 26])
+def test_ema_matches_pandas_with_interior_nans(span):
+    x = random_walk(120, 4)
+    x[:5, 0] = np.nan          # leading NaNs only
+    x[40:43, 1] = np.nan       # a 3-bar gap
+    x[[10, 50, 51, 90], 2] = np.nan
+    x[:7, 3] = np.nan          # leading NaNs and a gap
+    x[60:70, 3] = np.nan
+    expected = pd.DataFrame(x).ewm(span=span, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(kernels.ema(x, span), expected, rtol=1e-10, atol=1e-10)
+
+
+def test_ema_matches_pandas_1d_with_gap():
+    x = random_walk(80, 1, seed=1)[:, 0]
+    x[20:23] = np.nan
+    expected = pd.Series(x).ewm(span=12, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(kernels.ema(x, 12), expected, rtol=1e-10, atol=1e-10)
+
+
+def test_ema_matches_pandas_without_nans():
+    x = random_walk(5000, 3, seed=2)
+    expected = pd.DataFrame(x).ewm(span=26, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(kernels.ema(x, 26), expected, rtol=1e-9)
+
+
+def test_macd_matches_pandas_with_interior_nans():
+    close = random_walk(200, 2, seed=3)
+    close[100:103, 0] = np.nan
+    frame = pd.DataFrame(close)
+    expected_macd = frame.ewm(span=12, adjust=False).mean() - frame.ewm(span=26, adjust=False).mean()
+    expected_signal = expected_macd.ewm(span=9, adjust=False).mean()
+    macd, signal_line = kernels.macd(close)
+    np.testing.assert_allclose(macd, expected_macd.to_numpy(), rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(signal_line, expected_signal.to_numpy(), rtol=1e-10, atol=1e-10)
+
+
+def with_gaps(x):
+    x = x.copy()
+    x[:6, 0] = np.nan          # leading NaNs only
+    x[50:53, 1] = np.nan       # a 3-bar gap
+    x[[20, 80, 81], 2] = np.nan
+    x[:3, 3] = np.nan          # leading NaNs and a gap
+    x[100:110, 3] = np.nan
+    return x
+
+
+def random_ohlc(rows, columns, seed=0):
+    rng = np.random.default_rng(seed)
+    close = random_walk(rows, columns, seed)
+    high = close + np.abs(rng.normal(0, 0.5, close.shape))
+    low = close - np.abs(rng.normal(0, 0.5, close.shape))
+    return with_gaps(high), with_gaps(low), with_gaps(close)
+
+
+@pytest.mark.parametrize("window", [1, 3, 14])
+def test_rolling_kernels_match_pandas_with_nans(window):
+    x = with_gaps(random_walk(150, 4, seed=5))
+    rolling = pd.DataFrame(x).rolling(window=window)
+    np.testing.assert_allclose(kernels.rolling_mean(x, window), rolling.mean().to_numpy(), rtol=1e-10, atol=1e-10)
+    np.testing.assert_array_equal(kernels.rolling_min(x, window), rolling.min().to_numpy())
+    np.testing.assert_array_equal(kernels.rolling_max(x, window), rolling.max().to_numpy())
+
+
+def test_rolling_kernels_shorter_than_the_window():
+    x = random_walk(5, 2, seed=6)
+    for kernel in (kernels.rolling_mean, kernels.rolling_min, kernels.rolling_max):
+        assert np.isnan(kernel(x, 14)).all()
+
+
+def test_rsi_matches_pandas_with_nans():
+    close = with_gaps(random_walk(150, 4, seed=7))
+    delta = pd.DataFrame(close).diff(1)
+    avg_gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    avg_loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    expected = 100 - (100 / (1 + avg_gain / avg_loss))
+    np.testing.assert_allclose(kernels.rsi(close), expected.to_numpy(), rtol=1e-10, atol=1e-10)
+
+
+def test_stochastic_matches_pandas_with_nans():
+    high, low, close = (pd.DataFrame(a) for a in random_ohlc(150, 4, seed=8))
+    low_min = low.rolling(window=14).min()
+    high_max = high.rolling(window=14).max()
+    expected_k = 100 * (close - low_min) / (high_max - low_min)
+    expected_d = expected_k.rolling(window=3).mean()
+    stochastic_k, stochastic_d = kernels.stochastic(high.to_numpy(), low.to_numpy(), close.to_numpy())
+    np.testing.assert_allclose(stochastic_k, expected_k.to_numpy(), rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(stochastic_d, expected_d.to_numpy(), rtol=1e-10, atol=1e-10)
+
+
+def test_atr_matches_pandas_with_nans():
+    high, low, close = random_ohlc(150, 4, seed=9)
+    for column in range(close.shape[1]):
+        h, l, c = (pd.Series(a[:, column]) for a in (high, low, close))
+        true_range = pd.concat([h - l, (h - c.shift()).abs(), (l - c.shift()).abs()], axis=1).max(axis=1)
+        expected = true_range.rolling(window=14).mean()
+        np.testing.assert_allclose(kernels.atr(high, low, close)[:, column], expected.to_numpy(), rtol=1e-10, atol=1e-10)
@@ -0,0 +1,44 @@
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("alpaca")
+
+from investor_agent import utils
+
+
+@pytest.fixture
+def submitted():
+    with mock.patch.object(utils, "submit_order") as submit_order:
+        yield submit_order
+
+
+def test_stock_market_buy_without_exit_legs_is_rejected(submitted):
+    results = utils.submit_orders([
+        {"symbol": "TQQQ", "qty": 100, "side": "buy"},
+        {"symbol": "TQQQ", "qty": 100, "side": "sell", "type": "limit", "limit_price": 80},
+    ])
+    assert "take_profit_price and stop_loss_price" in results[0]["error"]
+    assert results[1]["error"] == "not submitted, another order is invalid"
+    submitted.assert_not_called()
+
+
+@pytest.mark.parametrize("exit_legs", [{"take_profit_price": 80}, {"stop_loss_price": 60}])
+def test_stock_market_buy_with_one_exit_leg_is_rejected(exit_legs):
+    with pytest.raises(ValueError):
+        utils.build_order_request({"symbol": "TQQQ", "qty": 100, "side": "buy", **exit_legs})
+
+
+def test_stock_market_buy_with_both_exit_legs_is_a_bracket():
+    from alpaca.trading.enums import OrderClass
+    request = utils.build_order_request({"symbol": "TQQQ", "qty": 100, "side": "buy", "take_profit_price": 80, "stop_loss_price": 60})
+    assert request.order_class == OrderClass.BRACKET
+
+
+def test_option_and_limit_buys_need_no_exit_legs():
+    option = utils.build_order_request({"underlying_symbol": "AAPL", "expiration_date": "2030-01-18", "option_type": "C",
+                                        "strike_price": 200, "qty": 1, "side": "buy"})
+    assert option.symbol == "AAPL300118C00200000"
+    assert utils.build_order_request({"symbol": "AAPL300118C00200000", "qty": 1, "side": "buy"}).symbol == "AAPL300118C00200000"
+    limit = utils.build_order_request({"symbol": "TQQQ", "qty": 100, "side": "buy", "type": "limit", "limit_price": 70})
+    assert limit.limit_price == 70
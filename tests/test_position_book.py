@@ -0,0 +1,98 @@
+import json
+import uuid
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("websockets")
+
+from alpaca.trading.models import Order, Position
+
+from investor_agent.utils import TradingClientSingleton
+from investor_agent.utils.position_book import PositionBook
+
+TIMESTAMP = "2026-10-16T14:00:00Z"
+
+
+def order(symbol, side="buy"):
+    return {"id": str(uuid.uuid4()), "client_order_id": str(uuid.uuid4()), "created_at": TIMESTAMP, "updated_at": TIMESTAMP,
+            "submitted_at": TIMESTAMP, "asset_id": str(uuid.uuid4()), "symbol": symbol, "asset_class": "us_equity",
+            "order_class": "simple", "order_type": "market", "type": "market", "side": side, "time_in_force": "day",
+            "status": "filled", "extended_hours": False}
+
+
+def fill(symbol, qty, price, position_qty):
+    return json.dumps({"stream": "trade_updates", "data": {
+        "event": "fill", "order": order(symbol), "timestamp": TIMESTAMP,
+        "price": str(price), "qty": str(qty), "position_qty": str(position_qty)}})
+
+
+def position(symbol, qty, price=100.0):
+    return Position(asset_id=uuid.uuid4(), symbol=symbol, exchange="NASDAQ", asset_class="us_equity", side="long",
+                    qty=str(qty), avg_entry_price=str(price), cost_basis=str(qty * price))
+
+
+@pytest.fixture
+def client():
+    client = mock.Mock()
+    with mock.patch.object(TradingClientSingleton, "get_client", return_value=client), \
+            mock.patch.object(TradingClientSingleton, "get_credentials", return_value=("key", "secret")):
+        yield client
+
+
+def test_fill_during_reconcile_is_kept(client):
+    book = PositionBook(False)
+
+    def get_all_positions():
+        # the stream applies fills while the REST request is in flight, its result predates them
+        book.apply_fill(Order(**order("AAPL")), 101, 5, 15)
+        book.apply_fill(Order(**order("MSFT")), 300, 2, 2)
+        return [position("AAPL", 10)]
+    client.get_all_positions.side_effect = get_all_positions
+    client.get_open_position.return_value = position("MSFT", 2, 300)
+
+    positions = {pos.symbol: pos for pos in book.reconcile()}
+    assert float(positions["AAPL"].qty) == 15
+    assert positions["MSFT"].qty == "2"
+    client.get_open_position.assert_called_once_with("MSFT")
+
+
+def test_stream_fills_and_reconnect(client, stand_in_server, monkeypatch):
+    listens = []
+
+    async def trading_stream(server, websocket):
+        auth = json.loads(await websocket.recv())
+        assert auth["action"] == "authenticate"
+        await websocket.send(json.dumps({"stream": "authorization", "data": {"action": "authenticate", "status": "authorized"}}))
+        listens.append(json.loads(await websocket.recv()))
+        await websocket.send(json.dumps({"stream": "listening", "data": {"streams": ["trade_updates"]}}))
+        await websocket.wait_closed()
+
+    server = stand_in_server(trading_stream)
+    monkeypatch.setenv("TRADING_STREAM_URL", server.url)
+    monkeypatch.setattr(PositionBook, "_books", {})
+    client.get_all_positions.return_value = [position("AAPL", 10)]
+    book = PositionBook.get_instance()
+    try:
+        server.wait_until(lambda: listens and book.stream_connected)
+        assert listens[0]["data"]["streams"] == ["trade_updates"]
+        assert book.get_positions()[0].qty == "10"
+
+        server.send(fill("AAPL", 5, 101, 15))
+        server.wait_until(lambda: float(book.positions["AAPL"].qty) == 15)
+        assert float(book.get_positions()[0].qty) == 15
+        assert client.get_all_positions.call_count == 1
+
+        # fills may be missed while disconnected, so the first read after the reconnect goes to REST
+        server.drop()
+        server.wait_until(lambda: len(listens) == 2 and book.stream_connected)
+        assert book.reconciled_at is None
+        client.get_all_positions.return_value = [position("AAPL", 20)]
+        assert book.get_positions()[0].qty == "20"
+        assert client.get_all_positions.call_count == 2
+
+        server.send(fill("AAPL", 5, 102, 25))
+        server.wait_until(lambda: float(book.positions["AAPL"].qty) == 25)
+    finally:
+        book.stop()
@@ -0,0 +1,85 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("alpaca")
+pytest.importorskip("websockets")
+msgpack = pytest.importorskip("msgpack")
+
+from investor_agent.utils import TradingClientSingleton, streams
+from investor_agent.utils.quote_stream import QuoteStream, start_quote_stream
+from investor_agent.utils.quotes import QuoteService
+
+
+def quote(symbol, bid, ask):
+    return {"T": "q", "S": symbol, "bx": "V", "bp": bid, "bs": 1, "ax": "V", "ap": ask, "as": 1,
+            "c": ["R"], "z": "C", "t": msgpack.Timestamp.from_unix(time.time())}
+
+
+def trade(symbol, price):
+    return {"T": "t", "S": symbol, "i": 1, "x": "V", "p": price, "s": 10, "c": ["@"], "z": "C",
+            "t": msgpack.Timestamp.from_unix(time.time())}
+
+
+def test_table_reconnect_backoff_and_resubscribe(stand_in_server, monkeypatch):
+    subscriptions = []
+    refused_auths = []
+
+    async def data_stream(server, websocket):
+        await websocket.send(msgpack.packb([{"T": "success", "msg": "connected"}]))
+        auth = msgpack.unpackb(await websocket.recv())
+        assert auth["action"] == "auth"
+        if server.refuse_auths:
+            server.refuse_auths -= 1
+            refused_auths.append(auth)
+            await websocket.send(msgpack.packb([{"T": "error", "code": 406, "msg": "connection limit exceeded"}]))
+            await websocket.close()
+            return
+        await websocket.send(msgpack.packb([{"T": "success", "msg": "authenticated"}]))
+        subscriptions.append(msgpack.unpackb(await websocket.recv()))
+        await websocket.send(msgpack.packb([{"T": "subscription", **subscriptions[-1]}]))
+        await websocket.wait_closed()
+
+    server = stand_in_server(data_stream)
+    server.refuse_auths = 0
+    attempts = []
+
+    def backoff_delay(attempt, **kwargs):
+        # streams of earlier tests may still be winding down on their own threads
+        if threading.current_thread().name == "quote-stream":
+            attempts.append(attempt)
+        return 0.01
+    monkeypatch.setattr(streams, "backoff_delay", backoff_delay)
+    monkeypatch.setenv("QUOTE_STREAM_URL", server.url)
+    monkeypatch.setattr(QuoteStream, "_instance", None)
+    monkeypatch.setattr(QuoteService, "_instance", None)
+
+    with mock.patch.object(TradingClientSingleton, "get_credentials", return_value=("key", "secret")):
+        stream = start_quote_stream(["aapl"])
+    try:
+        server.wait_until(lambda: subscriptions)
+        assert subscriptions[0]["quotes"] == ["AAPL"] and subscriptions[0]["trades"] == ["AAPL"]
+
+        server.send(msgpack.packb([quote("AAPL", 189.5, 189.7), trade("AAPL", 189.6)]))
+        server.wait_until(lambda: stream.get("AAPL") is not None and stream.get("AAPL").last_price == 189.6)
+        live = stream.get("AAPL")
+        assert (live.bid_price, live.ask_price) == (189.5, 189.7)
+        assert live.mid_price == pytest.approx(189.6)
+        # subscribed symbols are read from the table, without a REST request
+        assert QuoteService.get_instance().get_quote("AAPL") is live
+
+        # the next two connections are refused, each retry waits one backoff step longer
+        server.refuse_auths = 2
+        server.drop()
+        server.wait_until(lambda: len(subscriptions) == 2)
+        assert len(refused_auths) == 2
+        assert attempts == [1, 2]
+        assert subscriptions[1]["quotes"] == ["AAPL"] and subscriptions[1]["trades"] == ["AAPL"]
+
+        server.send(msgpack.packb([trade("AAPL", 190.1)]))
+        server.wait_until(lambda: stream.get("AAPL").last_price == 190.1)
+        assert stream.get("AAPL").bid_price == 189.5
+    finally:
+        stream.stop()
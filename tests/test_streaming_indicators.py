@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from investor_agent.utils import indicator_kernels as kernels
+from investor_agent.utils import streaming_indicators as streaming
+
+
+def random_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + np.abs(rng.normal(0, 0.5, n))
+    low = close - np.abs(rng.normal(0, 0.5, n))
+    return pd.DataFrame({"High": high, "Low": low, "Close": close})
+
+
+def bars_with_gaps(n=300, seed=0):
+    data = random_bars(n, seed)
+    data.iloc[:4] = np.nan               # leading NaN bars
+    data.iloc[100:103] = np.nan          # a 3-bar gap
+    data.loc[150, "Close"] = np.nan      # single NaN fields
+    data.loc[200, "Low"] = np.nan
+    data.loc[201, "High"] = np.nan
+    return data
+
+
+def expected(name, data):
+    high, low, close = (data[c].to_numpy() for c in ("High", "Low", "Close"))
+    if name == "rsi":
+        return kernels.rsi(close)
+    if name == "macd":
+        return np.column_stack(kernels.macd(close))
+    if name == "stochastic":
+        return np.column_stack(kernels.stochastic(high, low, close))
+    return kernels.atr(high, low, close)
+
+
+INDICATORS = {"rsi": streaming.StreamingRSI, "macd": streaming.StreamingMACD,
+              "stochastic": streaming.StreamingStochastic, "atr": streaming.StreamingATR}
+
+
+def stream(indicator, data):
+    return np.array([indicator.update(bar) for bar in data.to_dict("records")])
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+@pytest.mark.parametrize("data", [random_bars(300), bars_with_gaps()], ids=["dense", "gaps"])
+def test_update_matches_kernels(name, data):
+    np.testing.assert_allclose(stream(INDICATORS[name](), data), expected(name, data), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+@pytest.mark.parametrize("split", [2, 101, 160])
+def test_from_history_then_update_matches_kernels(name, split):
+    data = bars_with_gaps()
+    indicator = INDICATORS[name].from_history(data.iloc[:split])
+    np.testing.assert_allclose(stream(indicator, data.iloc[split:]), expected(name, data)[split:], rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+@pytest.mark.parametrize("split", [2, 101, 160])
+def test_restored_snapshot_continues_like_the_original(name, split):
+    data = bars_with_gaps()
+    indicator = INDICATORS[name].from_history(data.iloc[:split])
+    # snapshots are plain data, a JSON round trip must not change them
+    restored = INDICATORS[name].restore(json.loads(json.dumps(indicator.snapshot())))
+    # rolling means rebuild their running sum from the window, so only rounding may differ
+    np.testing.assert_allclose(stream(restored, data.iloc[split:]), stream(indicator, data.iloc[split:]), rtol=1e-12, atol=1e-12)
+
+
+def test_ema_holds_its_value_over_nans():
+    ema = streaming.Ema(5)
+    assert np.isnan(ema.update(np.nan))
+    assert ema.update(10.0) == 10.0
+    assert ema.update(np.nan) == 10.0
+    assert ema.update(20.0) > 10.0
+
+
+def test_rolling_extreme_is_nan_while_the_window_holds_a_nan():
+    rolling_min = streaming.RollingExtreme(3, is_max=False)
+    values = [rolling_min.update(v) for v in [5.0, np.nan, 4.0, 6.0, 7.0, 3.0]]
+    np.testing.assert_array_equal(values, [np.nan, np.nan, np.nan, np.nan, 4.0, 3.0])
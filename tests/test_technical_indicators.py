@@ -0,0 +1,28 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from investor_agent.calls import technical_momentum_indicator_calls as calls
+
+
+def bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close})
+
+
+def analyze(frames, tickers):
+    with mock.patch("investor_agent.utils.market_data.get_bars_many", return_value=frames):
+        return calls.analyze_stocks(tickers)
+
+
+def test_tickers_with_fewer_than_two_bars_are_reported_as_missing():
+    result = analyze({"AAPL": bars(1), "MSFT": bars(0)}, "AAPL,MSFT")
+    assert result == "No data for: AAPL, MSFT"
+
+
+def test_short_histories_do_not_hide_the_others():
+    result = analyze({"AAPL": bars(60), "MSFT": bars(1, seed=1)}, "AAPL,MSFT").splitlines()
+    assert result[1].startswith("AAPL")
+    assert result[-1] == "No data for: MSFT"
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+import telegram_client
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    messages = []
+
+    def answer(request):
+        body = json.loads(request.content)
+        messages.append(body)
+        return httpx.Response(200, json={"ok": True, "result": {"chat": {"id": body["chat_id"]}, "text": body["text"]}})
+
+    sender = telegram_client.TelegramSender("token", per_chat_interval=0, merge_window=0.05)
+    sender._client = httpx.AsyncClient(transport=httpx.MockTransport(answer))
+    monkeypatch.setattr(telegram_client.TelegramSender, "_instance", sender)
+    yield messages
+    telegram_client.close(5)
+
+
+def test_send_message_returns_telegrams_answer(posted):
+    answer = telegram_client.send_message(42, "hello")
+    assert answer == {"ok": True, "result": {"chat": {"id": "42"}, "text": "hello"}}
+
+
+def test_close_sends_the_queued_messages(posted):
+    futures = [telegram_client.queue_message(42, f"message {i}") for i in range(3)]
+    futures.append(telegram_client.queue_message(7, "other chat"))
+    telegram_client.close(5)
+    assert all(future.done() for future in futures)
+    # messages queued for a chat within the merge window go out as one
+    assert sorted(posted, key=lambda m: m["chat_id"]) == [
+        {"chat_id": "42", "text": "message 0\n\nmessage 1\n\nmessage 2"}, {"chat_id": "7", "text": "other chat"}]
+    assert telegram_client.TelegramSender._instance is None